@@ -0,0 +1,401 @@
+"""
+Controle de admissão das otimizações síncronas da API
+
+Antes de ocupar um worker cada otimização recebe uma estimativa de custo
+(peças, tamanhos distintos, algoritmo e materiais) e entra na fila da sua
+classe de tráfego: "interactive" (chamadas do chão de fábrica, orçamento
+de latência curto) ou "batch" (itens de /optimize/batch, orçamento longo).
+As classes dividem as vagas do pool (uma por worker) e têm filas próprias:
+uma vaga que abre vai primeiro para a fila interativa, e o lote não ocupa
+as vagas reservadas à classe interativa (CUTPLANNER_INTERACTIVE_RESERVED),
+então um lote grande não atrasa os terminais (com um único worker, um
+item de lote em execução ainda atrasa; a espera estimada o inclui).
+
+Com a espera estimada (custo restante das otimizações em execução em todas
+as classes e das filas à frente, dividido pelas vagas da classe) mais o
+custo da própria otimização:
+- fila cheia: AdmissionRejected 503 com Retry-After;
+- acima do orçamento da classe: troca por um algoritmo mais rápido da mesma
+  dimensão (FASTER_ALGORITHM) se ele couber, senão 429 com Retry-After
+  (ou 413 se nem com a fila vazia ela caberia: use POST /jobs).
+
+Os coeficientes de CostEstimator foram medidos numa máquina de 1 núcleo
+(ver docstring da classe); CUTPLANNER_COST_SCALE ajusta para o hardware.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from cutplanner.models import OptimizationRequest
+from cutplanner.partition import DIMENSIONS
+
+# Algoritmo mais rápido da mesma dimensão usado quando o pedido não cabe no orçamento.
+# guillotine fica de fora: skyline não garante cortes guilhotinados
+FASTER_ALGORITHM = {
+    "genetic": "best_fit",
+    "column_generation": "best_fit",
+    "multistart": "skyline",
+    "maxrects": "skyline",
+}
+
+
+class AdmissionRejected(RuntimeError):
+    """Otimização recusada pelo controle de admissão"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None):
+        """
+        Args:
+            status_code: 429 (orçamento), 503 (fila cheia) ou 413 (grande demais para a classe)
+            detail: Mensagem para o cliente
+            retry_after: Segundos sugeridos até tentar de novo (None: não adianta tentar)
+        """
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Optional[Dict[str, str]]:
+        """Cabeçalho Retry-After (segundos inteiros, mínimo 1)"""
+        if self.retry_after is None:
+            return None
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class CostEstimator:
+    """
+    Estimativa do tempo de uma otimização, em ms
+
+    Medições de referência (1 núcleo, ms; peças / tamanhos distintos):
+    - best_fit/first_fit: 1k/20 -> 6, 10k/200 -> 65, 100k/200 -> ~900;
+    - column_generation: 1k/20 -> 85, 10k/200 -> ~11 000 (cresce com os distintos);
+    - genetic: best_fit + genetic_time_budget_ms;
+    - skyline: 1k -> 49, 5k -> 225, 20k -> 733;
+    - maxrects: 1k -> 218, 5k -> 1626 (superlinear);
+    - guillotine: 1k/50 -> 723, 5k/100 -> 3939, 20k/100 -> 5514;
+    - multistart: 4 execuções, 1 processo: 1k -> 231, 5k -> 3940.
+    Os algoritmos que respeitam time_limit_ms (genetic, column_generation,
+    multistart) ficam limitados por ele.
+    """
+
+    def __init__(self, scale: float = 1.0, genetic_budget_ms: float = 2000,
+                 multistart_workers: Optional[int] = None):
+        """
+        Args:
+            scale: Multiplicador das estimativas (hardware mais lento > 1)
+            genetic_budget_ms: genetic_time_budget_ms do CutPlanner dos workers
+            multistart_workers: Processos do multi-start (padrão: núcleos da máquina)
+        """
+        self.scale = scale
+        self.genetic_budget_ms = genetic_budget_ms
+        self.multistart_workers = multistart_workers or os.cpu_count() or 1
+
+    def estimate(self, request: OptimizationRequest) -> float:
+        """Custo estimado da requisição inteira (partições 1D e 2D somadas)"""
+        total = 0.0
+        for material_types, part_type, algorithms, default in DIMENSIONS.values():
+            parts = [p for p in request.parts if p.part_type.value == part_type]
+            if not parts:
+                continue
+            materials = sum(1 for m in request.materials if m.material_type.value in material_types)
+            algorithm = request.algorithm if request.algorithm in algorithms else default
+            pieces = sum(p.quantity for p in parts)
+            distinct = len({(p.length, p.width) for p in parts})
+            total += self.algorithm_cost(algorithm, pieces, distinct, materials, request.time_limit_ms,
+                                         request.multistart_runs)
+        return total * self.scale
+
+    def algorithm_cost(self, algorithm: str, pieces: int, distinct: int, materials: int = 1,
+                       time_limit_ms: Optional[float] = None, multistart_runs: int = 16) -> float:
+        """
+        Custo estimado (sem `scale`) de uma dimensão
+
+        Args:
+            algorithm: Algoritmo da dimensão
+            pieces: Quantidade total de peças
+            distinct: Tamanhos distintos de peça
+            materials: Tipos de material candidatos
+            time_limit_ms: Prazo da requisição
+            multistart_runs: Execuções do multistart
+        """
+        # Cada tipo de material a mais é mais uma opção avaliada por peça
+        factor = 1 + 0.1 * max(0, materials - 1)
+        greedy = 5 + 0.009 * pieces
+        if algorithm in ("first_fit", "best_fit"):
+            return greedy * factor
+        if algorithm == "genetic":
+            return greedy * factor + self._limited(self.genetic_budget_ms, time_limit_ms)
+        if algorithm == "column_generation":
+            return greedy * factor + self._limited((50 + 0.25 * distinct ** 2) * factor, time_limit_ms)
+        if algorithm == "skyline":
+            return (5 + 0.04 * pieces) * factor
+        if algorithm == "maxrects":
+            return (5 + 0.039 * pieces ** 1.25) * factor
+        if algorithm == "guillotine":
+            return (5 + 0.75 * min(pieces, 50 * distinct) + 0.1 * pieces) * factor
+        if algorithm == "multistart":
+            # Metade das execuções no custo do maxrects, metade no do skyline
+            run = 0.5 * (0.039 * pieces ** 1.25 + 0.04 * pieces)
+            rounds = math.ceil(multistart_runs / self.multistart_workers)
+            return 5 + self._limited(run * rounds * factor, time_limit_ms)
+        return greedy * factor
+
+    @staticmethod
+    def _limited(cost: float, time_limit_ms: Optional[float]) -> float:
+        return cost if time_limit_ms is None else min(cost, time_limit_ms)
+
+
+class TrafficClass:
+    """Fila, concorrência e orçamento de latência de uma classe de tráfego"""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, latency_budget_ms: float):
+        """
+        Args:
+            name: Nome da classe ("interactive" ou "batch")
+            concurrency: Otimizações da classe em execução ao mesmo tempo
+            max_queue: Otimizações esperando vaga (além das em execução)
+            latency_budget_ms: Espera + execução estimadas aceitas por otimização
+        """
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max_queue
+        self.latency_budget_ms = latency_budget_ms
+        # ticket -> (início em time.monotonic, custo estimado em ms)
+        self._running: Dict[int, Tuple[float, float]] = {}
+        self._waiting: Deque[Tuple[int, float, asyncio.Future]] = deque()
+        self.admitted = 0
+        self.downgraded = 0
+        self.rejected_busy = 0
+        self.rejected_budget = 0
+        self.rejected_too_large = 0
+
+    @property
+    def running(self) -> int:
+        """Otimizações da classe em execução"""
+        return len(self._running)
+
+    @property
+    def queued(self) -> int:
+        """Otimizações da classe esperando vaga"""
+        return len(self._waiting)
+
+    def remaining_ms(self, now: float) -> float:
+        """Custo estimado ainda por executar das otimizações da classe em execução"""
+        return sum(max(0.0, cost - (now - started) * 1000) for started, cost in self._running.values())
+
+    def queued_ms(self) -> float:
+        """Custo estimado das otimizações da classe na fila"""
+        return sum(cost for _, cost, _ in self._waiting)
+
+    def stats(self) -> Dict[str, Any]:
+        """Ocupação e contadores da classe"""
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "latency_budget_ms": self.latency_budget_ms,
+            "running": self.running,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "downgraded": self.downgraded,
+            "rejected_busy": self.rejected_busy,
+            "rejected_budget": self.rejected_budget,
+            "rejected_too_large": self.rejected_too_large,
+        }
+
+
+class AdmissionController:
+    """
+    Estimativa de custo + classes de tráfego sobre as vagas do pool
+
+    As classes dividem `capacity` vagas (os workers do pool, que é FIFO):
+    nenhuma otimização é liberada para o pool sem vaga livre, então as
+    admitidas nunca esperam atrás de outras dentro dele. Quando uma vaga
+    abre, as classes são atendidas na ordem de `classes` (prioridade);
+    a concorrência de cada classe limita quantas vagas ela ocupa, o que
+    reserva vagas às demais.
+    """
+
+    def __init__(self, estimator: CostEstimator, classes: Dict[str, TrafficClass], capacity: int):
+        """
+        Args:
+            estimator: Estimador de custo das otimizações
+            classes: Classes de tráfego por nome, da mais para a menos prioritária
+            capacity: Otimizações em execução ao mesmo tempo, somando as classes
+        """
+        self.estimator = estimator
+        self.classes = classes
+        self.capacity = max(1, capacity)
+        self._next_ticket = 0
+
+    @classmethod
+    def from_env(cls, workers: int) -> "AdmissionController":
+        """
+        Configuração por variáveis de ambiente CUTPLANNER_*
+
+        CUTPLANNER_{INTERACTIVE,BATCH}_CONCURRENCY, _QUEUE e _BUDGET_MS;
+        CUTPLANNER_INTERACTIVE_RESERVED (vagas que o lote não ocupa, padrão
+        1/4 dos workers, no mínimo 1); CUTPLANNER_COST_SCALE. A capacidade é
+        o número de workers do pool; o lote fica com o restante depois da
+        reserva (no mínimo 1: com um único worker um item de lote em
+        execução ainda atrasa as chamadas interativas, e a espera estimada
+        delas inclui esse item).
+
+        Args:
+            workers: Workers do pool de otimizações (0 = threads)
+        """
+        def number(name: str, default: float, cast=int):
+            value = os.environ.get(name)
+            return cast(value) if value not in (None, "") else default
+
+        capacity = max(1, workers)
+        reserved = number("CUTPLANNER_INTERACTIVE_RESERVED", max(1, capacity // 4))
+        # Os encaixes do multi-start são distribuídos entre os workers do pool
+        estimator = CostEstimator(scale=number("CUTPLANNER_COST_SCALE", 1.0, float), multistart_workers=capacity)
+        classes = {
+            "interactive": TrafficClass(
+                "interactive",
+                concurrency=number("CUTPLANNER_INTERACTIVE_CONCURRENCY", capacity),
+                max_queue=number("CUTPLANNER_INTERACTIVE_QUEUE", capacity * 4),
+                latency_budget_ms=number("CUTPLANNER_INTERACTIVE_BUDGET_MS", 15000, float)
+            ),
+            "batch": TrafficClass(
+                "batch",
+                concurrency=number("CUTPLANNER_BATCH_CONCURRENCY", max(1, capacity - reserved)),
+                max_queue=number("CUTPLANNER_BATCH_QUEUE", 1000),
+                latency_budget_ms=number("CUTPLANNER_BATCH_BUDGET_MS", 600000, float)
+            ),
+        }
+        return cls(estimator, classes, capacity)
+
+    @property
+    def running(self) -> int:
+        """Otimizações em execução, somando as classes"""
+        return sum(limiter.running for limiter in self.classes.values())
+
+    def _can_start(self, limiter: TrafficClass) -> bool:
+        return limiter.running < limiter.concurrency and self.running < self.capacity
+
+    def estimated_wait_ms(self, traffic_class: str) -> float:
+        """
+        Espera estimada de uma otimização da classe que chegue agora
+
+        Soma o custo restante das otimizações em execução em todas as classes
+        e o das filas desta classe e das mais prioritárias, dividido pelas
+        vagas que a classe pode ocupar.
+        """
+        limiter = self.classes[traffic_class]
+        if self._can_start(limiter) and not limiter.queued:
+            return 0.0
+        now = time.monotonic()
+        backlog = sum(other.remaining_ms(now) for other in self.classes.values())
+        for name, other in self.classes.items():
+            backlog += other.queued_ms()
+            if name == traffic_class:
+                break
+        return backlog / min(self.capacity, limiter.concurrency)
+
+    async def _acquire(self, limiter: TrafficClass, cost_ms: float) -> int:
+        """Espera uma vaga para a classe; devolve o ticket a liberar com `_release`"""
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        if self._can_start(limiter) and not limiter.queued:
+            limiter._running[ticket] = (time.monotonic(), cost_ms)
+            return ticket
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (ticket, cost_ms, waiter)
+        limiter._waiting.append(entry)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A vaga já tinha sido concedida: repassa para o próximo
+                self._release(limiter, ticket)
+            else:
+                limiter._waiting.remove(entry)
+            raise
+        return ticket
+
+    def _release(self, limiter: TrafficClass, ticket: int) -> None:
+        """Libera a vaga do ticket e a concede às filas, na ordem de prioridade"""
+        limiter._running.pop(ticket, None)
+        for waiting in self.classes.values():
+            while waiting._waiting and self._can_start(waiting):
+                next_ticket, cost_ms, waiter = waiting._waiting.popleft()
+                if waiter.done():
+                    continue
+                waiting._running[next_ticket] = (time.monotonic(), cost_ms)
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, request: OptimizationRequest,
+                    traffic_class: str = "interactive") -> AsyncIterator[Tuple[OptimizationRequest, Dict[str, Any]]]:
+        """
+        Reserva uma vaga para a otimização na classe de tráfego
+
+        Uso: `async with controller.admit(request) as (request, info): ...`,
+        otimizando a requisição devolvida (pode ter o algoritmo trocado).
+        `info` traz class, estimated_ms, queued_ms e, se houve troca,
+        downgraded_from.
+
+        Raises:
+            AdmissionRejected: Fila cheia (503), acima do orçamento (429) ou
+                grande demais para a classe mesmo sem fila (413)
+        """
+        limiter = self.classes[traffic_class]
+        info: Dict[str, Any] = {"class": traffic_class}
+        if limiter.queued >= limiter.max_queue:
+            limiter.rejected_busy += 1
+            raise AdmissionRejected(
+                503, f"Fila de otimizações {traffic_class} cheia ({limiter.max_queue})",
+                retry_after=self.estimated_wait_ms(traffic_class) / 1000
+            )
+
+        wait_ms = self.estimated_wait_ms(traffic_class)
+        budget = limiter.latency_budget_ms
+        cost = self.estimator.estimate(request)
+        if wait_ms + cost > budget:
+            faster = FASTER_ALGORITHM.get(request.algorithm)
+            faster_cost = self.estimator.estimate(request.copy(update={"algorithm": faster})) if faster else None
+            if faster_cost is not None and wait_ms + faster_cost <= budget:
+                info["downgraded_from"] = request.algorithm
+                request = request.copy(update={"algorithm": faster})
+                cost = faster_cost
+                limiter.downgraded += 1
+            elif min(cost, faster_cost or cost) > budget:
+                limiter.rejected_too_large += 1
+                raise AdmissionRejected(
+                    413, f"Otimização estimada em {cost / 1000:.1f} s excede o orçamento de "
+                         f"{budget / 1000:g} s da classe {traffic_class}; use POST /jobs"
+                )
+            else:
+                limiter.rejected_budget += 1
+                raise AdmissionRejected(
+                    429, f"Otimização estimada em {cost / 1000:.1f} s com espera de {wait_ms / 1000:.1f} s "
+                         f"excede o orçamento de {budget / 1000:g} s da classe {traffic_class}",
+                    retry_after=(wait_ms + min(cost, faster_cost or cost) - budget) / 1000
+                )
+
+        info["estimated_ms"] = round(cost, 1)
+        arrived = time.monotonic()
+        ticket = await self._acquire(limiter, cost)
+        info["queued_ms"] = round((time.monotonic() - arrived) * 1000, 1)
+        limiter.admitted += 1
+        try:
+            yield request, info
+        finally:
+            self._release(limiter, ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        """Ocupação e contadores por classe de tráfego"""
+        return {
+            "capacity": self.capacity,
+            "running": self.running,
+            **{name: {**limiter.stats(), "estimated_wait_ms": round(self.estimated_wait_ms(name), 1)}
+               for name, limiter in self.classes.items()},
+        }
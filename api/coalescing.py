@@ -0,0 +1,78 @@
+"""
+Coalescência de otimizações idênticas em andamento (single-flight)
+
+Na troca de turno vários terminais enviam o mesmo pedido em poucos
+segundos. A primeira requisição de uma chave (hash canônico do pedido)
+inicia a otimização; as que chegam enquanto ela roda esperam o mesmo
+resultado em vez de ocupar outro worker. Nada fica guardado depois que a
+otimização termina (isso é papel do cache de resultados).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    Uma execução por chave em andamento
+
+    A execução roda numa tarefa própria: se o cliente que a iniciou
+    desconectar, as que estão esperando continuam recebendo o resultado.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    @property
+    def inflight(self) -> int:
+        """Execuções em andamento"""
+        return len(self._inflight)
+
+    async def run(self, key: str, start: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Executa `start()` ou espera a execução em andamento com a mesma chave
+
+        Exceções da execução chegam a todos que a esperam.
+
+        Args:
+            key: Chave da execução
+            start: Cria a execução (só chamada se não houver uma em andamento)
+
+        Returns:
+            Tupla (resultado, True se veio de uma execução já em andamento)
+        """
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        if coalesced:
+            self.coalesced += 1
+            self._waiters[key] += 1
+            self.max_waiters = max(self.max_waiters, self._waiters[key])
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(start())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._finish(key))
+        return await asyncio.shield(task), coalesced
+
+    def _finish(self, key: str) -> None:
+        task = self._inflight.pop(key)
+        self._waiters.pop(key, None)
+        if not task.cancelled():
+            # Marca a exceção como lida mesmo que ninguém espere mais pela tarefa
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de coalescência"""
+        requests = self.leaders + self.coalesced
+        return {
+            "inflight": self.inflight,
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "max_waiters": self.max_waiters,
+            "coalesced_rate": self.coalesced / requests if requests else 0.0,
+        }
@@ -0,0 +1,435 @@
+"""
+Execução das otimizações fora do event loop, em um pool de processos
+
+As requisições viajam para os workers como tuplas simples (uma por
+material/peça) em vez de árvores pydantic serializadas, e o resultado
+volta como dicionário pronto para JSON.
+
+Os workers não abrem processos próprios. Quando uma otimização tem
+trabalho paralelo (cadeias de partições independentes ou os encaixes do
+multi-start), ela é coordenada numa thread da API e esse trabalho vira
+tarefas dos mesmos workers: a latência é a da parte mais lenta e o total
+de processos não passa do tamanho do pool.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from cutplanner import CutPlanner
+from cutplanner.models import Material, OptimizationRequest, OptimizationResult, Part, PlanDelta
+from cutplanner.multistart import MultistartPool, init_worker, shared_bounds
+from cutplanner.partition import split_request
+from cutplanner.remnants import RemnantStore
+
+MATERIAL_FIELDS = tuple(Material.model_fields)
+PART_FIELDS = tuple(Part.model_fields)
+
+EncodedRequest = Tuple[list, list, Dict[str, Any]]
+
+# Estoque de retalhos compartilhado (arquivo SQLite) entre a API e os workers, aberto no primeiro uso
+REMNANT_DB = os.environ.get("CUTPLANNER_REMNANT_DB", "cutplanner_remnants.db")
+
+
+class PoolSaturatedError(RuntimeError):
+    """Todas as vagas do pool (em execução + na fila) estão ocupadas"""
+
+
+def _plain(value: Any) -> Any:
+    """Enum -> valor simples, para que as linhas sejam tuplas de primitivos"""
+    return getattr(value, "value", value)
+
+
+def encode_request(request: OptimizationRequest) -> EncodedRequest:
+    """Converte a requisição em linhas compactas para envio ao worker"""
+    materials = [tuple(_plain(getattr(m, f)) for f in MATERIAL_FIELDS) for m in request.materials]
+    parts = [tuple(_plain(getattr(p, f)) for f in PART_FIELDS) for p in request.parts]
+    return materials, parts, request.dict(exclude={"materials", "parts"})
+
+
+def decode_request(payload: EncodedRequest) -> OptimizationRequest:
+    """Reconstrói a requisição a partir das linhas compactas"""
+    materials, parts, options = payload
+    return OptimizationRequest(
+        materials=[Material(**dict(zip(MATERIAL_FIELDS, row))) for row in materials],
+        parts=[Part(**dict(zip(PART_FIELDS, row))) for row in parts],
+        **options
+    )
+
+
+def create_planner() -> CutPlanner:
+    """
+    CutPlanner de um processo worker
+
+    Partições e multi-start rodam em sequência dentro do worker; o
+    paralelismo de uma otimização vem do SolverPool (ver `SolverPool.solve`).
+    """
+    return CutPlanner(multistart_workers=1, partition_workers=1, remnant_store=RemnantStore(REMNANT_DB))
+
+
+# Estado por processo worker
+_worker_planner: Optional[CutPlanner] = None
+_worker_cache_epoch = 0
+
+
+def solve_encoded(payload: EncodedRequest, cache_epoch: int = 0) -> Tuple[Dict[str, Any], int, Optional[Dict]]:
+    """
+    Ponto de entrada executado no worker
+
+    Args:
+        payload: Requisição codificada por `encode_request`
+        cache_epoch: Geração do cache de padrões; se mudou, o cache local é limpo
+
+    Returns:
+        Tupla (resultado, pid do worker, estatísticas do cache de padrões)
+    """
+    global _worker_planner, _worker_cache_epoch
+    if _worker_planner is None:
+        _worker_planner = create_planner()
+    pattern_cache = _worker_planner.pattern_cache
+    if cache_epoch != _worker_cache_epoch and pattern_cache is not None:
+        pattern_cache.clear()
+        _worker_cache_epoch = cache_epoch
+
+    result = _worker_planner.optimize(decode_request(payload))
+    stats = pattern_cache.stats() if pattern_cache is not None else None
+    return result.dict(), os.getpid(), stats
+
+
+def reoptimize_encoded(payload: EncodedRequest, previous: Dict[str, Any],
+                       delta: Dict[str, Any]) -> Tuple[Dict[str, Any], int, Optional[Dict]]:
+    """
+    Reotimização incremental executada no worker
+
+    Args:
+        payload: Requisição original codificada por `encode_request`
+        previous: Plano atual (`OptimizationResult.dict()`)
+        delta: Alteração do pedido (`PlanDelta.dict()`)
+
+    Returns:
+        Tupla no formato de `solve_encoded`
+    """
+    global _worker_planner
+    if _worker_planner is None:
+        _worker_planner = create_planner()
+    result = _worker_planner.reoptimize(decode_request(payload), OptimizationResult(**previous), PlanDelta(**delta))
+    return result.dict(), os.getpid(), None
+
+
+def stream_encoded(payload: EncodedRequest, events: Any, stop: Any) -> Tuple[Dict[str, Any], int, Optional[Dict]]:
+    """
+    Otimização com progresso executada no worker
+
+    Args:
+        payload: Requisição codificada por `encode_request`
+        events: Fila (put) que recebe os eventos de progresso
+        stop: Sinal (is_set) que interrompe a otimização, mantendo o melhor plano
+
+    Returns:
+        Tupla no formato de `solve_encoded`
+    """
+    checked = [0.0, False]
+
+    def cancel_check() -> bool:
+        # No pool de processos o sinal é um proxy do Manager (uma chamada entre
+        # processos): consultado no máximo a cada 50 ms
+        now = time.perf_counter()
+        if not checked[1] and now - checked[0] >= 0.05:
+            checked[0], checked[1] = now, stop.is_set()
+        return checked[1]
+
+    planner = create_planner()
+    planner.cancel_check = cancel_check
+    planner.progress_callback = events.put
+    return planner.optimize(decode_request(payload)).dict(), os.getpid(), None
+
+
+class SolverPool:
+    """
+    Pool de processos para as otimizações da API
+
+    Limita o total de chamadas pendentes (em execução + na fila) e o tempo
+    de espera de cada uma. Com `workers=0` as otimizações rodam em threads
+    do próprio processo (útil em desenvolvimento e testes).
+
+    Os processos são criados com `multistart.init_worker`, então também
+    executam os encaixes do multi-start das otimizações coordenadas na API.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_tasks_per_child: Optional[int] = 100,
+                 timeout: Optional[float] = 60.0, max_pending: Optional[int] = None):
+        """
+        Args:
+            workers: Número de processos (padrão: núcleos da máquina)
+            max_tasks_per_child: Tarefas por processo antes de reciclá-lo
+            timeout: Tempo máximo de espera por otimização, em segundos
+            max_pending: Máximo de otimizações simultâneas (padrão: 4 por worker)
+        """
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeout = timeout
+        self.max_pending = max_pending or max(1, self.workers) * 4
+        self._executor: Optional[Executor] = None
+        self._multistart: Optional[MultistartPool] = None
+        self._coordinator: Optional[ThreadPoolExecutor] = None
+        self._remnant_store = RemnantStore(REMNANT_DB)
+        self._manager = None
+        self._pending = 0
+        # Chamadas esperando vaga (`wait_for_slot`), acordadas quando uma pendente termina
+        self._slot_waiters: List[asyncio.Future] = []
+        self._cache_epoch = 0
+        self._worker_cache_stats: Dict[int, Dict[str, Any]] = {}
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        # Otimizações que excederam o tempo limite mas ainda ocupam um worker
+        self.abandoned = 0
+        self.broken = 0
+        self.fanned_out = 0
+
+    @classmethod
+    def from_env(cls) -> "SolverPool":
+        """Configuração por variáveis de ambiente CUTPLANNER_*"""
+        def number(name: str, default: Optional[str], cast=int):
+            value = os.environ.get(name, default)
+            return cast(value) if value not in (None, "") else None
+
+        return cls(
+            workers=number("CUTPLANNER_WORKERS", None),
+            max_tasks_per_child=number("CUTPLANNER_MAX_TASKS_PER_CHILD", "100"),
+            timeout=number("CUTPLANNER_SOLVE_TIMEOUT", "60", float),
+            max_pending=number("CUTPLANNER_MAX_PENDING", None),
+        )
+
+    @property
+    def pending(self) -> int:
+        """Otimizações em execução ou na fila"""
+        return self._pending
+
+    async def wait_for_slot(self) -> None:
+        """
+        Espera até haver vaga para mais uma chamada pendente
+
+        A vaga não é reservada: quem chamar `solve` primeiro fica com ela, e
+        uma chamada pode ainda receber PoolSaturatedError.
+        """
+        while self._pending >= self.max_pending:
+            waiter = asyncio.get_running_loop().create_future()
+            self._slot_waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._slot_waiters:
+                    self._slot_waiters.remove(waiter)
+
+    def _release_slot(self) -> None:
+        self._pending -= 1
+        waiters, self._slot_waiters = self._slot_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers == 0:
+                self._executor = ThreadPoolExecutor(max_workers=4)
+            else:
+                # max_tasks_per_child não é compatível com o método "fork"
+                context = multiprocessing.get_context("spawn") if self.max_tasks_per_child else None
+                raw = shared_bounds()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    max_tasks_per_child=self.max_tasks_per_child,
+                    initializer=init_worker,
+                    initargs=(raw,)
+                )
+                self._multistart = MultistartPool(self._executor, raw, self.workers)
+        return self._executor
+
+    def _fans_out(self, request: OptimizationRequest) -> bool:
+        """Indica se a otimização tem trabalho para vários workers (cadeias de partições ou multi-start)"""
+        if self.workers <= 1:
+            return False
+        if request.algorithm == "multistart" and request.multistart_runs > 1 and any(
+                p.part_type.value == "rectangular" for p in request.parts):
+            return True
+        return len(split_request(request)[1]) > 1
+
+    async def solve(self, request: OptimizationRequest) -> Dict[str, Any]:
+        """
+        Executa a otimização no pool sem bloquear o event loop
+
+        Uma otimização com cadeias de partições independentes ou com o
+        multi-start é coordenada numa thread (retalhos, divisão e junção dos
+        resultados) e cada cadeia ou encaixe vira uma tarefa do pool; as
+        demais rodam inteiras num worker. A vaga de pendente é uma só.
+
+        Raises:
+            PoolSaturatedError: Se o limite de otimizações pendentes foi atingido
+            asyncio.TimeoutError: Se a otimização excedeu o tempo limite (a vaga
+                continua ocupada até o worker terminar)
+            BrokenProcessPool: Se um worker morreu; o pool é recriado na próxima chamada
+        """
+        if self._fans_out(request):
+            return await self._run(self._solve_fanned_out, request, fan_out=True)
+        return await self._run(solve_encoded, encode_request(request), self._cache_epoch)
+
+    def _solve_fanned_out(self, executor: Executor, multistart: MultistartPool,
+                          request: OptimizationRequest) -> Tuple[Dict[str, Any], int, Optional[Dict]]:
+        """Coordena a otimização numa thread da API, com o trabalho paralelo nos workers do pool"""
+        planner = CutPlanner(remnant_store=self._remnant_store, partition_executor=executor,
+                             multistart_pool=multistart)
+        return planner.optimize(request).dict(), os.getpid(), None
+
+    async def reoptimize(self, request: OptimizationRequest, previous: OptimizationResult,
+                         delta: PlanDelta) -> Dict[str, Any]:
+        """
+        Executa a reotimização incremental no pool, com os mesmos limites de `solve`
+
+        Raises:
+            As mesmas exceções de `solve`
+        """
+        return await self._run(reoptimize_encoded, encode_request(request), previous.dict(), delta.dict())
+
+    def stream_channel(self) -> Tuple[Any, Any]:
+        """
+        Fila de eventos de progresso e sinal de parada para `stream`
+
+        Com processos, são proxies de um Manager (criado no primeiro uso);
+        com threads, uma queue.Queue e um threading.Event.
+        """
+        if self.workers == 0:
+            return queue.Queue(), threading.Event()
+        if self._manager is None:
+            self._manager = multiprocessing.get_context("spawn").Manager()
+        return self._manager.Queue(), self._manager.Event()
+
+    async def stream(self, request: OptimizationRequest, events: Any, stop: Any) -> Dict[str, Any]:
+        """
+        Executa a otimização no pool publicando o progresso em `events`
+
+        Args:
+            request: Requisição de otimização
+            events, stop: Fila e sinal de parada de `stream_channel`
+
+        Raises:
+            As mesmas exceções de `solve`
+        """
+        return await self._run(stream_encoded, encode_request(request), events, stop)
+
+    async def _run(self, function, *args, fan_out: bool = False) -> Dict[str, Any]:
+        """
+        Executa `function` no pool (ou, com fan_out, numa thread de coordenação
+        que recebe o pool de processos e o do multi-start antes de `args`)
+        """
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturatedError(
+                f"Servidor ocupado: {self._pending} otimizações pendentes (limite {self.max_pending})"
+            )
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        self._pending += 1
+        try:
+            if fan_out:
+                self.fanned_out += 1
+                future = self._get_coordinator().submit(function, executor, self._multistart, *args)
+            else:
+                future = executor.submit(function, *args)
+        except BrokenProcessPool:
+            self._release_slot()
+            self._discard_executor(executor)
+            raise
+        try:
+            result, pid, cache_stats = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except BrokenProcessPool:
+            # Um worker morreu (ex.: falta de memória): as próximas chamadas usam um pool novo
+            self._release_slot()
+            self._discard_executor(executor)
+            raise
+        except BaseException as e:
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+            if future.cancel() or future.done():
+                # Ainda estava na fila (não vai rodar) ou já terminou
+                self._release_slot()
+            else:
+                # O worker continua até terminar: a vaga só é liberada quando ele acabar
+                self.abandoned += 1
+                future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release_abandoned))
+            raise
+        self._release_slot()
+
+        self.completed += 1
+        if cache_stats is not None:
+            self._worker_cache_stats[pid] = cache_stats
+        return result
+
+    def _get_coordinator(self) -> ThreadPoolExecutor:
+        if self._coordinator is None:
+            self._coordinator = ThreadPoolExecutor(max_workers=self.max_pending, thread_name_prefix="solver-fan-out")
+        return self._coordinator
+
+    def _release_abandoned(self) -> None:
+        self.abandoned -= 1
+        self._release_slot()
+
+    def _discard_executor(self, executor: Executor) -> None:
+        """Descarta um pool quebrado (se ainda for o atual)"""
+        if self._executor is executor:
+            self.broken += 1
+            self._executor = None
+            self._multistart = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def clear_pattern_caches(self) -> None:
+        """Pede aos workers que limpem o cache de padrões na próxima tarefa"""
+        self._cache_epoch += 1
+        self._worker_cache_stats.clear()
+
+    def pattern_cache_stats(self) -> Dict[str, Any]:
+        """Soma das últimas estatísticas de cache de padrões informadas pelos workers"""
+        totals: Dict[str, Any] = {"workers_reporting": len(self._worker_cache_stats)}
+        for stats in self._worker_cache_stats.values():
+            for name in ("entries", "patterns", "hits", "misses", "evictions"):
+                totals[name] = totals.get(name, 0) + stats[name]
+        lookups = totals.get("hits", 0) + totals.get("misses", 0)
+        totals["hit_rate"] = totals.get("hits", 0) / lookups if lookups else 0.0
+        return totals
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado do pool"""
+        return {
+            "workers": self.workers,
+            "max_tasks_per_child": self.max_tasks_per_child,
+            "timeout_seconds": self.timeout,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "abandoned": self.abandoned,
+            "broken_pools": self.broken,
+            "fanned_out": self.fanned_out,
+        }
+
+    def shutdown(self) -> None:
+        """Encerra os processos do pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._multistart = None
+        if self._coordinator is not None:
+            self._coordinator.shutdown(wait=False, cancel_futures=True)
+            self._coordinator = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
@@ -0,0 +1,419 @@
+"""
+Jobs assíncronos de otimização
+
+POST /jobs devolve um id na hora e a otimização roda em segundo plano num
+pool de processos próprio, sem o tempo limite das chamadas interativas. Os
+jobs ficam numa tabela SQLite (CUTPLANNER_JOB_DB; em memória por padrão),
+que também é a fila: com um arquivo, jobs na fila ou interrompidos por um
+reinício voltam a rodar quando a API sobe de novo. O cancelamento é
+cooperativo: cada processo do pool tem uma flag em memória compartilhada
+que os algoritmos iterativos consultam junto com o prazo, devolvendo o
+melhor plano encontrado até ali. Jobs terminados expiram após um TTL.
+
+O arquivo deve ser de um único processo da API: ao subir, os jobs que
+estavam "running" são considerados interrompidos e voltam para a fila.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from api.executor import EncodedRequest, create_planner, decode_request, encode_request
+from cutplanner import CutPlanner
+from cutplanner.models import OptimizationRequest
+
+QUEUED = "queued"
+RUNNING = "running"
+CANCELLING = "cancelling"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_COLUMNS = "id, status, request, result, error, created_at, started_at, finished_at"
+
+
+class JobQueueFullError(RuntimeError):
+    """A fila de jobs atingiu o limite"""
+
+
+class JobStore:
+    """
+    Tabela de jobs em SQLite
+
+    Uma conexão por instância, protegida por lock (mesmo esquema do
+    estoque de retalhos).
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        """
+        Args:
+            db_path: Arquivo SQLite (":memory:" perde os jobs ao reiniciar)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, result TEXT, "
+            "error TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def add(self, request: Dict[str, Any]) -> str:
+        """Enfileira um job e retorna o id"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, request, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(request), time.time())
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job pelo id, com requisição e resultado já decodificados"""
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def status(self, job_id: str) -> Optional[str]:
+        """Só o status do job (consulta leve, usada durante a execução)"""
+        with self._lock:
+            row = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def count(self, status: str) -> int:
+        """Jobs com o status dado"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def position(self, job_id: str, created_at: float) -> int:
+        """Jobs na fila à frente deste"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ? AND id != ?",
+                (QUEUED, created_at, job_id)
+            ).fetchone()[0]
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Passa o job mais antigo da fila para "running" e o retorna"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    f"SELECT {_COLUMNS} FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                                     (RUNNING, time.time(), row[0]))
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return self._job(row) if row else None
+
+    def transition(self, job_id: str, from_statuses: List[str], status: str) -> bool:
+        """Muda o status se o job estiver em um dos status de origem; False caso contrário"""
+        marks = ", ".join("?" * len(from_statuses))
+        finished_at = time.time() if status in FINISHED else None
+        with self._lock:
+            return self._db.execute(
+                f"UPDATE jobs SET status = ?, finished_at = COALESCE(?, finished_at) "
+                f"WHERE id = ? AND status IN ({marks})",
+                (status, finished_at, job_id, *from_statuses)
+            ).rowcount > 0
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None) -> None:
+        """Registra o fim do job"""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+            )
+
+    def remove(self, job_id: str) -> bool:
+        """Remove um job; False se ele não existia"""
+        with self._lock:
+            return self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount > 0
+
+    def requeue_interrupted(self) -> int:
+        """
+        Jobs interrompidos por um reinício: os em execução voltam para a fila
+        e os que estavam sendo cancelados ficam cancelados
+
+        Returns:
+            Quantidade de jobs recolocados na fila
+        """
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE status = ?",
+                             (CANCELLED, time.time(), CANCELLING))
+            return self._db.execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                                    (QUEUED, RUNNING)).rowcount
+
+    def purge(self, ttl_seconds: float) -> int:
+        """Remove jobs terminados há mais de ttl_seconds"""
+        marks = ", ".join("?" * len(FINISHED))
+        with self._lock:
+            return self._db.execute(
+                f"DELETE FROM jobs WHERE status IN ({marks}) AND finished_at < ?",
+                (*FINISHED, time.time() - ttl_seconds)
+            ).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Quantidade de jobs por status"""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        """Fecha a conexão"""
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _job(row) -> Dict[str, Any]:
+        job = dict(zip(_COLUMNS.split(", "), row))
+        job["request"] = json.loads(job["request"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+
+# Estado por processo worker: flags de cancelamento (uma por vaga) e um CutPlanner por vaga
+_cancel_flags = None
+_job_planners: Dict[int, CutPlanner] = {}
+
+
+def _init_job_worker(cancel_flags) -> None:
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+
+
+def solve_job(payload: EncodedRequest, slot: int) -> Dict[str, Any]:
+    """
+    Ponto de entrada executado no worker
+
+    Args:
+        payload: Requisição codificada por `encode_request`
+        slot: Vaga do job; a flag da vaga sinaliza o cancelamento
+
+    Returns:
+        Resultado da otimização (o melhor plano até o cancelamento, se houver)
+    """
+    planner = _job_planners.get(slot)
+    if planner is None:
+        planner = _job_planners[slot] = create_planner()
+        planner.cancel_check = lambda: _cancel_flags[slot] != 0
+    return planner.optimize(decode_request(payload)).dict()
+
+
+class JobManager:
+    """
+    Fila e execução dos jobs
+
+    Cada uma das `workers` tarefas de execução ocupa uma vaga (e uma flag
+    de cancelamento) e roda um job por vez no pool. Com `workers=0` os jobs
+    rodam em uma thread do próprio processo.
+    """
+
+    # Intervalo de consulta ao status de um job em execução (cancelamentos), em segundos
+    poll_interval = 0.25
+
+    def __init__(self, store: JobStore, workers: Optional[int] = None, max_queued: int = 100,
+                 ttl_seconds: float = 3600.0):
+        """
+        Args:
+            store: Tabela de jobs
+            workers: Jobs executados ao mesmo tempo (padrão: 1)
+            max_queued: Máximo de jobs esperando na fila
+            ttl_seconds: Tempo que um job terminado fica disponível
+        """
+        self.store = store
+        self.workers = 1 if workers is None else workers
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self._slots = max(1, self.workers)
+        self._cancel_flags = multiprocessing.RawArray("b", self._slots)
+        self._executor: Optional[Executor] = None
+        self._runners: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Dict[str, int] = {}
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        """Configuração por CUTPLANNER_JOB_DB, _JOB_WORKERS, _JOB_QUEUE e _JOB_TTL"""
+        workers = os.environ.get("CUTPLANNER_JOB_WORKERS")
+        return cls(
+            JobStore(os.environ.get("CUTPLANNER_JOB_DB") or ":memory:"),
+            workers=int(workers) if workers not in (None, "") else None,
+            max_queued=int(os.environ.get("CUTPLANNER_JOB_QUEUE", "100")),
+            ttl_seconds=float(os.environ.get("CUTPLANNER_JOB_TTL", "3600")),
+        )
+
+    def start(self) -> None:
+        """Recoloca na fila os jobs interrompidos e inicia as tarefas de execução"""
+        self.store.requeue_interrupted()
+        self._wakeup = asyncio.Event()
+        self._runners = [asyncio.create_task(self._run(slot)) for slot in range(self._slots)]
+
+    async def stop(self) -> None:
+        """
+        Para as tarefas de execução e o pool
+
+        Jobs em execução ficam como "running" e voltam para a fila no próximo start.
+        """
+        for slot in range(self._slots):
+            self._cancel_flags[slot] = 1
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        self._runners = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, request: OptimizationRequest) -> str:
+        """
+        Enfileira uma otimização
+
+        Raises:
+            JobQueueFullError: Se a fila atingiu max_queued
+        """
+        self.store.purge(self.ttl_seconds)
+        queued = self.store.count(QUEUED)
+        if queued >= self.max_queued:
+            self.rejected += 1
+            raise JobQueueFullError(f"Fila de jobs cheia: {queued} jobs aguardando (limite {self.max_queued})")
+        job_id = self.store.add(jsonable_encoder(request))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status do job (e resultado, se terminou); None se não existe ou expirou"""
+        self.store.purge(self.ttl_seconds)
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        job.pop("request")
+        if job["status"] == QUEUED:
+            job["queue_position"] = self.store.position(job_id, job["created_at"])
+        if job["finished_at"] is not None:
+            job["expires_at"] = job["finished_at"] + self.ttl_seconds
+        return job
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancela um job na fila, pede o cancelamento de um em execução ou
+        descarta um terminado
+
+        Returns:
+            Novo status ("cancelled", "cancelling" ou "deleted"), ou None se o job não existe
+        """
+        if self.store.transition(job_id, [QUEUED], CANCELLED):
+            self.cancelled += 1
+            return CANCELLED
+        if self.store.transition(job_id, [RUNNING, CANCELLING], CANCELLING):
+            slot = self._running.get(job_id)
+            if slot is not None:
+                self._cancel_flags[slot] = 1
+            return CANCELLING
+        return "deleted" if self.store.remove(job_id) else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado da fila e contadores"""
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "ttl_seconds": self.ttl_seconds,
+            "db_path": self.store.db_path,
+            "jobs": self.store.stats(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers == 0:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, initializer=_init_job_worker, initargs=(self._cancel_flags,)
+                )
+            else:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_job_worker,
+                    initargs=(self._cancel_flags,)
+                )
+        return self._executor
+
+    def _discard_executor(self, executor: Executor) -> None:
+        """Descarta um pool quebrado (se ainda for o atual): os próximos jobs usam um novo"""
+        if self._executor is executor:
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, slot: int) -> None:
+        """Tarefa de execução: pega o próximo job da fila e o roda na vaga dada"""
+        while True:
+            job = self.store.claim()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self._execute(job, slot)
+            self.store.purge(self.ttl_seconds)
+
+    async def _execute(self, job: Dict[str, Any], slot: int) -> None:
+        job_id = job["id"]
+        self._cancel_flags[slot] = 0
+        self._running[job_id] = slot
+        try:
+            payload = encode_request(OptimizationRequest(**job["request"]))
+            executor = self._get_executor()
+            future = asyncio.get_running_loop().run_in_executor(executor, solve_job, payload, slot)
+            while not future.done():
+                await asyncio.wait({future}, timeout=self.poll_interval)
+                # DELETE pode ter vindo por outra instância do manager sobre o mesmo arquivo
+                if self.store.status(job_id) in (CANCELLING, None):
+                    self._cancel_flags[slot] = 1
+            result = jsonable_encoder(future.result())
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._discard_executor(executor)
+            self.failed += 1
+            self.store.finish(job_id, FAILED, error=str(e) or type(e).__name__)
+            return
+        finally:
+            self._running.pop(job_id, None)
+
+        if self._cancel_flags[slot]:
+            # Cancelado: guarda o melhor plano encontrado até a interrupção
+            self.cancelled += 1
+            status = CANCELLED
+        elif result["success"]:
+            self.completed += 1
+            status = DONE
+        else:
+            self.failed += 1
+            status = FAILED
+        self.store.finish(job_id, status, result=result,
+                          error=result["metadata"].get("error") if status == FAILED else None)
@@ -2,17 +2,35 @@
 Servidor FastAPI principal para o CutPlanner
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 import uvicorn
+import asyncio
+import json
 import sys
 import os
+import queue
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 # Adicionar o diretório raiz ao path para importar cutplanner
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api.admission import AdmissionController, AdmissionRejected
+from api.coalescing import SingleFlight
+from api.executor import REMNANT_DB, PoolSaturatedError, SolverPool
+from api.jobs import JobManager, JobQueueFullError
 from cutplanner import CutPlanner
-from cutplanner.models import OptimizationRequest, OptimizationResult
+from cutplanner.cache import ResultCache, reoptimization_fingerprint, request_fingerprint
+from cutplanner.columnar import MEDIA_TYPE as COLUMNAR_MEDIA_TYPE, ColumnarPlan
+from cutplanner.models import (
+    MaterialType, OptimizationRequest, OptimizationResult, ReoptimizationRequest, Remnant, ResultFormat
+)
+from cutplanner.remnants import RemnantConflictError, RemnantStore
+from cutplanner.serialization import dumps_result
 from cutplanner.utils import CutPlannerReporter, CutPlannerVisualizer
 import tempfile
 from pathlib import Path
@@ -35,8 +53,185 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Estoque de retalhos (CUTPLANNER_REMNANT_DB), o mesmo arquivo usado pelos workers;
+# o arquivo só é aberto (e criado) no primeiro uso
+remnant_store = RemnantStore(REMNANT_DB)
+
 # Instância global do CutPlanner
-cut_planner = CutPlanner()
+cut_planner = CutPlanner(remnant_store=remnant_store)
+
+# Cache de resultados; com CUTPLANNER_RESULT_CACHE_DB os workers compartilham o nível em disco
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("CUTPLANNER_RESULT_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.environ.get("CUTPLANNER_RESULT_CACHE_TTL", "600")),
+    db_path=os.environ.get("CUTPLANNER_RESULT_CACHE_DB") or None
+)
+
+
+# Pool de processos das otimizações (CUTPLANNER_WORKERS, CUTPLANNER_MAX_TASKS_PER_CHILD,
+# CUTPLANNER_SOLVE_TIMEOUT, CUTPLANNER_MAX_PENDING); CUTPLANNER_WORKERS=0 usa threads
+solver_pool = SolverPool.from_env()
+
+# Otimizações idênticas em andamento compartilham uma única execução no pool
+single_flight = SingleFlight()
+
+# Estimativa de custo e filas por classe de tráfego sobre as vagas do pool
+# (CUTPLANNER_{INTERACTIVE,BATCH}_CONCURRENCY, _QUEUE e _BUDGET_MS, CUTPLANNER_INTERACTIVE_RESERVED,
+# CUTPLANNER_COST_SCALE)
+admission = AdmissionController.from_env(solver_pool.workers)
+
+
+# Jobs assíncronos (CUTPLANNER_JOB_DB, CUTPLANNER_JOB_WORKERS, CUTPLANNER_JOB_QUEUE,
+# CUTPLANNER_JOB_TTL); CUTPLANNER_JOB_WORKERS=0 usa uma thread
+job_manager = JobManager.from_env()
+
+
+@app.on_event("startup")
+def start_job_manager():
+    job_manager.start()
+
+
+@app.on_event("shutdown")
+def shutdown_solver_pool():
+    solver_pool.shutdown()
+
+
+@app.on_event("shutdown")
+async def stop_job_manager():
+    await job_manager.stop()
+
+
+async def run_optimization(request: OptimizationRequest, traffic_class: str = "interactive",
+                           reoptimization: Optional[ReoptimizationRequest] = None) -> Dict[str, Any]:
+    """
+    Executa a otimização no pool de processos, passando pelo cache de resultados
+    
+    Requisições não reprodutíveis (algoritmo aleatório sem random_seed) nunca
+    são armazenadas; as demais expiram pelo TTL do cache ou via DELETE /cache.
+    Respostas vindas do cache são marcadas em metadata["cache"].
+    
+    Uma requisição idêntica (mesmo hash canônico) a outra ainda em execução
+    espera o resultado dela em vez de iniciar outra otimização, marcada com
+    metadata["coalesced"].
+    
+    As demais passam pelo controle de admissão da classe de tráfego
+    (metadata["admission"]); se o algoritmo foi trocado por um mais rápido
+    para caber no orçamento de latência, metadata["downgraded_from"] traz o
+    pedido e o resultado não é guardado no cache.
+    
+    Args:
+        request: Requisição de otimização
+        traffic_class: "interactive" ou "batch"
+        reoptimization: Se informada, reotimiza o plano dela (request é a
+            requisição original) em vez de otimizar do zero
+    
+    Raises:
+        HTTPException: 503 se o pool ou a fila da classe estiver saturado, 429 se
+            a otimização não couber no orçamento de latência, 413 se for grande
+            demais para a classe, 504 se exceder o tempo limite
+    """
+    if reoptimization is None:
+        fingerprint = request_fingerprint(request)
+    else:
+        fingerprint = reoptimization_fingerprint(request, reoptimization.previous, reoptimization.delta)
+    key = fingerprint if cut_planner.is_deterministic(request) else None
+    if key is not None:
+        cached = result_cache.get(key)
+        if cached is not None:
+            payload, tier, created_at = cached
+            return _with_cache_info(payload, {"hit": True, "key": key, "tier": tier, "cached_at": created_at})
+    
+    # Por classe: uma chamada interativa não espera um item de lote ainda na fila
+    result, coalesced = await single_flight.run(
+        f"{traffic_class}:{fingerprint}", lambda: _solve_in_pool(request, key, traffic_class, reoptimization)
+    )
+    if coalesced:
+        return {**result, "metadata": {**result["metadata"], "coalesced": True}}
+    return result
+
+
+async def _solve_in_pool(request: OptimizationRequest, key: Optional[str], traffic_class: str = "interactive",
+                         reoptimization: Optional[ReoptimizationRequest] = None) -> Dict[str, Any]:
+    """Otimiza (ou reotimiza) no pool, após a admissão, e guarda o resultado no cache (key=None: não reprodutível)"""
+    # Na reotimização só as peças acrescentadas podem exigir otimização nova: a admissão estima só elas
+    admitted = request if reoptimization is None else request.copy(update={"parts": reoptimization.delta.add_parts})
+    try:
+        async with admission.admit(admitted, traffic_class) as (admitted, info):
+            if reoptimization is None:
+                result = await solver_pool.solve(admitted)
+            else:
+                result = await solver_pool.reoptimize(request.copy(update={"algorithm": admitted.algorithm}),
+                                                      reoptimization.previous, reoptimization.delta)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except BrokenProcessPool:
+        raise HTTPException(
+            status_code=503, detail="Worker de otimização encerrado inesperadamente", headers={"Retry-After": "1"}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Otimização excedeu o tempo limite de {solver_pool.timeout:g} s"
+        )
+    
+    downgraded_from = info.pop("downgraded_from", None)
+    if downgraded_from is not None:
+        # O resultado não corresponde ao pedido original: não vai para o cache
+        result = {**result, "metadata": {**result["metadata"], "downgraded_from": downgraded_from}}
+        key = None
+    
+    if key is None:
+        cache_info = {"hit": False, "cacheable": False}
+    else:
+        cache_info = {"hit": False, "key": key}
+        if result["success"]:
+            result_cache.put(key, result)
+    return {**result, "metadata": {**result["metadata"], "cache": cache_info, "admission": info}}
+
+
+def _with_cache_info(result: Dict[str, Any], info: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia rasa do resultado com metadata["cache"] (o original pode estar no cache)"""
+    return {**result, "metadata": {**result["metadata"], "cache": info}}
+
+
+def check_success(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte uma otimização malsucedida em erro HTTP 500"""
+    if not result["success"]:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Falha na otimização: {result['metadata'].get('error', 'Erro desconhecido')}"
+        )
+    return result
+
+
+class ResultResponse(Response):
+    """
+    Resposta de um OptimizationResult escrita direto em bytes por
+    `dumps_result`, sem o jsonable_encoder do FastAPI (que domina o tempo
+    de resposta em planos com dezenas de milhares de cortes)
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return dumps_result(content)
+
+
+def render_result(result: Dict[str, Any], result_format: ResultFormat) -> Response:
+    """Resposta no formato pedido: OptimizationResult ou colunar (JSON ou binário)"""
+    if result_format == ResultFormat.JSON:
+        return ResultResponse(result)
+    plan = ColumnarPlan.from_result(result)
+    if result_format == ResultFormat.COLUMNAR:
+        return Response(json.dumps(plan.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                        media_type="application/json")
+    return Response(plan.to_bytes(), media_type=COLUMNAR_MEDIA_TYPE)
+
+
+def _json(data: Any) -> bytes:
+    """Serialização genérica (eventos e linhas que não são resultados)"""
+    return json.dumps(jsonable_encoder(data)).encode("utf-8")
 
 
 @app.get("/")
@@ -61,15 +256,16 @@ async def health_check():
 
 
 @app.post("/optimize/1d")
-async def optimize_1d(request: OptimizationRequest):
+async def optimize_1d(request: OptimizationRequest, result_format: ResultFormat = ResultFormat.JSON):
     """
     Otimização 1D para barras e perfis
     
     Args:
         request: Requisição de otimização
+        result_format: Formato da resposta ("columnar" e "columnar-binary" para planos muito grandes)
         
     Returns:
-        Resultado da otimização em formato JSON
+        Resultado da otimização no formato pedido
     """
     try:
         # Validar se os materiais são 1D
@@ -81,30 +277,26 @@ async def optimize_1d(request: OptimizationRequest):
                 )
         
         # Executar otimização
-        result = cut_planner.optimize(request)
-        
-        if not result.success:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Falha na otimização: {result.metadata.get('error', 'Erro desconhecido')}"
-            )
-        
-        return result
+        result = await run_optimization(request)
+        return render_result(check_success(result), result_format)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/optimize/2d")
-async def optimize_2d(request: OptimizationRequest):
+async def optimize_2d(request: OptimizationRequest, result_format: ResultFormat = ResultFormat.JSON):
     """
     Otimização 2D para chapas e placas
     
     Args:
         request: Requisição de otimização
+        result_format: Formato da resposta ("columnar" e "columnar-binary" para planos muito grandes)
         
     Returns:
-        Resultado da otimização em formato JSON
+        Resultado da otimização no formato pedido
     """
     try:
         # Validar se os materiais são 2D
@@ -116,42 +308,200 @@ async def optimize_2d(request: OptimizationRequest):
                 )
         
         # Executar otimização
-        result = cut_planner.optimize(request)
-        
-        if not result.success:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Falha na otimização: {result.metadata.get('error', 'Erro desconhecido')}"
-            )
-        
-        return result
+        result = await run_optimization(request)
+        return render_result(check_success(result), result_format)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/optimize/auto")
-async def optimize_auto(request: OptimizationRequest):
+async def optimize_auto(request: OptimizationRequest, result_format: ResultFormat = ResultFormat.JSON):
     """
     Otimização automática (detecta tipo baseado nos materiais)
     
     Args:
         request: Requisição de otimização
+        result_format: Formato da resposta ("columnar" e "columnar-binary" para planos muito grandes)
         
     Returns:
-        Resultado da otimização em formato JSON
+        Resultado da otimização no formato pedido
     """
     try:
-        result = cut_planner.optimize(request)
+        result = await run_optimization(request)
+        return render_result(check_success(result), result_format)
         
-        if not result.success:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Falha na otimização: {result.metadata.get('error', 'Erro desconhecido')}"
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/optimize/stream")
+async def optimize_stream(request: OptimizationRequest):
+    """
+    Otimização com progresso ao vivo (Server-Sent Events)
+    
+    Eventos: "start" (id do stream e URL de aceite), "progress" (iteração,
+    melhor desperdício, gap para o limite inferior e plano parcial, emitidos
+    pelos algoritmos iterativos) e, no fim, "result" ou "error". Um POST em
+    /optimize/stream/{stream_id}/accept aceita o melhor plano até ali: o
+    algoritmo para e o "result" sai com metadata["accepted_early"]. Se o
+    cliente desconectar, a otimização também é interrompida.
+    
+    A otimização roda no pool de processos e passa pela admissão da classe
+    interativa, como /optimize; recusas chegam como evento "error".
+    
+    Args:
+        request: Requisição de otimização
         
-        return result
+    Returns:
+        Stream text/event-stream
+    """
+    return StreamingResponse(
+        stream_optimization(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/optimize/stream/{stream_id}/accept")
+async def accept_stream(stream_id: str):
+    """Aceita o melhor plano encontrado até agora por uma otimização em /optimize/stream"""
+    stop = live_streams.get(stream_id)
+    if stop is None:
+        raise HTTPException(status_code=404, detail=f"Stream {stream_id} não encontrado ou já concluído")
+    stop.set()
+    return {"stream_id": stream_id, "status": "accepting"}
+
+
+# Otimizações em andamento no /optimize/stream: id -> sinal de parada (SolverPool.stream_channel)
+live_streams: Dict[str, Any] = {}
+
+
+def _sse(event: str, payload: bytes) -> bytes:
+    """Formata um evento Server-Sent Events com o JSON já serializado"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + payload + b"\n\n"
+
+
+async def _solve_admitted(request: OptimizationRequest, events: Any, stop: Any,
+                          admitted: asyncio.Future) -> Dict[str, Any]:
+    """
+    Otimização com progresso dentro da admissão da classe interativa
+    
+    A vaga fica reservada até o pool devolver o resultado; `admitted` recebe
+    o info da admissão assim que ela é concedida.
+    """
+    async with admission.admit(request) as (request, info):
+        admitted.set_result(info)
+        return await solver_pool.stream(request, events, stop)
+
+
+async def stream_optimization(request: OptimizationRequest) -> AsyncIterator[bytes]:
+    """
+    Roda a otimização no pool, pela admissão da classe interativa, e repassa
+    o progresso publicado pelo worker como eventos SSE
+    
+    Como o status HTTP já foi enviado, recusas da admissão e erros do pool
+    saem como evento "error" com status_code (e retry_after, se houver).
+    """
+    stream_id = uuid.uuid4().hex
+    key = request_fingerprint(request) if cut_planner.is_deterministic(request) else None
+    yield _sse("start", _json({"stream_id": stream_id, "accept_url": f"/optimize/stream/{stream_id}/accept"}))
+    
+    cached = result_cache.get(key) if key is not None else None
+    if cached is not None:
+        payload, tier, created_at = cached
+        yield _sse("result", dumps_result(_with_cache_info(payload, {"hit": True, "key": key, "tier": tier,
+                                                                     "cached_at": created_at})))
+        return
+    
+    events, stop = solver_pool.stream_channel()
+    live_streams[stream_id] = stop
+    admitted = asyncio.get_running_loop().create_future()
+    # Tarefa própria: se o cliente desconectar, ela segue com a vaga até o worker devolver o plano
+    solve = asyncio.ensure_future(_solve_admitted(request, events, stop, admitted))
+    try:
+        try:
+            while not solve.done():
+                try:
+                    event = await asyncio.to_thread(events.get, True, 0.1)
+                except queue.Empty:
+                    continue
+                yield _sse("progress", _json(event))
+            # O worker publica tudo antes de devolver o resultado
+            while True:
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    break
+                yield _sse("progress", _json(event))
+            result = solve.result()
+            info = admitted.result()
+        finally:
+            if not solve.done():
+                # Cliente desconectou antes do fim: o worker para com o melhor plano
+                # (cancelamento cooperativo) e só então a vaga da admissão é liberada
+                stop.set()
+                solve.add_done_callback(lambda task: task.cancelled() or task.exception())
+    except AdmissionRejected as e:
+        yield _sse("error", _json({"status_code": e.status_code, "detail": e.detail, "retry_after": e.retry_after}))
+        return
+    except PoolSaturatedError as e:
+        yield _sse("error", _json({"status_code": 503, "detail": str(e), "retry_after": 1}))
+        return
+    except BrokenProcessPool:
+        yield _sse("error", _json({"status_code": 503, "detail": "Worker de otimização encerrado inesperadamente",
+                                   "retry_after": 1}))
+        return
+    except asyncio.TimeoutError:
+        yield _sse("error", _json({"status_code": 504,
+                                   "detail": f"Otimização excedeu o tempo limite de {solver_pool.timeout:g} s"}))
+        return
+    finally:
+        live_streams.pop(stream_id, None)
+    
+    accepted = stop.is_set()
+    downgraded_from = info.pop("downgraded_from", None)
+    metadata = {**result["metadata"], "accepted_early": accepted, "admission": info}
+    if downgraded_from is not None:
+        metadata["downgraded_from"] = downgraded_from
+    result = {**result, "metadata": metadata}
+    if not result["success"]:
+        yield _sse("error", _json({"status_code": 500, "detail": f"Falha na otimização: {result['metadata'].get('error', 'Erro desconhecido')}"}))
+        return
+    # Plano aceito antes do fim ou com algoritmo trocado não corresponde ao pedido: fora do cache
+    if key is not None and not accepted and downgraded_from is None:
+        result_cache.put(key, {**result, "metadata": {k: v for k, v in metadata.items() if k != "admission"}})
+        cache_info = {"hit": False, "key": key}
+    else:
+        cache_info = {"hit": False, "cacheable": False}
+    yield _sse("result", dumps_result(_with_cache_info(result, cache_info)))
+
+
+@app.post("/optimize/reoptimize")
+async def reoptimize(reoptimization: ReoptimizationRequest):
+    """
+    Reotimização incremental: aplica acréscimos e cancelamentos de peças a um
+    plano existente, alterando só as barras/chapas afetadas
+    
+    Passa pelo mesmo caminho das otimizações (cache, admissão e pool de
+    processos com tempo limite); a admissão estima só as peças acrescentadas.
+    
+    Args:
+        reoptimization: Requisição original, plano atual e alteração do pedido
         
+    Returns:
+        Novo plano; metadata["reoptimization"] lista as unidades alteradas, novas e liberadas
+    """
+    try:
+        result = await run_optimization(reoptimization.request, reoptimization=reoptimization)
+        return ResultResponse(check_success(result))
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -161,40 +511,187 @@ async def optimize_batch(requests: list[OptimizationRequest]):
     """
     Otimização em lote de múltiplas requisições
     
+    As requisições são distribuídas pelo pool de processos, com no máximo
+    BATCH_WINDOW em andamento ao mesmo tempo, e cada resultado é enviado
+    assim que termina (NDJSON, na ordem de conclusão). Uma falha em uma
+    requisição vira uma linha de erro sem interromper as demais.
+    
     Args:
         requests: Lista de requisições de otimização
         
     Returns:
-        Lista de resultados da otimização
+        Stream NDJSON com uma linha {"index", "result"} ou {"index", "error"}
+        por requisição e uma linha final {"summary": {...}}
     """
+    return StreamingResponse(stream_batch(requests), media_type="application/x-ndjson")
+
+
+# Otimizações de um mesmo lote em andamento simultaneamente
+BATCH_WINDOW = int(os.environ.get("CUTPLANNER_BATCH_WINDOW", "0")) or max(1, solver_pool.workers) * 2
+
+
+async def _run_batch_item(index: int, request: OptimizationRequest) -> Dict[str, Any]:
+    """Executa um item do lote, convertendo erros em uma linha de erro"""
+    # O lote espera vaga no pool em vez de receber 503 como as chamadas interativas
+    await solver_pool.wait_for_slot()
     try:
-        results = []
-        for request in requests:
-            result = cut_planner.optimize(request)
-            results.append(result)
-        
-        return {
-            "total_requests": len(requests),
-            "successful": len([r for r in results if r.success]),
-            "failed": len([r for r in results if not r.success]),
-            "results": results
-        }
-        
+        return {"index": index, "result": await run_optimization(request, traffic_class="batch")}
+    except HTTPException as e:
+        return {"index": index, "error": {"status_code": e.status_code, "detail": e.detail}}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return {"index": index, "error": {"status_code": 500, "detail": str(e)}}
+
+
+async def stream_batch(requests: List[OptimizationRequest]) -> AsyncIterator[bytes]:
+    """Gera as linhas NDJSON do lote mantendo no máximo BATCH_WINDOW tarefas em memória"""
+    pending = set()
+    queue = iter(enumerate(requests))
+    successful = failed = 0
+    
+    try:
+        while True:
+            for index, request in queue:
+                pending.add(asyncio.ensure_future(_run_batch_item(index, request)))
+                if len(pending) >= BATCH_WINDOW:
+                    break
+            if not pending:
+                break
+            
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                line = task.result()
+                if "result" in line and line["result"]["success"]:
+                    successful += 1
+                else:
+                    failed += 1
+                if "result" in line:
+                    yield b'{"index":%d,"result":%s}\n' % (line["index"], dumps_result(line["result"]))
+                else:
+                    yield _json(line) + b"\n"
+        
+        summary = {"total_requests": len(requests), "successful": successful, "failed": failed}
+        yield (json.dumps({"summary": summary}) + "\n").encode("utf-8")
+    finally:
+        # Cliente desconectou: não espera pelas tarefas restantes
+        for task in pending:
+            task.cancel()
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: OptimizationRequest):
+    """
+    Enfileira uma otimização longa e retorna o id do job imediatamente
+    
+    Raises:
+        HTTPException: 503 se a fila de jobs estiver cheia
+    """
+    try:
+        job_id = job_manager.submit(request)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {"id": job_id, "status": "queued", "url": f"/jobs/{job_id}"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status do job; o resultado vem junto quando ele termina"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado")
+    return job
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancela um job: na fila, sai na hora; em execução, para na próxima
+    verificação do algoritmo e guarda o melhor plano até ali; terminado, é descartado
+    """
+    status = job_manager.cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado")
+    return {"id": job_id, "status": status}
 
 
 @app.get("/algorithms")
 async def get_algorithms():
     """Retorna lista de algoritmos disponíveis"""
     return {
-        "1d_algorithms": ["first_fit", "best_fit", "genetic"],
-        "2d_algorithms": ["guillotine", "maxrects"],
+        "1d_algorithms": ["first_fit", "best_fit", "genetic", "column_generation"],
+        "2d_algorithms": ["guillotine", "maxrects", "skyline", "multistart"],
+        "maxrects_heuristics": ["bssf", "baf", "bl"],
         "default_1d": "best_fit",
         "default_2d": "guillotine"
     }
 
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Retorna contadores de acerto/erro dos caches de otimização"""
+    return {
+        "pattern_cache": solver_pool.pattern_cache_stats(),
+        "result_cache": result_cache.stats(),
+        "coalescing": single_flight.stats()
+    }
+
+
+@app.delete("/cache")
+async def clear_caches():
+    """Invalida os caches de resultados e de padrões"""
+    result_cache.clear()
+    solver_pool.clear_pattern_caches()
+    return {"message": "Caches invalidados"}
+
+
+@app.get("/remnants")
+async def list_remnants(
+    material_type: MaterialType,
+    material_id: Optional[str] = None,
+    min_length: float = 0.0,
+    max_length: Optional[float] = None,
+    min_width: Optional[float] = None,
+    max_width: Optional[float] = None,
+    limit: int = Query(100, ge=1, le=10000)
+):
+    """Busca retalhos por tipo, material de origem e faixa de dimensões"""
+    return remnant_store.find(material_type, material_id, min_length, max_length, min_width, max_width, limit)
+
+
+@app.post("/remnants")
+async def add_remnants(remnants: List[Remnant]):
+    """Cadastra retalhos no estoque"""
+    return {"ids": remnant_store.add(remnants)}
+
+
+@app.get("/remnants/stats")
+async def get_remnant_stats():
+    """Quantidade de retalhos por tipo de material"""
+    return remnant_store.stats()
+
+
+@app.delete("/remnants/{remnant_id}")
+async def delete_remnant(remnant_id: int):
+    """Remove um retalho do estoque"""
+    if not remnant_store.remove(remnant_id):
+        raise HTTPException(status_code=404, detail=f"Retalho {remnant_id} não encontrado")
+    return {"message": f"Retalho {remnant_id} removido"}
+
+
+@app.post("/remnants/commit")
+async def commit_remnants(request: OptimizationRequest, result: OptimizationResult):
+    """
+    Efetiva um plano no estoque: remove os retalhos usados e guarda as sobras
+    utilizáveis, numa única transação
+    
+    Raises:
+        HTTPException: 409 se algum retalho do plano já foi consumido por outro plano
+    """
+    try:
+        return remnant_store.commit_plan(request, result)
+    except RemnantConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @app.post("/report/generate")
 async def generate_report(optimization_result: OptimizationResult, format: str = "all"):
     """
@@ -391,9 +888,13 @@ async def get_stats():
         "service": "CutPlanner API",
         "version": "1.0.0",
         "status": "running",
+        "solver_pool": solver_pool.stats(),
+        "coalescing": single_flight.stats(),
+        "admission": admission.stats(),
+        "jobs": job_manager.stats(),
         "algorithms_supported": {
-            "1d": ["first_fit", "best_fit", "genetic"],
-            "2d": ["guillotine", "maxrects"]
+            "1d": ["first_fit", "best_fit", "genetic", "column_generation"],
+            "2d": ["guillotine", "maxrects", "skyline", "multistart"]
         },
         "features": [
             "Otimização 1D para barras e perfis",
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos algoritmos 2D: tempo x aproveitamento
+
+Uso:
+    python benchmarks/bench_2d.py
+    python benchmarks/bench_2d.py --parts 1000 10000 50000 --algorithms skyline guillotine
+    python benchmarks/bench_2d.py --rotation both    # com e sem rotação das peças
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cutplanner import CutPlanner
+from cutplanner.models import Material, OptimizationRequest, Part
+
+SHEET_LENGTH = 2750
+SHEET_WIDTH = 1830
+
+
+def make_request(total_parts: int, distinct: int, seed: int, algorithm: str, **options) -> OptimizationRequest:
+    """Pedido sintético: `distinct` tamanhos entre 30 e 600 mm repartindo `total_parts` peças"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(30, 600, distinct)
+    widths = rng.integers(30, 600, distinct)
+    counts = np.full(distinct, total_parts // distinct)
+    counts[: total_parts % distinct] += 1
+
+    parts = [
+        Part(id=f"p{i}", name=f"Peça {i}", part_type="rectangular",
+             length=float(lengths[i]), width=float(widths[i]), quantity=int(counts[i]))
+        for i in range(distinct) if counts[i] > 0
+    ]
+    area = float(np.sum(lengths * widths * counts))
+    sheets = int(area / (SHEET_LENGTH * SHEET_WIDTH) * 2) + 10
+    materials = [Material(id="chapa", name="Chapa", material_type="sheet",
+                          length=SHEET_LENGTH, width=SHEET_WIDTH, quantity=sheets)]
+    return OptimizationRequest(materials=materials, parts=parts, kerf_width=4.0,
+                               algorithm=algorithm, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos algoritmos 2D do CutPlanner")
+    parser.add_argument("--parts", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Quantidades totais de peças")
+    parser.add_argument("--distinct", type=int, default=100, help="Tamanhos distintos de peça")
+    parser.add_argument("--algorithms", nargs="+", default=["skyline", "guillotine", "maxrects"],
+                        help="Algoritmos a comparar")
+    parser.add_argument("--max-maxrects", type=int, default=10000,
+                        help="Acima dessa quantidade de peças o maxrects é pulado")
+    parser.add_argument("--rotation", choices=["on", "off", "both"], default="on",
+                        help="Permitir rotação das peças (both compara os dois casos)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rotations = {"on": [True], "off": [False], "both": [False, True]}[args.rotation]
+
+    planner = CutPlanner()
+    print(f"{'peças':>8} {'algoritmo':>12} {'rotação':>8} {'tempo (s)':>10} {'chapas':>7} "
+          f"{'aproveit.':>10} {'não colocadas':>14} {'giradas':>8}")
+    for total in args.parts:
+        for algorithm in args.algorithms:
+            if algorithm == "maxrects" and total > args.max_maxrects:
+                continue
+            for rotation in rotations:
+                request = make_request(total, args.distinct, args.seed, algorithm, allow_rotation=rotation)
+                start = time.perf_counter()
+                result = planner.optimize(request)
+                elapsed = time.perf_counter() - start
+
+                used_area = sum(op.length * op.width for cut in result.cuts for op in cut.cuts)
+                sheet_area = result.materials_used * SHEET_LENGTH * SHEET_WIDTH
+                fill = used_area / sheet_area * 100 if sheet_area else 0.0
+                stats = result.metadata.get(algorithm, {})
+                print(f"{total:>8} {algorithm:>12} {'sim' if rotation else 'não':>8} {elapsed:>10.2f} "
+                      f"{result.materials_used:>7} {fill:>9.1f}% {stats.get('unplaced_parts', 0):>14} "
+                      f"{stats.get('rotated_parts', 0):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização dos resultados: caminho genérico x dumps_result
+
+Compara, para planos 1D com dezenas de milhares de cortes:
+- montagem dos objetos do plano com validação (CutOperation(...), feita em
+  Rust pelo pydantic 2) e sem (construct, em Python);
+- resposta pelo caminho genérico do FastAPI (jsonable_encoder + json.dumps),
+  por OptimizationResult.json() (arredondamento de Config.json_encoders) e
+  por dumps_result.
+
+Uso:
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --cuts 10000 30000 100000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from cutplanner import CutPlanner
+from cutplanner.models import CutOperation, Material, OptimizationRequest, Part
+from cutplanner.serialization import dumps_result
+
+
+def make_request(total_parts: int, distinct: int, seed: int) -> OptimizationRequest:
+    """Pedido 1D sintético: `distinct` comprimentos entre 100 e 1500 mm repartindo `total_parts` peças"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(100, 1500, distinct)
+    counts = np.full(distinct, total_parts // distinct)
+    counts[: total_parts % distinct] += 1
+    parts = [
+        Part(id=f"p{i}", name=f"Peça {i}", part_type="linear", length=float(lengths[i]), quantity=int(counts[i]))
+        for i in range(distinct) if counts[i] > 0
+    ]
+    bars = int(np.sum(lengths * counts) / 6000 * 1.5) + 10
+    materials = [Material(id="barra", name="Barra 6 m", material_type="bar", length=6000, quantity=bars)]
+    return OptimizationRequest(materials=materials, parts=parts, kerf_width=3.0, algorithm="best_fit")
+
+
+def timed(function, repeat: int) -> float:
+    """Menor tempo (s) de `repeat` execuções"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da serialização de resultados do CutPlanner")
+    parser.add_argument("--cuts", type=int, nargs="+", default=[10000, 30000], help="Cortes por plano")
+    parser.add_argument("--distinct", type=int, default=200, help="Comprimentos distintos de peça")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por medida (fica a menor)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    planner = CutPlanner(pattern_cache=None)
+    print(f"{'cortes':>8} {'otimizar (s)':>13} {'validado (s)':>13} {'construct (s)':>14} "
+          f"{'fastapi (s)':>12} {'.json() (s)':>12} {'dumps_result (s)':>17} {'tamanho (KB)':>13}")
+    for total in args.cuts:
+        request = make_request(total, args.distinct, args.seed)
+        start = time.perf_counter()
+        result = planner.optimize(request)
+        solve = time.perf_counter() - start
+        payload = result.dict()
+
+        operations = [op.dict() for cut in result.cuts for op in cut.cuts]
+        validated = timed(lambda: [CutOperation(**op) for op in operations], args.repeat)
+        constructed = timed(lambda: [CutOperation.construct(**op) for op in operations], args.repeat)
+
+        generic = timed(lambda: json.dumps(jsonable_encoder(payload)).encode("utf-8"), args.repeat)
+        model_json = timed(result.json, args.repeat)
+        fast = timed(lambda: dumps_result(payload), args.repeat)
+        size = len(dumps_result(payload)) / 1024
+
+        print(f"{len(operations):>8} {solve:>13.3f} {validated:>13.3f} {constructed:>14.3f} "
+              f"{generic:>12.3f} {model_json:>12.3f} {fast:>17.3f} {size:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Limites inferiores para o número de barras/chapas
+
+Calculados de forma vetorizada antes da otimização, servem para medir a
+distância (gap) entre a solução e o ótimo e para que os algoritmos
+iterativos parem assim que a atingirem. Só valem para planos completos:
+um plano que deixou peças de fora (estoque insuficiente) pode usar menos
+material que o limite, e então o gap fica indefinido.
+
+1D: L1 (relaxação contínua) e L2 de Martello e Toth sobre o maior
+material. 2D: limite de área e o de peças grandes (mais da metade da
+chapa nas duas dimensões não dividem chapa entre si).
+"""
+
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+_EPS = 1e-9
+
+
+def _ceil(value: float) -> int:
+    return int(math.ceil(value - 1e-7))
+
+
+def l1_bound(sizes: np.ndarray, counts: np.ndarray, capacity: float) -> int:
+    """Relaxação contínua: ceil(soma dos tamanhos / capacidade)"""
+    if capacity <= 0:
+        return 0
+    return _ceil(float(sizes @ counts) / capacity)
+
+
+def l2_bound(sizes: np.ndarray, counts: np.ndarray, capacity: float) -> int:
+    """
+    Limite L2 de Martello e Toth, avaliado para todos os alfas de uma vez
+
+    Para cada alfa em {0} U {tamanhos <= C/2}: J1 = itens > C - alfa,
+    J2 = itens em (C/2, C - alfa], J3 = itens em [alfa, C/2];
+    L(alfa) = |J1| + |J2| + max(0, ceil((S(J3) - (|J2| C - S(J2))) / C)).
+
+    Args:
+        sizes: Tamanho por tipo de item (todos <= capacity)
+        counts: Quantidade por tipo de item
+        capacity: Capacidade da barra
+    """
+    keep = counts > 0
+    if capacity <= 0 or not keep.any():
+        return 0
+    order = np.argsort(sizes[keep], kind="stable")
+    s = sizes[keep][order]
+    n = counts[keep][order].astype(float)
+    count_prefix = np.concatenate(([0.0], np.cumsum(n)))
+    size_prefix = np.concatenate(([0.0], np.cumsum(s * n)))
+
+    def at_most(x: np.ndarray):
+        i = np.searchsorted(s, x + _EPS, side="right")
+        return count_prefix[i], size_prefix[i]
+
+    def below(x: np.ndarray):
+        i = np.searchsorted(s, x - _EPS, side="left")
+        return count_prefix[i], size_prefix[i]
+
+    half = capacity / 2
+    alphas = np.concatenate(([0.0], np.unique(s[s <= half + _EPS])))
+    n_upper, s_upper = at_most(capacity - alphas)
+    n_half, s_half = at_most(np.full_like(alphas, half))
+    n_alpha, s_alpha = below(alphas)
+
+    n1 = count_prefix[-1] - n_upper
+    n2, s2 = n_upper - n_half, s_upper - s_half
+    s3 = s_half - s_alpha
+    extra = np.ceil(np.maximum(0.0, s3 - (n2 * capacity - s2)) / capacity - 1e-7)
+    return int(np.max(n1 + n2 + extra))
+
+
+def bounds_1d(needs: np.ndarray, counts: np.ndarray, stock_lengths: np.ndarray,
+              stock_counts: np.ndarray) -> Dict[str, Any]:
+    """
+    Limites do corte 1D
+
+    As barras são tratadas como do maior comprimento em estoque, o que
+    mantém os limites válidos com materiais de comprimentos diferentes.
+    Peças que não cabem em nenhum material ficam de fora.
+
+    Args:
+        needs: Comprimento consumido por tipo de peça (peça + kerf)
+        counts: Quantidade por tipo de peça
+        stock_lengths, stock_counts: Comprimento e unidades por tipo de material
+
+    Returns:
+        Dicionário com "l1", "l2", "materials" (o maior) e "material"
+        (comprimento mínimo de material a abrir)
+    """
+    available = stock_lengths[stock_counts > 0]
+    if len(available) == 0:
+        return {"l1": 0, "l2": 0, "materials": 0, "material": 0.0}
+    capacity = float(available.max())
+    usable = needs <= capacity + _EPS
+    sizes, quantities = needs[usable], counts[usable]
+
+    l1 = l1_bound(sizes, quantities, capacity)
+    l2 = max(l1, l2_bound(sizes, quantities, capacity))
+    material = max(float(sizes @ quantities), l2 * float(available.min()))
+    return {"l1": l1, "l2": l2, "materials": l2, "material": material}
+
+
+def bounds_2d(widths: np.ndarray, heights: np.ndarray, counts: np.ndarray, allowed: np.ndarray,
+              sheet_widths: np.ndarray, sheet_heights: np.ndarray, sheet_counts: np.ndarray,
+              areas: Optional[np.ndarray] = None, sheet_areas: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Limites do corte 2D
+
+    Args:
+        widths, heights: Dimensões por tipo de peça (já com kerf)
+        counts: Quantidade por tipo de peça
+        allowed: Orientações permitidas (2, n)
+        sheet_widths, sheet_heights: Dimensões por tipo de chapa (já com kerf)
+        sheet_counts: Unidades por tipo de chapa
+        areas, sheet_areas: Áreas reais (sem kerf) de peças e chapas, para o
+            limite de material (padrão: as dimensões recebidas)
+
+    Returns:
+        Dicionário com "area", "large_parts", "materials" (o maior) e
+        "material" (área mínima de chapa a abrir)
+    """
+    available = sheet_counts > 0
+    if not available.any():
+        return {"area": 0, "large_parts": 0, "materials": 0, "material": 0.0}
+    max_w, max_h = float(sheet_widths[available].max()), float(sheet_heights[available].max())
+    max_area = float((sheet_widths * sheet_heights)[available].max())
+
+    # Dimensões nas duas orientações; peça utilizável se cabe em alguma chapa numa orientação permitida
+    ws = np.stack((widths, heights))
+    hs = np.stack((heights, widths))
+    fits = (allowed[:, :, None] & (ws[:, :, None] <= sheet_widths[available][None, None, :] + _EPS) &
+            (hs[:, :, None] <= sheet_heights[available][None, None, :] + _EPS))
+    usable = fits.any(axis=(0, 2)) & (counts > 0)
+
+    area = _ceil(float((widths * heights * counts)[usable].sum()) / max_area)
+    large = (~allowed | ((ws > max_w / 2 + _EPS) & (hs > max_h / 2 + _EPS))).all(axis=0)
+    large_parts = int(counts[usable & large].sum())
+    materials = max(area, large_parts)
+
+    areas = widths * heights if areas is None else areas
+    sheet_areas = sheet_widths * sheet_heights if sheet_areas is None else sheet_areas
+    material = max(float((areas * counts)[usable].sum()), materials * float(sheet_areas[available].min()))
+    return {"area": area, "large_parts": large_parts, "materials": materials, "material": material}
+
+
+def optimality_gap(materials_used: int, lower_bound: int, complete: bool = True) -> Optional[float]:
+    """Gap relativo (usadas - limite) / usadas; None sem material usado ou com o plano incompleto"""
+    if materials_used <= 0 or not complete:
+        return None
+    return round(max(0, materials_used - lower_bound) / materials_used, 4)
@@ -0,0 +1,288 @@
+"""
+Caches compartilhados entre requisições do CutPlanner
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import OptimizationRequest, OptimizationResult, PlanDelta
+
+PatternKey = Tuple[float, float, Tuple[float, ...]]
+Pattern = Tuple[int, ...]
+
+
+class PatternCache:
+    """
+    Cache LRU de padrões de corte 1D, por processo
+
+    A chave é (comprimento do material, kerf, comprimentos distintos de peça)
+    e o valor é um conjunto de padrões viáveis: quantidades por comprimento,
+    na ordem crescente dos comprimentos da chave. Tanto as chaves quanto os
+    padrões de cada chave são descartados do menos para o mais recente.
+    """
+
+    def __init__(self, max_entries: int = 256, max_patterns: int = 512):
+        """
+        Args:
+            max_entries: Máximo de chaves mantidas
+            max_patterns: Máximo de padrões por chave
+        """
+        self.max_entries = max_entries
+        self.max_patterns = max_patterns
+        self._entries: "OrderedDict[PatternKey, OrderedDict[Pattern, None]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(stock_length: float, kerf_width: float, part_lengths: Iterable[float]) -> PatternKey:
+        """Monta a chave normalizada (valores arredondados a 0,001 mm)"""
+        lengths = tuple(sorted({round(float(length), 3) for length in part_lengths}))
+        return round(float(stock_length), 3), round(float(kerf_width), 3), lengths
+
+    def get(self, key: PatternKey) -> Optional[List[Pattern]]:
+        """Retorna os padrões da chave (ou None) e atualiza a recência"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry)
+
+    def put(self, key: PatternKey, patterns: Iterable[Sequence[int]]) -> None:
+        """Acrescenta padrões à chave, respeitando os limites de tamanho"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = OrderedDict()
+            self._entries.move_to_end(key)
+
+            for pattern in patterns:
+                pattern = tuple(int(count) for count in pattern)
+                if not any(pattern):
+                    continue
+                entry[pattern] = None
+                entry.move_to_end(pattern)
+            while len(entry) > self.max_patterns:
+                entry.popitem(last=False)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove todas as entradas (contadores são mantidos)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "patterns": sum(len(entry) for entry in self._entries.values()),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def patterns_from_runs(bar_stock: List[int], bar_runs: List[List[List[int]]], group_of: np.ndarray,
+                       n_groups: int) -> Dict[int, List[Pattern]]:
+    """
+    Converte barras do motor 1D em padrões por comprimento distinto
+
+    Args:
+        bar_stock: Tipo de material de cada barra
+        bar_runs: Runs (tipo de peça, quantidade) de cada barra
+        group_of: Índice do comprimento distinto de cada tipo de peça
+        n_groups: Quantidade de comprimentos distintos
+
+    Returns:
+        Padrões agrupados por tipo de material
+    """
+    patterns: Dict[int, List[Pattern]] = {}
+    for stock, runs in zip(bar_stock, bar_runs):
+        pattern = [0] * n_groups
+        for item, count in runs:
+            pattern[group_of[item]] += count
+        patterns.setdefault(stock, []).append(tuple(pattern))
+    return patterns
+
+
+# Versão do formato das chaves/resultados; mudar invalida caches em disco antigos
+RESULT_CACHE_VERSION = 2
+
+
+def _quantize(value: Optional[float]) -> Optional[float]:
+    """Arredonda medidas a 0,01 mm para que ruído de ponto flutuante não mude a chave"""
+    return None if value is None else round(float(value), 2)
+
+
+def request_fingerprint(request: OptimizationRequest) -> str:
+    """
+    Hash canônico de uma requisição de otimização
+
+    Materiais e peças são ordenados e as medidas quantizadas, então
+    requisições que diferem apenas na ordem das listas ou em ruído abaixo de
+    0,01 mm produzem a mesma chave.
+    """
+    materials = sorted(
+        (m.id, m.name, m.material_type.value, _quantize(m.length), _quantize(m.width),
+         _quantize(m.thickness), m.quantity, _quantize(m.cost_per_unit), m.family, m.origin_id)
+        for m in request.materials
+    )
+    parts = sorted(
+        (p.id, p.name, p.part_type.value, _quantize(p.length), _quantize(p.width),
+         p.quantity, p.priority, p.grain_direction and p.grain_direction.value, p.material)
+        for p in request.parts
+    )
+    options = request.dict(exclude={"materials", "parts"})
+    options["kerf_width"] = _quantize(request.kerf_width)
+
+    canonical = json.dumps(
+        {"v": RESULT_CACHE_VERSION, "materials": materials, "parts": parts, "options": options},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def reoptimization_fingerprint(request: OptimizationRequest, previous: OptimizationResult, delta: PlanDelta) -> str:
+    """Hash canônico de uma reotimização (requisição original, plano atual e alteração)"""
+    canonical = json.dumps(
+        {"v": RESULT_CACHE_VERSION, "request": request_fingerprint(request),
+         "previous": previous.dict(exclude={"processing_time"}), "delta": delta.dict()},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache de resultados de otimização com LRU + TTL em memória
+
+    Opcionalmente usa um segundo nível em SQLite, compartilhado entre os
+    processos do servidor (workers do gunicorn) que apontem para o mesmo
+    arquivo. Entradas expiram após `ttl_seconds` nos dois níveis.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600,
+                 db_path: Optional[str] = None):
+        """
+        Args:
+            max_entries: Máximo de resultados em memória
+            ttl_seconds: Tempo de vida de cada resultado
+            db_path: Arquivo SQLite do nível em disco (None desativa)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, Tuple[float, float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_expires ON results (expires_at)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], str, float]]:
+        """
+        Busca um resultado
+
+        Returns:
+            Tupla (resultado, nível, criado_em) ou None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, expires_at, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return payload, "memory", created_at
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload, created_at, expires_at FROM results WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+                if row is not None:
+                    payload = json.loads(row[0])
+                    self._remember(key, row[1], row[2], payload)
+                    self.disk_hits += 1
+                    return payload, "disk", row[1]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        """Armazena um resultado (já serializável em JSON)"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, now, expires_at, payload)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, payload, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(payload), now, expires_at)
+                )
+                self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Invalida todos os resultados, inclusive no disco"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_tier": self.db_path is not None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key: str, created_at: float, expires_at: float, payload: Dict[str, Any]) -> None:
+        self._entries[key] = (created_at, expires_at, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# Instância compartilhada pelo processo
+PATTERN_CACHE = PatternCache()
@@ -0,0 +1,356 @@
+"""
+Geração de colunas (Gilmore-Gomory) para o problema de corte 1D
+
+O problema mestre escolhe quantas vezes cortar cada padrão (combinação de
+peças numa barra); novos padrões são gerados por uma mochila inteira
+limitada usando os preços duais do mestre. A relaxação linear dá um limite
+inferior para o consumo de material, e a solução inteira é obtida por
+arredondamento seguido de Best Fit para a demanda residual.
+
+Tudo é resolvido com NumPy: o mestre por um simplex revisado denso e a
+mochila por programação dinâmica sobre a capacidade discretizada.
+"""
+
+import math
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .context import SolveContext
+from .engine_1d import Runs, best_fit_1d, placed_all
+
+_EPS = 1e-9
+
+
+def _simplex(c: np.ndarray, A: np.ndarray, b: np.ndarray, basis: List[int],
+             max_pivots: int = 5000, deadline: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+    """
+    Simplex revisado para min c·x sujeito a A x = b, x >= 0
+
+    Parte de uma base viável (`basis`). Usa a regra de Dantzig e passa para
+    a regra de Bland após pivôs degenerados consecutivos, evitando ciclagem.
+    Ao atingir `deadline` (perf_counter) para com a base atual, que continua
+    viável, mas não necessariamente ótima.
+
+    Returns:
+        Tupla (x, y, basis): solução primal, variáveis duais e base final
+    """
+    m, n = A.shape
+    degenerate = 0
+
+    for _ in range(max_pivots):
+        B = A[:, basis]
+        x_b = np.linalg.solve(B, b)
+        y = np.linalg.solve(B.T, c[basis])
+
+        reduced = c - y @ A
+        reduced[basis] = 0.0
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        candidates = np.flatnonzero(reduced < -_EPS * max(1.0, np.abs(c).max()))
+        if len(candidates) == 0:
+            break
+
+        bland = degenerate > 20
+        entering = int(candidates[0] if bland else candidates[np.argmin(reduced[candidates])])
+
+        direction = np.linalg.solve(B, A[:, entering])
+        positive = direction > _EPS
+        if not positive.any():
+            raise ValueError("Problema mestre ilimitado")
+
+        ratios = np.full(m, np.inf)
+        ratios[positive] = x_b[positive] / direction[positive]
+        best_ratio = ratios.min()
+        ties = np.flatnonzero(ratios <= best_ratio + _EPS)
+        leaving = int(ties[np.argmin(np.asarray(basis)[ties])] if bland else ties[0])
+
+        degenerate = degenerate + 1 if best_ratio <= _EPS else 0
+        basis[leaving] = entering
+
+    B = A[:, basis]
+    x = np.zeros(n)
+    x[basis] = np.linalg.solve(B, b)
+    y = np.linalg.solve(B.T, c[basis])
+    return x, y, basis
+
+
+def _knapsack(values: np.ndarray, weights: np.ndarray, bounds: np.ndarray, capacity: int) -> np.ndarray:
+    """
+    Mochila inteira limitada por programação dinâmica
+
+    Cada tipo é dividido em blocos binários (1, 2, 4, ...) e tratado como
+    mochila 0/1; a tabela é vetorizada sobre a capacidade.
+
+    Returns:
+        Quantidade escolhida de cada tipo
+    """
+    best = np.zeros(capacity + 1)
+    choices = []
+
+    for item in np.flatnonzero((values > _EPS) & (bounds > 0) & (weights <= capacity)):
+        remaining = int(bounds[item])
+        block = 1
+        while remaining > 0:
+            take = min(block, remaining)
+            w = int(weights[item]) * take
+            if w > capacity:
+                break
+            # taken[c - w]: o bloco entra na melhor solução de capacidade c
+            candidate = best[:capacity + 1 - w] + values[item] * take
+            taken = candidate > best[w:] + _EPS
+            np.copyto(best[w:], candidate, where=taken)
+            choices.append((item, take, w, taken))
+            remaining -= take
+            block *= 2
+
+    pattern = np.zeros(len(values), dtype=np.int64)
+    cap = capacity
+    for item, take, w, taken in reversed(choices):
+        if cap >= w and taken[cap - w]:
+            pattern[item] += take
+            cap -= w
+    return pattern
+
+
+def _scale(needs: np.ndarray, stock_lengths: np.ndarray) -> int:
+    """Fator de discretização: milímetros inteiros quando possível, senão décimos"""
+    values = np.concatenate((needs, stock_lengths))
+    return 1 if np.abs(values - np.round(values)).max() < 1e-6 else 10
+
+
+def _expand_groups(groups: List[Tuple[int, np.ndarray]], group_types: List[List[int]],
+                   counts: np.ndarray) -> Tuple[List[int], List[Runs]]:
+    """
+    Converte barras descritas por grupo de comprimento em runs por tipo de peça
+
+    Cada barra corta primeiro os grupos mais longos; tipos com o mesmo
+    comprimento são consumidos na ordem de prioridade.
+    """
+    left = [int(c) for c in counts]
+    cursor = [0] * len(group_types)
+    bar_stock: List[int] = []
+    bar_runs: List[Runs] = []
+
+    for stock, pattern in groups:
+        runs: Runs = []
+        for g in np.flatnonzero(pattern)[::-1]:
+            need = int(pattern[g])
+            while need > 0:
+                item = group_types[g][cursor[g]]
+                take = min(need, left[item])
+                if take:
+                    runs.append([item, take])
+                    left[item] -= take
+                    need -= take
+                if left[item] == 0:
+                    cursor[g] += 1
+        bar_stock.append(stock)
+        bar_runs.append(runs)
+    return bar_stock, bar_runs
+
+
+def column_generation_1d(needs: np.ndarray, counts: np.ndarray, order: np.ndarray,
+                         stock_lengths: np.ndarray, stock_counts: np.ndarray,
+                         context: SolveContext,
+                         initial_patterns: Optional[List[Tuple[int, np.ndarray]]] = None
+                         ) -> Tuple[List[int], List[Runs], List[Tuple[int, np.ndarray]]]:
+    """
+    Resolve o corte 1D por geração de colunas e arredondamento
+
+    O objetivo do mestre é o comprimento total de material aberto, então o
+    limite da relaxação linear é diretamente comparável ao desperdício.
+    O número de rodadas de precificação é limitado por `context.max_iterations`
+    e pelo prazo do contexto; ao atingir o prazo, os padrões já gerados são
+    arredondados normalmente (a relaxação deixa de ser limite inferior). Se o
+    Best Fit inicial já atinge o limite inferior do contexto, ele é a resposta.
+
+    Args:
+        needs: Comprimento consumido por tipo de peça (peça + kerf)
+        counts: Quantidade por tipo de peça
+        order: Ordem de prioridade dos tipos
+        stock_lengths: Comprimento por tipo de material
+        stock_counts: Unidades disponíveis por tipo de material
+        context: Contexto da execução (iterações e metadados)
+        initial_patterns: Padrões (material, quantidade por grupo) para iniciar o mestre
+
+    Returns:
+        Tupla (bar_stock, bar_runs, patterns): barras no formato de
+        `best_fit_1d` e os padrões gerados, por grupo de comprimento
+    """
+    needs = np.asarray(needs, dtype=float)
+    stock_lengths = np.asarray(stock_lengths, dtype=float)
+    stock_counts = np.asarray(stock_counts, dtype=np.int64)
+
+    # Agrupar tipos pelo comprimento consumido; só entram os que cabem em algum material
+    usable = (counts > 0) & (needs <= (stock_lengths.max() if len(stock_lengths) else -1))
+    group_needs, group_of = np.unique(needs, return_inverse=True)
+    demand = np.bincount(group_of[usable], weights=counts[usable], minlength=len(group_needs)).astype(np.int64)
+    group_types: List[List[int]] = [[] for _ in group_needs]
+    for item in order:
+        group_types[group_of[item]].append(int(item))
+
+    baseline = best_fit_1d(needs, counts, order, stock_lengths, stock_counts)
+    context.record(float(np.sum(stock_lengths[baseline[0]])), len(baseline[0]), 0, lambda: baseline[:2],
+                   complete=placed_all(baseline[1], counts))
+    active = np.flatnonzero(demand > 0)
+    if len(active) == 0 or len(stock_lengths) == 0:
+        return baseline[0], baseline[1], []
+    if context.bound_reached:
+        # Best Fit já no limite inferior: o mestre não teria o que melhorar
+        context.metadata["column_generation"] = {"pricing_rounds": 0, "stopped_at_bound": True}
+        return baseline[0], baseline[1], []
+
+    scale = _scale(needs, stock_lengths)
+    weights = np.ceil(group_needs * scale - _EPS).astype(np.int64)
+    capacities = np.floor(stock_lengths * scale + _EPS).astype(np.int64)
+    costs = stock_lengths.copy()
+
+    n_groups, n_stock = len(group_needs), len(stock_lengths)
+
+    # Colunas iniciais: padrões homogêneos no menor material que comporta cada grupo
+    patterns: List[Tuple[int, np.ndarray]] = []
+    seen = set()
+
+    def add(stock: int, pattern: np.ndarray) -> bool:
+        key = (stock, pattern.tobytes())
+        if key in seen or not pattern.any():
+            return False
+        seen.add(key)
+        patterns.append((stock, pattern))
+        return True
+
+    for stock, pattern in initial_patterns or []:
+        if len(pattern) == n_groups and weights @ pattern <= capacities[stock]:
+            add(stock, np.minimum(pattern, demand))
+    for g in active:
+        for stock in np.argsort(capacities, kind="stable"):
+            if weights[g] <= capacities[stock]:
+                pattern = np.zeros(n_groups, dtype=np.int64)
+                pattern[g] = min(demand[g], capacities[stock] // weights[g])
+                add(int(stock), pattern)
+                break
+
+    # Mestre: colunas [folga de demanda | folga de estoque | artificiais | padrões]
+    # com P x - s + a = d (demanda) e S x + t = u (estoque). Os padrões ficam
+    # no fim para que a base de uma rodada continue válida na seguinte.
+    # Cobrir demanda com artificiais custa mais por milímetro do que qualquer
+    # padrão, então o mestre só as usa quando falta estoque.
+    n_rows = n_groups + n_stock
+    n_fixed = n_rows + n_groups
+    fixed = np.zeros((n_rows, n_fixed))
+    fixed[:n_groups, :n_groups] = -np.eye(n_groups)
+    fixed[n_groups:, n_groups:n_rows] = np.eye(n_stock)
+    fixed[:n_groups, n_rows:] = np.eye(n_groups)
+    penalty = 10.0 * costs.max() / group_needs.min() * group_needs
+    fixed_costs = np.concatenate((np.zeros(n_rows), penalty))
+
+    b = np.concatenate((demand, stock_counts)).astype(float)
+    basis = list(range(n_rows, n_fixed)) + list(range(n_groups, n_rows))
+    iterations = 0
+    converged = False
+
+    while True:
+        columns = np.zeros((n_rows, len(patterns)))
+        for j, (stock, pattern) in enumerate(patterns):
+            columns[:n_groups, j] = pattern
+            columns[n_groups + stock, j] = 1.0
+        A = np.hstack((fixed, columns))
+        c = np.concatenate((fixed_costs, [costs[stock] for stock, _ in patterns]))
+
+        x, y, basis = _simplex(c, A, b, basis, deadline=context.deadline)
+        if iterations >= context.max_iterations or context.expired():
+            break
+        iterations += 1
+
+        # Precificação: uma mochila por tipo de material
+        duals, stock_duals = y[:n_groups], y[n_groups:]
+        added = False
+        for stock in range(n_stock):
+            if stock_counts[stock] == 0:
+                continue
+            bounds = np.minimum(demand, capacities[stock] // np.maximum(weights, 1))
+            pattern = _knapsack(duals, weights, bounds, int(capacities[stock]))
+            reduced_cost = costs[stock] - duals @ pattern - stock_duals[stock]
+            if reduced_cost < -1e-7 * costs[stock] and add(stock, pattern):
+                added = True
+        if not added:
+            converged = True
+            break
+
+    n_p = len(patterns)
+    usage = x[n_fixed:]
+    feasible = float(x[n_rows:n_fixed].sum()) <= 1e-6
+    lp_bound = float(usage @ np.array([costs[stock] for stock, _ in patterns]))
+
+    # Arredondamento: parte inteira, depois arredondar para cima enquanto não sobrar peça
+    bars: List[Tuple[int, np.ndarray]] = []
+    residual = demand.copy()
+    stock_left = stock_counts.copy()
+    whole = np.floor(usage + 1e-6).astype(np.int64)
+    for j in np.flatnonzero(whole):
+        stock, pattern = patterns[j]
+        for _ in range(min(int(whole[j]), int(stock_left[stock]))):
+            bars.append((stock, pattern.copy()))
+            residual -= pattern
+            stock_left[stock] -= 1
+
+    # Excesso produzido pelo arredondamento é retirado das últimas barras
+    for g in np.flatnonzero(residual < 0):
+        for stock, pattern in reversed(bars):
+            take = min(int(pattern[g]), int(-residual[g]))
+            pattern[g] -= take
+            residual[g] += take
+            if residual[g] == 0:
+                break
+    bars = [(stock, pattern) for stock, pattern in bars if pattern.any()]
+
+    fractional = usage - whole
+    for j in np.argsort(-fractional):
+        stock, pattern = patterns[j]
+        if fractional[j] <= 1e-6:
+            break
+        if stock_left[stock] > 0 and (pattern <= residual).all():
+            bars.append((stock, pattern.copy()))
+            residual -= pattern
+            stock_left[stock] -= 1
+
+    # Demanda residual por Best Fit no estoque que sobrou
+    group_order = np.argsort(-group_needs, kind="stable")
+    rest_stock, rest_runs = best_fit_1d(group_needs, residual, group_order, stock_lengths, stock_left)
+    for stock, runs in zip(rest_stock, rest_runs):
+        pattern = np.zeros(n_groups, dtype=np.int64)
+        for g, count in runs:
+            pattern[g] += count
+        bars.append((stock, pattern))
+
+    bar_stock, bar_runs = _expand_groups(bars, group_types, counts)
+
+    # O arredondamento pode perder para o guloso em instâncias muito pequenas
+    def score(stocks: List[int], runs: List[Runs]) -> Tuple[float, float]:
+        placed = sum(needs[item] * count for bar in runs for item, count in bar)
+        return -round(placed, 6), float(sum(stock_lengths[s] for s in stocks))
+
+    used_baseline = score(*baseline) < score(bar_stock, bar_runs)
+    if used_baseline:
+        bar_stock, bar_runs = baseline
+    else:
+        context.record(float(np.sum(stock_lengths[bar_stock])), len(bar_stock), iterations,
+                       lambda: (bar_stock, bar_runs), complete=placed_all(bar_runs, counts))
+
+    # A relaxação só é limite inferior se convergiu e cobriu toda a demanda
+    exact = converged and feasible
+    context.metadata["column_generation"] = {
+        "lp_bound": lp_bound if exact else None,
+        "lp_bound_waste": lp_bound - float(group_needs @ demand) if exact else None,
+        "lp_bound_materials": int(math.ceil(usage.sum() - 1e-6)) if exact and n_stock == 1 else None,
+        "lp_converged": converged,
+        "lp_feasible": feasible,
+        "pricing_rounds": iterations,
+        "patterns": n_p,
+        "cached_patterns": len(initial_patterns or []),
+        "fallback_best_fit": used_baseline,
+        "stopped_at_bound": False,
+    }
+    return bar_stock, bar_runs, patterns
@@ -0,0 +1,292 @@
+"""
+Formato colunar compacto para planos muito grandes
+
+Cada CutOperation repete id, nome, dimensões, rotação e ordem da peça. No
+formato colunar as peças distintas (id, nome, dimensões na orientação
+colocada e rotação) ficam num dicionário e cada unidade cortada vira uma
+posição em arrays paralelos: índice no dicionário, índice da barra/chapa,
+x, y e, quando não seguem a numeração padrão do plano, número da unidade e
+ordem de corte. Os índices usam 16 bits quando cabem. A ordem de execução,
+que por padrão é derivada do plano, também só é guardada quando difere dele.
+
+Dois sabores, ambos convertidos de e para OptimizationResult:
+- JSON (`ColumnarPlan.to_dict`/`from_dict`): arrays como listas;
+- binário (`to_bytes`/`from_bytes`): cabeçalho JSON seguido dos arrays
+  empacotados (little-endian), descritos no próprio cabeçalho.
+
+x e y vão em float32: 0,01 mm de precisão em peças a até ~100 m da origem.
+"""
+
+import json
+import struct
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .incremental import split_unit_id
+from .models import CutOperation, Leftover, MaterialCut, OptimizationResult
+from .serialization import round_float
+
+FORMAT = "cutplanner.columnar/1"
+MAGIC = b"CPCR"
+MEDIA_TYPE = "application/vnd.cutplanner.columnar"
+
+# Arrays por unidade cortada e seus tipos; "unit" e "order" são omitidos quando seguem o padrão:
+# unidades numeradas por peça na ordem do plano e ordem 1..n em cada barra/chapa
+PIECE_ARRAYS: Tuple[Tuple[str, str], ...] = (
+    ("part", "<u4"),
+    ("material", "<u4"),
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("unit", "<u4"),
+    ("order", "<u4"),
+)
+
+_SUMMARY = ("success", "efficiency", "total_waste", "total_cost", "materials_used",
+            "algorithm_used", "processing_time")
+_PART_FIELDS = ("id", "name", "length", "width", "rotation")
+_MATERIAL_FIELDS = ("id", "name", "waste", "efficiency", "remaining_length", "remaining_width")
+_LEFTOVER_FIELDS = ("material_id", "length", "width", "usable", "area")
+
+
+def _round(value: Any) -> Any:
+    return round_float(value) if isinstance(value, float) else value
+
+
+def _value(item: Any, field: str) -> Any:
+    return item[field] if isinstance(item, dict) else getattr(item, field)
+
+
+def _narrow(array: np.ndarray) -> np.ndarray:
+    """Índices em 16 bits quando cabem"""
+    if array.dtype.kind == "u" and (len(array) == 0 or array.max() < 2 ** 16):
+        return array.astype("<u2")
+    return array
+
+
+def _default_order(material: np.ndarray) -> np.ndarray:
+    """Ordem 1..n dentro de cada barra/chapa (unidades agrupadas por barra/chapa)"""
+    return np.arange(len(material)) - np.searchsorted(material, material) + 1
+
+
+class ColumnarPlan:
+    """Plano de corte em colunas: dicionário de peças + arrays por unidade cortada"""
+
+    def __init__(self, summary: Dict[str, Any], parts: Dict[str, list], materials: Dict[str, list],
+                 pieces: Dict[str, np.ndarray], leftovers: Dict[str, list],
+                 execution_order: Optional[List[str]] = None):
+        """
+        Args:
+            summary: Campos escalares do resultado e metadata
+            parts: Dicionário de peças, em colunas (_PART_FIELDS)
+            materials: Barras/chapas do plano, em colunas (_MATERIAL_FIELDS)
+            pieces: Arrays por unidade cortada (PIECE_ARRAYS), agrupados por barra/chapa
+            leftovers: Retalhos, em colunas (_LEFTOVER_FIELDS)
+            execution_order: Ordem de execução, se diferente da derivada do plano
+        """
+        self.summary = summary
+        self.parts = parts
+        self.materials = materials
+        self.pieces = pieces
+        self.leftovers = leftovers
+        self.execution_order = execution_order
+
+    @property
+    def piece_count(self) -> int:
+        """Unidades cortadas no plano"""
+        return len(self.pieces["part"])
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos arrays por unidade cortada"""
+        return sum(array.nbytes for array in self.pieces.values())
+
+    @classmethod
+    def from_result(cls, result: Union[OptimizationResult, Dict[str, Any]]) -> "ColumnarPlan":
+        """
+        Converte um resultado para o formato colunar
+
+        Args:
+            result: OptimizationResult ou o dicionário de `result.dict()`
+        """
+        cuts = _value(result, "cuts")
+        n = sum(len(_value(cut, "cuts")) for cut in cuts)
+        pieces = {name: np.empty(n, dtype=dtype) for name, dtype in PIECE_ARRAYS}
+        parts: Dict[str, list] = {field: [] for field in _PART_FIELDS}
+        materials: Dict[str, list] = {field: [] for field in _MATERIAL_FIELDS}
+        index: Dict[Tuple, int] = {}
+        counters: Dict[str, int] = {}
+        default_units = np.empty(n, dtype="<u4")
+        derived = []
+
+        position = 0
+        for material, cut in enumerate(cuts):
+            for field in _MATERIAL_FIELDS:
+                materials[field].append(_value(cut, "material_" + field if field in ("id", "name") else field))
+            material_name = _value(cut, "material_name")
+            for operation in _value(cut, "cuts"):
+                part_id, unit = split_unit_id(_value(operation, "part_id"))
+                name = _value(operation, "part_name")
+                key = (part_id, name, _value(operation, "length"), _value(operation, "width"),
+                       _value(operation, "rotation"))
+                part = index.get(key)
+                if part is None:
+                    part = index[key] = len(parts["id"])
+                    for field, value in zip(_PART_FIELDS, key):
+                        parts[field].append(value)
+                counters[part_id] = default_units[position] = counters.get(part_id, 0) + 1
+                pieces["part"][position] = part
+                pieces["unit"][position] = unit
+                pieces["material"][position] = material
+                pieces["x"][position] = _value(operation, "position_x")
+                pieces["y"][position] = _value(operation, "position_y")
+                pieces["order"][position] = _value(operation, "order")
+                derived.append(f"{name} em {material_name}")
+                position += 1
+
+        leftovers: Dict[str, list] = {field: [] for field in _LEFTOVER_FIELDS}
+        for leftover in _value(result, "leftovers"):
+            for field in _LEFTOVER_FIELDS:
+                leftovers[field].append(_value(leftover, field))
+
+        if np.array_equal(pieces["unit"], default_units):
+            del pieces["unit"]
+        if np.array_equal(pieces["order"], _default_order(pieces["material"])):
+            del pieces["order"]
+        pieces = {name: _narrow(array) for name, array in pieces.items()}
+
+        execution_order = list(_value(result, "execution_order"))
+        summary = {field: _value(result, field) for field in _SUMMARY}
+        summary["metadata"] = _value(result, "metadata")
+        return cls(summary, parts, materials, pieces, leftovers,
+                   None if execution_order == derived else execution_order)
+
+    def to_result(self) -> OptimizationResult:
+        """Reconstrói o OptimizationResult (coordenadas com FLOAT_DECIMALS casas)"""
+        parts = self.parts
+        unit_ids = [f"{part_id}_{{}}" for part_id in parts["id"]]
+        part_index = self.pieces["part"].tolist()
+        xs = self.pieces["x"].tolist()
+        ys = self.pieces["y"].tolist()
+        if "unit" in self.pieces:
+            units = self.pieces["unit"].tolist()
+        else:
+            counters: Dict[str, int] = {}
+            units = []
+            for part in part_index:
+                part_id = parts["id"][part]
+                counters[part_id] = counters.get(part_id, 0) + 1
+                units.append(counters[part_id])
+        orders = (self.pieces["order"] if "order" in self.pieces
+                  else _default_order(self.pieces["material"])).tolist()
+        bounds = np.searchsorted(self.pieces["material"], np.arange(len(self.materials["id"]) + 1)).tolist()
+
+        cuts = []
+        derived = []
+        for material in range(len(self.materials["id"])):
+            operations = []
+            material_name = self.materials["name"][material]
+            for i in range(bounds[material], bounds[material + 1]):
+                part = part_index[i]
+                operations.append(CutOperation(
+                    part_id=unit_ids[part].format(units[i]),
+                    part_name=parts["name"][part],
+                    position_x=round_float(xs[i]),
+                    position_y=round_float(ys[i]),
+                    length=parts["length"][part],
+                    width=parts["width"][part],
+                    rotation=parts["rotation"][part],
+                    order=orders[i]
+                ))
+                derived.append(f"{parts['name'][part]} em {material_name}")
+            cuts.append(MaterialCut(
+                material_id=self.materials["id"][material],
+                material_name=material_name,
+                cuts=operations,
+                waste=self.materials["waste"][material],
+                efficiency=self.materials["efficiency"][material],
+                remaining_length=self.materials["remaining_length"][material],
+                remaining_width=self.materials["remaining_width"][material]
+            ))
+
+        leftovers = [
+            Leftover(**dict(zip(_LEFTOVER_FIELDS, values)))
+            for values in zip(*(self.leftovers[field] for field in _LEFTOVER_FIELDS))
+        ]
+        return OptimizationResult(
+            cuts=cuts,
+            leftovers=leftovers,
+            execution_order=self.execution_order if self.execution_order is not None else derived,
+            **self.summary
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Sabor JSON: arrays como listas, números arredondados a FLOAT_DECIMALS casas"""
+        return {**self._header(), "pieces": {
+            name: [_round(value) for value in array.tolist()] if array.dtype.kind == "f" else array.tolist()
+            for name, array in self.pieces.items()
+        }}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ColumnarPlan":
+        """Lê o sabor JSON"""
+        cls._check_format(data)
+        dtypes = dict(PIECE_ARRAYS)
+        pieces = {name: _narrow(np.asarray(values, dtype=dtypes[name])) for name, values in data["pieces"].items()}
+        return cls._from_header(data, pieces)
+
+    def to_bytes(self) -> bytes:
+        """
+        Sabor binário: MAGIC, tamanho do cabeçalho (uint32), cabeçalho JSON e
+        os arrays por unidade em sequência, cada um com piece_count valores
+        (nomes e tipos listados no cabeçalho)
+        """
+        header = self._header()
+        header["pieces"] = {"count": self.piece_count,
+                            "arrays": [[name, array.dtype.str] for name, array in self.pieces.items()]}
+        encoded = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        buffers = [array.tobytes() for array in self.pieces.values()]
+        return b"".join([MAGIC, struct.pack("<I", len(encoded)), encoded, *buffers])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ColumnarPlan":
+        """
+        Lê o sabor binário
+
+        Raises:
+            ValueError: Se os bytes não estão no formato colunar
+        """
+        if data[:4] != MAGIC:
+            raise ValueError("Conteúdo não está no formato colunar binário do CutPlanner")
+        (size,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8:8 + size].decode("utf-8"))
+        cls._check_format(header)
+        count = header["pieces"]["count"]
+        offset = 8 + size
+        pieces = {}
+        for name, dtype in header["pieces"]["arrays"]:
+            pieces[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += pieces[name].nbytes
+        return cls._from_header(header, pieces)
+
+    def _header(self) -> Dict[str, Any]:
+        return {
+            "format": FORMAT,
+            **{key: _round(value) if key != "metadata" else value for key, value in self.summary.items()},
+            "parts": {field: [_round(value) for value in values] for field, values in self.parts.items()},
+            "materials": {field: [_round(value) for value in values] for field, values in self.materials.items()},
+            "leftovers": {field: [_round(value) for value in values] for field, values in self.leftovers.items()},
+            "execution_order": self.execution_order,
+        }
+
+    @classmethod
+    def _from_header(cls, header: Dict[str, Any], pieces: Dict[str, np.ndarray]) -> "ColumnarPlan":
+        summary = {field: header.get(field) for field in _SUMMARY}
+        summary["metadata"] = header.get("metadata", {})
+        return cls(summary, header["parts"], header["materials"], pieces, header["leftovers"],
+                   header.get("execution_order"))
+
+    @staticmethod
+    def _check_format(data: Dict[str, Any]) -> None:
+        if data.get("format") != FORMAT:
+            raise ValueError(f"Formato colunar desconhecido: {data.get('format')!r} (esperado {FORMAT})")
@@ -0,0 +1,132 @@
+"""
+Contexto de execução compartilhado entre o CutPlanner e os algoritmos
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .bounds import optimality_gap
+
+# Plano parcial: (material de cada barra/chapa, [[tipo de peça, quantidade], ...] de cada uma)
+Assignment = Tuple[List[int], List[List[List[int]]]]
+
+
+class SolveContext:
+    """
+    Parâmetros e estado de uma execução de otimização
+
+    Os algoritmos leem limites (iterações, semente, prazo) daqui e devolvem
+    informações extras em `metadata`, que é mesclado ao OptimizationResult.
+    Algoritmos iterativos registram cada melhoria da solução incumbente em
+    `improvement_curve` e, ao atingir o prazo, devolvem a melhor encontrada.
+    Com `lower_bound` definido, uma incumbente completa (todas as peças
+    colocadas) que o atinge é ótima e marca `bound_reached`: os algoritmos
+    iterativos param ali. Um pedido de cancelamento (`cancel_check`) é
+    tratado como prazo atingido.
+
+    Com `progress` definido, cada registro vira também um evento de
+    progresso (iteração, desperdício e gap da incumbente, plano parcial),
+    no máximo um a cada `progress_interval_ms`.
+    """
+
+    def __init__(self, max_iterations: int = 1000, seed: Optional[int] = None,
+                 time_limit_ms: Optional[float] = None, options: Optional[Dict[str, Any]] = None,
+                 cancel_check: Optional[Callable[[], bool]] = None,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 progress_interval_ms: float = 100.0):
+        """
+        Args:
+            max_iterations: Máximo de iterações dos algoritmos iterativos
+            seed: Semente do gerador aleatório (None = não determinístico)
+            time_limit_ms: Prazo da otimização, contado a partir da criação do contexto
+            options: Opções da requisição específicas de algoritmos (ex.: heurística do maxrects)
+            cancel_check: Indica se a execução foi cancelada (consultado junto com o prazo)
+            progress: Recebe os eventos de progresso dos algoritmos iterativos
+            progress_interval_ms: Intervalo mínimo entre eventos de progresso
+        """
+        self.max_iterations = max_iterations
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.metadata: Dict[str, Any] = {}
+        self.options: Dict[str, Any] = options or {}
+        self.time_limit_ms = time_limit_ms
+        self.started = time.perf_counter()
+        self.deadline = self.started + time_limit_ms / 1000 if time_limit_ms else None
+        self.deadline_hit = False
+        self.cancel_check = cancel_check
+        self.cancelled = False
+        self.improvement_curve: List[List[float]] = []
+        self.lower_bound: Optional[float] = None
+        self.bound_reached = False
+        self.progress = progress
+        self.progress_interval_ms = progress_interval_ms
+        # Limite em barras/chapas (gap) e material consumido pelas peças (desperdício) nos eventos
+        self.lower_bound_materials: Optional[int] = None
+        self.demand = 0.0
+        self._last_progress: Optional[float] = None
+
+    def elapsed_ms(self) -> float:
+        """Tempo decorrido desde a criação do contexto"""
+        return (time.perf_counter() - self.started) * 1000
+
+    def deadline_within(self, budget_ms: float) -> float:
+        """Instante (perf_counter) em que termina um orçamento próprio, limitado pelo prazo"""
+        end = time.perf_counter() + budget_ms / 1000
+        return end if self.deadline is None else min(end, self.deadline)
+
+    def expired(self) -> bool:
+        """Indica (e registra) se o prazo da otimização foi atingido ou se ela foi cancelada"""
+        if not self.deadline_hit and self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.deadline_hit = True
+        if not self.deadline_hit and self.cancel_check is not None and self.cancel_check():
+            self.cancelled = self.deadline_hit = True
+        return self.deadline_hit
+
+    def record(self, stock_length: float, materials_used: Optional[int] = None,
+               iteration: Optional[int] = None,
+               assignment: Optional[Callable[[], Assignment]] = None, complete: bool = True) -> None:
+        """
+        Registra uma nova solução incumbente
+
+        Args:
+            stock_length: Comprimento (1D) ou área (2D) total de material usado;
+                só entra na curva se melhorar o último ponto
+            materials_used: Barras/chapas da incumbente (gap nos eventos de progresso)
+            iteration: Iteração do algoritmo (geração, rodada, execução)
+            assignment: Monta o plano parcial da incumbente; só chamada quando
+                um evento de progresso é emitido
+            complete: Se a incumbente colocou todas as peças; sem isso ela não
+                é comparada ao limite inferior e o gap fica indefinido
+        """
+        improved = not self.improvement_curve or stock_length < self.improvement_curve[-1][1]
+        if improved:
+            self.improvement_curve.append([round(self.elapsed_ms(), 3), float(stock_length)])
+        if complete and self.lower_bound is not None and stock_length <= self.lower_bound * (1 + 1e-9):
+            self.bound_reached = True
+        if self.progress is not None:
+            self._publish(stock_length, materials_used, iteration, assignment, improved, complete)
+
+    def _publish(self, stock_length: float, materials_used: Optional[int], iteration: Optional[int],
+                 assignment: Optional[Callable[[], Assignment]], improved: bool, complete: bool) -> None:
+        now = time.perf_counter()
+        if (self._last_progress is not None and not self.bound_reached
+                and (now - self._last_progress) * 1000 < self.progress_interval_ms):
+            return
+        self._last_progress = now
+        best = min(float(stock_length), self.improvement_curve[-1][1])
+        event: Dict[str, Any] = {
+            "iteration": iteration,
+            "elapsed_ms": round(self.elapsed_ms(), 3),
+            "improved": improved,
+            "best_stock_used": best,
+            "best_waste": max(0.0, best - self.demand),
+            "materials_used": materials_used,
+            "gap": (optimality_gap(materials_used, self.lower_bound_materials, complete)
+                    if materials_used is not None and self.lower_bound_materials is not None else None),
+            "bound_reached": self.bound_reached,
+        }
+        if assignment is not None:
+            event["assignment"] = assignment()
+        self.progress(event)
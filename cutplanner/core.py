@@ -3,15 +3,32 @@ Núcleo do sistema CutPlanner com algoritmos de otimização
 """
 
 import time
-import random
-from typing import List, Dict, Tuple, Optional, Any
+from concurrent.futures import BrokenExecutor, Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from copy import deepcopy
 import numpy as np
 
 from .models import (
     Material, Part, CutOperation, MaterialCut, 
-    Leftover, OptimizationResult, OptimizationRequest
+    Leftover, OptimizationResult, OptimizationRequest, PlanDelta
 )
+from .bounds import bounds_1d, bounds_2d, optimality_gap
+from .cache import PATTERN_CACHE, PatternCache, patterns_from_runs
+from .column_generation import column_generation_1d
+from .context import SolveContext
+from .demand import DemandVector, StockVector
+from .engine_1d import best_fit_1d, first_fit_1d, pattern_fit_1d, placed_all
+from .engine_2d import maxrects_2d, skyline_2d
+from .guillotine import guillotine_2d
+from .incremental import (
+    bar_cut, bar_length, fit_bars, place_on_sheet, remove_units, renumber,
+    sheet_cut, sheet_free_rects, split_unit_id, unit_offsets
+)
+from .multistart import MultistartPool, multistart_2d
+from .orientation import OrientationTable, allowed_orientations
+from .partition import accepts, merge_results, solve_partitions, split_request
+from .remnants import RemnantStore, remnant_id_of, remnant_material
+from .genetic import genetic_1d
 
 
 class CutPlanner:
@@ -19,20 +36,72 @@ class CutPlanner:
     Sistema principal de otimização de cortes
     """
     
-    def __init__(self, kerf_width: float = 3.0):
+    # Algoritmos cujo resultado depende de sorteio quando não há random_seed
+    randomized_algorithms = {"genetic"}
+    
+    # Algoritmos que param no relógio (prazo da requisição ou orçamento próprio)
+    # com a melhor solução até ali: o resultado depende da carga da máquina
+    deadline_algorithms = {"genetic", "column_generation", "multistart"}
+    timed_algorithms = {"genetic"}
+    
+    # Chapas examinadas para encaixar as peças novas na reotimização
+    reoptimize_candidates = 8
+    
+    # Eventos de progresso: intervalo mínimo e barras/chapas do plano parcial enviadas
+    progress_interval_ms = 100.0
+    progress_assignment_limit = 50
+    
+    def __init__(self, kerf_width: float = 3.0, genetic_population_size: int = 40,
+                 genetic_time_budget_ms: float = 2000,
+                 pattern_cache: Optional[PatternCache] = PATTERN_CACHE,
+                 multistart_workers: Optional[int] = None,
+                 remnant_store: Optional[RemnantStore] = None, remnant_limit: int = 50,
+                 partition_workers: Optional[int] = None,
+                 partition_executor: Optional[Executor] = None,
+                 multistart_pool: Optional[MultistartPool] = None,
+                 cancel_check: Optional[Callable[[], bool]] = None,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
         """
         Inicializa o planejador de cortes
         
         Args:
             kerf_width: Espessura do corte em mm
+            genetic_population_size: Tamanho da população do algoritmo genético
+            genetic_time_budget_ms: Tempo máximo de evolução do algoritmo genético
+            pattern_cache: Cache de padrões 1D compartilhado (None desativa)
+            multistart_workers: Processos do multi-start 2D (padrão: núcleos da máquina)
+            remnant_store: Estoque de retalhos usado quando a requisição pede use_remnants
+            remnant_limit: Máximo de retalhos oferecidos por material da requisição
+            partition_workers: Processos para as partições por dimensão e material (padrão: núcleos da máquina)
+            partition_executor: Pool de processos externo para as cadeias de partições
+                (substitui partition_workers; ex.: o pool de otimizações da API)
+            multistart_pool: Pool externo dos encaixes do multi-start (substitui multistart_workers)
+            cancel_check: Consultado pelos algoritmos iterativos; True interrompe a
+                otimização como no prazo (cancelamento cooperativo)
+            progress_callback: Recebe os eventos de progresso dos algoritmos iterativos
+                (iteração, melhor desperdício, gap para o limite inferior, plano parcial)
         """
         self.kerf_width = kerf_width
+        self.genetic_population_size = genetic_population_size
+        self.genetic_time_budget_ms = genetic_time_budget_ms
+        self.pattern_cache = pattern_cache
+        self.multistart_workers = multistart_workers
+        self.remnant_store = remnant_store
+        self.remnant_limit = remnant_limit
+        self.partition_workers = partition_workers
+        self.partition_executor = partition_executor
+        self.multistart_pool = multistart_pool
+        self.cancel_check = cancel_check
+        self.progress_callback = progress_callback
         self.algorithms = {
             "first_fit": self._first_fit_1d,
             "best_fit": self._best_fit_1d,
             "genetic": self._genetic_algorithm_1d,
+            "column_generation": self._column_generation_1d,
             "guillotine": self._guillotine_2d,
-            "maxrects": self._maxrects_2d
+            "maxrects": self._maxrects_2d,
+            "skyline": self._skyline_2d,
+            "multistart": self._multistart_2d
         }
     
     def optimize(self, request: OptimizationRequest) -> OptimizationResult:
@@ -44,15 +113,27 @@ class CutPlanner:
             
         Returns:
             Resultado da otimização
+        
+        Raises:
+            BrokenExecutor: Se um pool externo (partition_executor, multistart_pool)
+                quebrou; os demais erros viram um resultado com success=False
         """
         start_time = time.time()
         
         try:
-            # Determinar tipo de otimização
-            if any(m.material_type.value in ["bar", "profile"] for m in request.materials):
-                result = self._optimize_1d(request)
+            offered = 0
+            if request.use_remnants and self.remnant_store is not None:
+                request, offered = self._with_remnants(request)
+            
+            # Pedido misto (barras e chapas) ou peças restritas a um material:
+            # partições independentes otimizadas em paralelo
+            partitions, chains, unassigned = split_request(request)
+            if len(partitions) > 1 or (partitions and any(p.material for p in request.parts)):
+                results = solve_partitions(self, partitions, chains, self.partition_workers,
+                                           self._partition_options(), executor=self.partition_executor)
+                result = merge_results(request, partitions, results, unassigned)
             else:
-                result = self._optimize_2d(request)
+                result = self._optimize_dimension(request)
             
             # Calcular tempo de processamento
             processing_time = (time.time() - start_time) * 1000
@@ -60,10 +141,17 @@ class CutPlanner:
             # Atualizar metadados
             result.processing_time = processing_time
             result.algorithm_used = request.algorithm
+            if request.use_remnants:
+                result.metadata["remnants"] = {"offered": offered,
+                                               **self._remnant_metadata(request.materials, result.cuts)}
             
             return result
             
         except Exception as e:
+            if isinstance(e, BrokenExecutor) and (self.partition_executor is not None
+                                                  or self.multistart_pool is not None):
+                # Quem forneceu o pool precisa saber que ele quebrou (para recriá-lo)
+                raise
             return OptimizationResult(
                 success=False,
                 efficiency=0.0,
@@ -77,27 +165,373 @@ class CutPlanner:
                 metadata={"error": str(e)}
             )
     
+    def reoptimize(self, request: OptimizationRequest, previous: OptimizationResult,
+                   delta: PlanDelta) -> OptimizationResult:
+        """
+        Reotimiza um plano depois de acréscimos ou cancelamentos de peças
+        
+        Só as unidades afetadas mudam. As peças canceladas saem das barras/chapas
+        de menor aproveitamento; as novas entram nas sobras das unidades já
+        planejadas (nas chapas sem mover as peças existentes, e no corte
+        guilhotina, que não admite encaixe livre, direto em chapas novas); o que
+        não couber é otimizado à parte, com o estoque ainda não usado, e recebe
+        números de unidade após os do plano existente.
+        
+        Args:
+            request: Requisição que gerou o plano (materiais, kerf e opções)
+            previous: Plano atual
+            delta: Peças acrescentadas e canceladas
+        
+        Returns:
+            Novo plano; metadata["reoptimization"] resume o que mudou
+        """
+        start_time = time.time()
+        
+        try:
+            # Retalhos usados no plano também são materiais dele (origem e família para Part.material)
+            request = request.copy(update={"materials": self._plan_materials(request, previous)})
+            two_d = not any(m.material_type.value in ["bar", "profile"] for m in request.materials)
+            kerf_width = request.kerf_width
+            cuts = list(previous.cuts)
+            leftovers = {leftover.material_id: leftover for leftover in previous.leftovers}
+            part_offsets = unit_offsets(op.part_id for cut in cuts for op in cut.cuts)
+            material_offsets = unit_offsets(cut.material_id for cut in cuts)
+        
+            operations, missing = remove_units(cuts, delta.remove_parts)
+        
+            # Peças novas da mesma dimensão do plano, unidade a unidade, maiores primeiro
+            wanted = "rectangular" if two_d else "linear"
+            added = [p for p in delta.add_parts if p.part_type.value == wanted]
+            units = sorted(((i, k) for i, part in enumerate(added) for k in range(part.quantity)),
+                           key=lambda unit: -added[unit[0]].area)
+            pending = [0] * len(added)
+        
+            if two_d:
+                frees = self._insert_on_sheets(request, cuts, operations, added, units, pending, part_offsets)
+                rebuilt = {
+                    index: sheet_cut(cuts[index], ops, frees.get(index), kerf_width)
+                    for index, ops in operations.items()
+                }
+            else:
+                lengths = {index: bar_length(cuts[index], kerf_width) for index in operations}
+                self._insert_on_bars(request, cuts, operations, added, units, pending, part_offsets, lengths)
+                rebuilt = {
+                    index: bar_cut(cuts[index], ops, lengths[index], kerf_width)
+                    for index, ops in operations.items()
+                }
+        
+            # Unidades alteradas; as que ficaram vazias voltam ao estoque
+            released = []
+            for index, (cut, leftover) in rebuilt.items():
+                leftovers.pop(cut.material_id, None)
+                if not cut.cuts:
+                    released.append(cut.material_id)
+                    cuts[index] = None
+                    continue
+                cuts[index] = cut
+                if leftover is not None:
+                    leftovers[cut.material_id] = leftover
+            cuts = [cut for cut in cuts if cut is not None]
+        
+            # O que não coube vai para material novo, otimizado só com essas peças
+            new_cuts: List[MaterialCut] = []
+            renamed: Dict[str, str] = {}
+            sub_metadata: Dict[str, Any] = {}
+            remaining_parts = [part.copy(update={"quantity": count}) for part, count in zip(added, pending) if count]
+            if remaining_parts:
+                in_use: Dict[str, int] = {}
+                for cut in cuts:
+                    base = split_unit_id(cut.material_id)[0]
+                    in_use[base] = in_use.get(base, 0) + 1
+                stock = [
+                    m.copy(update={"quantity": m.quantity - in_use.get(m.id, 0)})
+                    for m in request.materials if m.quantity > in_use.get(m.id, 0)
+                ]
+                if stock:
+                    sub_request = request.copy(update={"materials": stock, "parts": remaining_parts,
+                                                       "use_remnants": False})
+                    sub_result = self.optimize(sub_request)
+                    if not sub_result.success:
+                        raise RuntimeError(sub_result.metadata.get("error"))
+                    sub_metadata = sub_result.metadata
+                    new_cuts = [renumber(cut, material_offsets, part_offsets) for cut in sub_result.cuts]
+                    renamed = {old.material_id: new.material_id for old, new in zip(sub_result.cuts, new_cuts)}
+                    for leftover in sub_result.leftovers:
+                        material_id = renamed.get(leftover.material_id, leftover.material_id)
+                        leftovers[material_id] = leftover.copy(update={"material_id": material_id})
+            cuts.extend(new_cuts)
+        
+            # Limites e gap do plano anterior não valem para o novo pedido, nem o que
+            # a API anotou na resposta anterior (cache, admissão, coalescência)
+            metadata = {key: value for key, value in previous.metadata.items()
+                        if key not in ("cache", "lower_bound", "gap", "admission", "coalesced", "downgraded_from")}
+            self._extend_cut_sequence(metadata, sub_metadata, renamed)
+            added_total = sum(part.quantity for part in added)
+            metadata["reoptimization"] = {
+                "removed_parts": sum(delta.remove_parts.values()) - sum(missing.values()),
+                "not_found": missing,
+                "added_parts": added_total,
+                "inserted_parts": added_total - sum(pending),
+                "new_units": [cut.material_id for cut in new_cuts],
+                "changed_units": [cut.material_id for cut, _ in rebuilt.values() if cut.cuts],
+                "released_units": released,
+                "unplaced_parts": sum(pending) - sum(len(cut.cuts) for cut in new_cuts),
+            }
+            if "remnants" in metadata:
+                metadata["remnants"] = {**metadata["remnants"], **self._remnant_metadata(request.materials, cuts)}
+        
+            efficiency, total_waste = self._plan_metrics(request.materials, cuts)
+        
+            return OptimizationResult(
+                success=True,
+                efficiency=efficiency,
+                total_waste=total_waste,
+                materials_used=len(cuts),
+                cuts=cuts,
+                leftovers=[leftovers[cut.material_id] for cut in cuts if cut.material_id in leftovers],
+                execution_order=self._generate_execution_order(cuts),
+                algorithm_used=request.algorithm,
+                processing_time=(time.time() - start_time) * 1000,
+                metadata=metadata
+            )
+        
+        except Exception as e:
+            return OptimizationResult(
+                success=False,
+                efficiency=0.0,
+                total_waste=0.0,
+                materials_used=0,
+                cuts=[],
+                leftovers=[],
+                execution_order=[],
+                algorithm_used=request.algorithm,
+                processing_time=(time.time() - start_time) * 1000,
+                metadata={"error": str(e)}
+            )
+    
+    def _plan_materials(self, request: OptimizationRequest, previous: OptimizationResult) -> List[Material]:
+        """Materiais da requisição mais os retalhos usados no plano (metadata["remnants"]["materials"])"""
+        known = {m.id for m in request.materials}
+        remnants = [Material(**material) for material in previous.metadata.get("remnants", {}).get("materials", [])]
+        return [m for m in remnants if m.id not in known] + list(request.materials)
+    
+    def _remnant_metadata(self, materials: List[Material], cuts: List[MaterialCut]) -> Dict[str, Any]:
+        """Retalhos usados no plano: ids e os materiais que os representam (para a reotimização)"""
+        used = sorted({remnant_id_of(cut.material_id) for cut in cuts} - {None})
+        return {
+            "used": used,
+            "materials": [m.dict() for m in materials if remnant_id_of(m.id) in used],
+        }
+    
+    def _insert_on_bars(self, request: OptimizationRequest, cuts: List[MaterialCut],
+                        operations: Dict[int, List[CutOperation]], added: List[Part],
+                        units: List[Tuple[int, int]], pending: List[int], part_offsets: Dict[str, int],
+                        lengths: Dict[int, float]) -> None:
+        """Best fit das peças novas nas sobras das barras do plano (acrescentadas ao fim da barra)"""
+        kerf_width = request.kerf_width
+        remaining = np.array([
+            lengths[index] - sum(op.length + kerf_width for op in operations[index])
+            if index in operations else cut.remaining_length
+            for index, cut in enumerate(cuts)
+        ])
+        sizes = np.array([added[i].length + kerf_width for i, _ in units])
+        
+        # Barras cujo material cada peça nova aceita (Part.material)
+        materials = {m.id: m for m in request.materials}
+        bar_materials = [materials.get(split_unit_id(cut.material_id)[0]) for cut in cuts]
+        masks = [np.array([accepts(part, material) for material in bar_materials], dtype=bool) for part in added]
+        for (i, _), index in zip(units, fit_bars(remaining, sizes, [masks[i] for i, _ in units])):
+            part = added[i]
+            if index is None:
+                pending[i] += 1
+                continue
+            if index not in operations:
+                operations[index] = list(cuts[index].cuts)
+                lengths[index] = bar_length(cuts[index], kerf_width)
+            part_offsets[part.id] = part_offsets.get(part.id, 0) + 1
+            operations[index].append(CutOperation(
+                part_id=f"{part.id}_{part_offsets[part.id]}",
+                part_name=part.name,
+                length=part.length,
+                order=0
+            ))
+    
+    def _insert_on_sheets(self, request: OptimizationRequest, cuts: List[MaterialCut],
+                          operations: Dict[int, List[CutOperation]], added: List[Part],
+                          units: List[Tuple[int, int]], pending: List[int],
+                          part_offsets: Dict[str, int]) -> Dict[int, Any]:
+        """
+        Encaixa as peças novas no espaço livre das chapas do plano
+        
+        São examinadas as chapas alteradas pelos cancelamentos e, depois, as de
+        maior desperdício, até `reoptimize_candidates` chapas.
+        
+        Returns:
+            Retângulos livres por índice de chapa reconstruída (para os retalhos)
+        """
+        kerf_width = request.kerf_width
+        sheets = {m.id: m for m in request.materials if m.material_type.value == "sheet"}
+        free_layout = request.algorithm in ["maxrects", "skyline", "multistart"]
+        frees: Dict[int, Any] = {}
+        if not free_layout:
+            # Guilhotina: cancelamentos só deixam o lugar vazio, os cortes continuam válidos
+            for i, _ in units:
+                pending[i] += 1
+            return frees
+    
+        def dims(index: int) -> Optional[Material]:
+            return sheets.get(split_unit_id(cuts[index].material_id)[0])
+        
+        for index, ops in operations.items():
+            material = dims(index)
+            if material is not None:
+                frees[index] = sheet_free_rects(ops, material.width, material.length, kerf_width)
+        
+        todo = list(units)
+        if todo:
+            smallest = min(added[i].area for i, _ in todo)
+            others = sorted((index for index in range(len(cuts)) if index not in operations),
+                            key=lambda index: -cuts[index].waste)
+            candidates = [index for index in list(operations) + others
+                          if dims(index) is not None and cuts[index].waste >= smallest]
+            allowed = self._allowed_orientations(DemandVector(added), self._create_context(request))
+        
+            for index in candidates[:self.reoptimize_candidates]:
+                if not todo:
+                    break
+                material = dims(index)
+                ops = operations.get(index, list(cuts[index].cuts))
+                free = frees[index] if index in frees else sheet_free_rects(ops, material.width, material.length, kerf_width)
+                left = []
+                for i, k in todo:
+                    part = added[i]
+                    if not accepts(part, material):
+                        left.append((i, k))
+                        continue
+                    unit_id = f"{part.id}_{part_offsets.get(part.id, 0) + 1}"
+                    operation = place_on_sheet(free, part, unit_id, tuple(allowed[:, i]), kerf_width, len(ops) + 1)
+                    if operation is None:
+                        left.append((i, k))
+                        continue
+                    part_offsets[part.id] = part_offsets.get(part.id, 0) + 1
+                    ops.append(operation)
+                if len(left) < len(todo):
+                    operations[index] = ops
+                    frees[index] = free
+                todo = left
+        
+        for i, _ in todo:
+            pending[i] += 1
+        return frees
+    
+    def _extend_cut_sequence(self, metadata: Dict[str, Any], sub_metadata: Dict[str, Any],
+                             renamed: Dict[str, str]) -> None:
+        """Acrescenta à sequência de cortes guilhotina do plano a das chapas novas"""
+        sequence = metadata.get("guillotine", {}).get("cut_sequence")
+        new_sequence = sub_metadata.get("guillotine", {}).get("cut_sequence")
+        if sequence is None or not new_sequence:
+            return
+        metadata["guillotine"] = {
+            **metadata["guillotine"],
+            "cut_sequence": sequence + [
+                {**entry, "material_id": renamed.get(entry["material_id"], entry["material_id"])}
+                for entry in new_sequence
+            ],
+        }
+
+    def _optimize_dimension(self, request: OptimizationRequest) -> OptimizationResult:
+        """Determina o tipo de otimização (1D se houver barra ou perfil)"""
+        if any(m.material_type.value in ["bar", "profile"] for m in request.materials):
+            return self._optimize_1d(request)
+        return self._optimize_2d(request)
+    
+    def _partition_options(self) -> Dict[str, Any]:
+        """
+        Configuração do CutPlanner dos workers de partição
+        
+        Num pool externo o multi-start da partição roda em sequência no
+        worker, que não abre processos próprios.
+        """
+        return {
+            "kerf_width": self.kerf_width,
+            "genetic_population_size": self.genetic_population_size,
+            "genetic_time_budget_ms": self.genetic_time_budget_ms,
+            "multistart_workers": 1 if self.partition_executor is not None else self.multistart_workers,
+            "partition_workers": 1,
+        }
+    
+    def is_deterministic(self, request: OptimizationRequest) -> bool:
+        """
+        Indica se a requisição é reprodutível (e o resultado pode ir para o cache)
+        
+        Não é quando o resultado depende do estoque de retalhos (use_remnants),
+        de sorteio (algoritmo aleatório sem random_seed) ou do relógio: com
+        time_limit_ms os algoritmos iterativos param no prazo, e o genético
+        para no próprio orçamento de tempo mesmo com semente.
+        """
+        if request.use_remnants:
+            return False
+        if request.algorithm in self.randomized_algorithms and request.random_seed is None:
+            return False
+        if request.algorithm in self.deadline_algorithms and request.time_limit_ms is not None:
+            return False
+        return request.algorithm not in self.timed_algorithms
+    
+    def _with_remnants(self, request: OptimizationRequest) -> Tuple[OptimizationRequest, int]:
+        """
+        Acrescenta, antes do estoque novo, os retalhos do mesmo material de origem
+        em que cabe ao menos a menor peça
+        
+        Returns:
+            Tupla (requisição com os retalhos como materiais de uma unidade, retalhos oferecidos)
+        """
+        linear = [p.length for p in request.parts if p.part_type.value == "linear"]
+        sides = [min(p.length, p.width) for p in request.parts if p.part_type.value == "rectangular"]
+        
+        offered = []
+        for material in request.materials:
+            if material.material_type.value == "sheet":
+                if not sides:
+                    continue
+                found = self.remnant_store.find(material.material_type, material.id, min_length=min(sides),
+                                                min_width=min(sides), limit=self.remnant_limit)
+            else:
+                if not linear:
+                    continue
+                found = self.remnant_store.find(material.material_type, material.id, min_length=min(linear),
+                                                limit=self.remnant_limit)
+            offered.extend(remnant_material(remnant, material) for remnant in found)
+        
+        if not offered:
+            return request, 0
+        return request.copy(update={"materials": offered + list(request.materials)}), len(offered)
+    
     def _optimize_1d(self, request: OptimizationRequest) -> OptimizationResult:
         """Otimização para materiais 1D (barras/perfis)"""
         
         # Preparar dados
         materials = self._prepare_materials_1d(request.materials)
         parts = self._prepare_parts_1d(request.parts)
+        context = self._create_context(request)
+        
+        # Limites inferiores: medem o gap e permitem parar os algoritmos iterativos
+        bounds = bounds_1d(parts.lengths + request.kerf_width, parts.counts, materials.lengths, materials.counts)
+        context.lower_bound = bounds["material"]
+        self._track_progress(context, materials, parts, bounds["materials"],
+                             float((parts.lengths + request.kerf_width) @ parts.counts))
         
         # Executar algoritmo selecionado
         if request.algorithm in self.algorithms:
             cuts, leftovers = self.algorithms[request.algorithm](
-                materials, parts, request.kerf_width
+                materials, parts, request.kerf_width, context
             )
         else:
             # Fallback para best_fit
-            cuts, leftovers = self._best_fit_1d(materials, parts, request.kerf_width)
+            cuts, leftovers = self._best_fit_1d(materials, parts, request.kerf_width, context)
         
-        # Calcular métricas
-        total_waste = sum(cut.waste for cut in cuts)
-        total_area = sum(m.area for m in request.materials)
-        used_area = total_area - total_waste
-        efficiency = (used_area / total_area) * 100 if total_area > 0 else 0
+        # Calcular métricas (o gap só vale para planos completos)
+        efficiency, total_waste = self._plan_metrics(request.materials, cuts)
+        complete = sum(len(cut.cuts) for cut in cuts) == parts.total
         
         # Gerar ordem de execução
         execution_order = self._generate_execution_order(cuts)
@@ -112,7 +546,9 @@ class CutPlanner:
             execution_order=execution_order,
             algorithm_used=request.algorithm,
             processing_time=0,  # Será atualizado pelo método principal
-            metadata={"dimension": "1D"}
+            metadata={"dimension": "1D", **context.metadata, **self._deadline_metadata(context),
+                      "lower_bound": bounds,
+                      "gap": optimality_gap(len(cuts), bounds["materials"], complete)}
         )
     
     def _optimize_2d(self, request: OptimizationRequest) -> OptimizationResult:
@@ -121,21 +557,32 @@ class CutPlanner:
         # Preparar dados
         materials = self._prepare_materials_2d(request.materials)
         parts = self._prepare_parts_2d(request.parts)
+        context = self._create_context(request)
+        
+        # Limites inferiores (kerf nas duas dimensões, como nos motores)
+        kerf_width = request.kerf_width
+        bounds = bounds_2d(
+            parts.widths + kerf_width, parts.lengths + kerf_width, parts.counts,
+            self._allowed_orientations(parts, context),
+            materials.widths + kerf_width, materials.lengths + kerf_width, materials.counts,
+            areas=parts.widths * parts.lengths, sheet_areas=materials.widths * materials.lengths
+        )
+        context.lower_bound = bounds["material"]
+        self._track_progress(context, materials, parts, bounds["materials"],
+                             float((parts.widths * parts.lengths) @ parts.counts))
         
         # Executar algoritmo selecionado
-        if request.algorithm in ["guillotine", "maxrects"]:
+        if request.algorithm in ["guillotine", "maxrects", "skyline", "multistart"]:
             cuts, leftovers = self.algorithms[request.algorithm](
-                materials, parts, request.kerf_width
+                materials, parts, request.kerf_width, context
             )
         else:
             # Fallback para guillotine
-            cuts, leftovers = self._guillotine_2d(materials, parts, request.kerf_width)
+            cuts, leftovers = self._guillotine_2d(materials, parts, request.kerf_width, context)
         
-        # Calcular métricas
-        total_waste = sum(cut.waste for cut in cuts)
-        total_area = sum(m.area for m in request.materials)
-        used_area = total_area - total_waste
-        efficiency = (used_area / total_area) * 100 if total_area > 0 else 0
+        # Calcular métricas (o gap só vale para planos completos)
+        efficiency, total_waste = self._plan_metrics(request.materials, cuts)
+        complete = sum(len(cut.cuts) for cut in cuts) == parts.total
         
         # Gerar ordem de execução
         execution_order = self._generate_execution_order(cuts)
@@ -150,149 +597,190 @@ class CutPlanner:
             execution_order=execution_order,
             algorithm_used=request.algorithm,
             processing_time=0,  # Será atualizado pelo método principal
-            metadata={"dimension": "2D"}
+            metadata={"dimension": "2D", **context.metadata, **self._deadline_metadata(context),
+                      "lower_bound": bounds,
+                      "gap": optimality_gap(len(cuts), bounds["materials"], complete)}
+        )
+    
+    def _plan_metrics(self, materials: List[Material], cuts: List[MaterialCut]) -> Tuple[float, float]:
+        """
+        Aproveitamento (%) e desperdício totais das unidades de material usadas no plano
+        
+        A capacidade de cada unidade (comprimento ou área) vem do material de
+        origem do seu id; unidades de materiais fora da lista (ex.: retalhos de
+        um plano anterior) usam a capacidade implícita no próprio corte.
+        
+        Returns:
+            Tupla (efficiency, total_waste)
+        """
+        capacities = {m.id: m.area for m in materials}
+        total_waste = 0.0
+        total_capacity = 0.0
+        for cut in cuts:
+            capacity = capacities.get(split_unit_id(cut.material_id)[0])
+            if capacity is None:
+                used = sum(op.length * (op.width or 1.0) for op in cut.cuts)
+                capacity = cut.waste * 100 / (100 - cut.efficiency) if cut.efficiency < 100 else used + cut.waste
+            total_waste += cut.waste
+            total_capacity += capacity
+        efficiency = (total_capacity - total_waste) / total_capacity * 100 if total_capacity > 0 else 0
+        return efficiency, total_waste
+    
+    def _create_context(self, request: OptimizationRequest) -> SolveContext:
+        """Cria o contexto de execução a partir da requisição"""
+        return SolveContext(
+            max_iterations=request.max_iterations,
+            seed=request.random_seed,
+            time_limit_ms=request.time_limit_ms,
+            options=request.dict(exclude={"materials", "parts"}),
+            cancel_check=self.cancel_check
         )
     
-    def _prepare_materials_1d(self, materials: List[Material]) -> List[Dict]:
+    def _track_progress(self, context: SolveContext, materials: StockVector, parts: DemandVector,
+                        bound_materials: int, demand: float) -> None:
+        """
+        Liga os eventos de progresso do contexto ao progress_callback
+        
+        O plano parcial sai com ids de material e de peça, limitado às
+        primeiras progress_assignment_limit barras/chapas.
+        """
+        if self.progress_callback is None:
+            return
+        
+        def relay(event: Dict[str, Any]) -> None:
+            assignment = event.pop("assignment", None)
+            if assignment is not None:
+                stocks, runs = assignment
+                limit = self.progress_assignment_limit
+                event["assignment"] = []
+                for stock, bar in zip(stocks[:limit], runs[:limit]):
+                    counts: Dict[str, int] = {}
+                    for item, count in bar:
+                        part_id = parts.parts[item].id
+                        counts[part_id] = counts.get(part_id, 0) + int(count)
+                    event["assignment"].append({"material_id": materials.materials[stock].id, "parts": counts})
+                event["assignment_truncated"] = len(stocks) > limit
+            self.progress_callback(event)
+        
+        context.progress = relay
+        context.progress_interval_ms = self.progress_interval_ms
+        context.lower_bound_materials = bound_materials
+        context.demand = demand
+    
+    def _deadline_metadata(self, context: SolveContext) -> Dict[str, Any]:
+        """Prazo, se foi atingido e a curva de melhoria (t_ms, material usado) da execução"""
+        return {
+            "time_limit_ms": context.time_limit_ms,
+            "deadline_hit": context.deadline_hit,
+            "cancelled": context.cancelled,
+            "improvement_curve": context.improvement_curve,
+        }
+    
+    def _prepare_materials_1d(self, materials: List[Material]) -> StockVector:
         """Prepara materiais 1D para processamento"""
-        prepared = []
-        for material in materials:
-            if material.material_type.value in ["bar", "profile"]:
-                for i in range(material.quantity):
-                    prepared.append({
-                        "id": f"{material.id}_{i+1}",
-                        "original_id": material.id,
-                        "name": material.name,
-                        "length": material.length,
-                        "cost": material.cost_per_unit or 0,
-                        "used": False
-                    })
-        return prepared
-    
-    def _prepare_parts_1d(self, parts: List[Part]) -> List[Dict]:
+        return StockVector([m for m in materials if m.material_type.value in ["bar", "profile"]])
+    
+    def _prepare_parts_1d(self, parts: List[Part]) -> DemandVector:
         """Prepara peças 1D para processamento"""
-        prepared = []
-        for part in parts:
-            if part.part_type.value == "linear":
-                for i in range(part.quantity):
-                    prepared.append({
-                        "id": f"{part.id}_{i+1}",
-                        "original_id": part.id,
-                        "name": part.name,
-                        "length": part.length,
-                        "priority": part.priority,
-                        "assigned": False
-                    })
-        return prepared
-    
-    def _prepare_materials_2d(self, materials: List[Material]) -> List[Dict]:
+        return DemandVector([p for p in parts if p.part_type.value == "linear"])
+    
+    def _prepare_materials_2d(self, materials: List[Material]) -> StockVector:
         """Prepara materiais 2D para processamento"""
-        prepared = []
-        for material in materials:
-            if material.material_type.value == "sheet":
-                for i in range(material.quantity):
-                    prepared.append({
-                        "id": f"{material.id}_{i+1}",
-                        "original_id": material.id,
-                        "name": material.name,
-                        "width": material.width,
-                        "height": material.length,
-                        "cost": material.cost_per_unit or 0,
-                        "used": False,
-                        "cuts": []
-                    })
-        return prepared
-    
-    def _prepare_parts_2d(self, parts: List[Part]) -> List[Dict]:
+        return StockVector([m for m in materials if m.material_type.value == "sheet"])
+    
+    def _prepare_parts_2d(self, parts: List[Part]) -> DemandVector:
         """Prepara peças 2D para processamento"""
-        prepared = []
-        for part in parts:
-            if part.part_type.value == "rectangular":
-                for i in range(part.quantity):
-                    prepared.append({
-                        "id": f"{part.id}_{i+1}",
-                        "original_id": part.id,
-                        "name": part.name,
-                        "width": part.width,
-                        "height": part.length,
-                        "priority": part.priority,
-                        "assigned": False
-                    })
-        return prepared
-    
-    def _first_fit_1d(self, materials: List[Dict], parts: List[Dict], kerf_width: float) -> Tuple[List[MaterialCut], List[Leftover]]:
+        return DemandVector([p for p in parts if p.part_type.value == "rectangular"])
+    
+    def _first_fit_1d(self, materials: StockVector, parts: DemandVector, kerf_width: float,
+                      context: Optional[SolveContext] = None) -> Tuple[List[MaterialCut], List[Leftover]]:
         """Algoritmo First Fit para otimização 1D"""
         
         # Ordenar peças por prioridade e tamanho (maior primeiro)
-        parts.sort(key=lambda x: (x["priority"], x["length"]), reverse=True)
+        order = parts.priority_order()
+        
+        bar_stock, bar_runs = first_fit_1d(
+            parts.lengths + kerf_width, parts.counts, order, materials.lengths, materials.counts
+        )
+        return self._build_cuts_1d(materials, parts, bar_stock, bar_runs, kerf_width)
+    
+    def _best_fit_1d(self, materials: StockVector, parts: DemandVector, kerf_width: float,
+                     context: Optional[SolveContext] = None) -> Tuple[List[MaterialCut], List[Leftover]]:
+        """
+        Algoritmo Best Fit para otimização 1D
         
+        Com padrões no cache para os mesmos materiais, kerf e comprimentos,
+        também encaixa a partir deles (`pattern_fit_1d`) e fica com esse plano
+        se ele colocar todas as peças usando menos material. Os padrões do
+        plano escolhido vão para o cache.
+        """
+        context = context or SolveContext()
+        
+        # Ordenar peças por prioridade e tamanho (maior primeiro)
+        order = parts.priority_order()
+        needs = parts.lengths + kerf_width
+        
+        # Encaixe feito apenas sobre comprimentos; objetos criados ao final
+        bar_stock, bar_runs = best_fit_1d(needs, parts.counts, order, materials.lengths, materials.counts)
+        
+        cached = self._cached_patterns(materials, parts, kerf_width)
+        if cached:
+            _, group_of = np.unique(parts.lengths, return_inverse=True)
+            seeded_stock, seeded_runs = pattern_fit_1d(needs, parts.counts, order, materials.lengths,
+                                                       materials.counts, cached, group_of)
+            used = float(np.sum(materials.lengths[bar_stock])) if bar_stock else 0.0
+            seeded = placed_all(seeded_runs, parts.counts) and (
+                not placed_all(bar_runs, parts.counts) or float(np.sum(materials.lengths[seeded_stock])) < used
+            )
+            context.metadata["best_fit"] = {"cached_patterns": len(cached), "seeded": seeded}
+            if seeded:
+                bar_stock, bar_runs = seeded_stock, seeded_runs
+        
+        self._store_patterns(materials, parts, kerf_width, bar_stock, bar_runs)
+        return self._build_cuts_1d(materials, parts, bar_stock, bar_runs, kerf_width)
+    
+    def _build_cuts_1d(self, materials: StockVector, parts: DemandVector, bar_stock: List[int],
+                       bar_runs: List[List[List[int]]], kerf_width: float) -> Tuple[List[MaterialCut], List[Leftover]]:
+        """
+        Monta cortes e retalhos a partir das barras produzidas pelo motor 1D
+        
+        Os identificadores por unidade de peça e de material são gerados aqui,
+        numerados na ordem em que as barras são cortadas.
+        """
         cuts = []
         leftovers = []
         
-        # Criar um dicionário para rastrear materiais disponíveis
-        available_materials = {mat["id"]: mat.copy() for mat in materials}
+        next_part_unit = [0] * len(parts)
+        next_stock_unit = [0] * len(materials)
         
-        for part in parts:
-            if part["assigned"]:
-                continue
-                
-            # Procurar primeiro material que caiba
-            material_found = False
+        for stock, runs in zip(bar_stock, bar_runs):
+            material = materials.materials[stock]
+            length = material.length
+            remaining = length
             
-            # Primeiro, tentar encontrar um material já usado que tenha espaço
-            for cut in cuts:
-                if cut.remaining_length >= part["length"] + kerf_width:
-                    # Adicionar corte neste material
-                    cut_op = CutOperation(
-                        part_id=part["id"],
-                        part_name=part["name"],
-                        position_x=cut.remaining_length - cut.waste,
-                        length=part["length"],
-                        order=len(cut.cuts) + 1
-                    )
-                    cut.cuts.append(cut_op)
-                    
-                    # Atualizar desperdício e comprimento restante
-                    cut.waste -= (part["length"] + kerf_width)
-                    cut.remaining_length = cut.waste
-                    cut.efficiency = ((available_materials[cut.material_id]["length"] - cut.waste) / available_materials[cut.material_id]["length"]) * 100
-                    
-                    part["assigned"] = True
-                    material_found = True
-                    break
+            operations = []
+            for item, count in runs:
+                part = parts.parts[item]
+                for _ in range(count):
+                    operations.append(CutOperation(
+                        part_id=parts.unit_id(item, next_part_unit[item]),
+                        part_name=part.name,
+                        position_x=length - remaining,
+                        length=part.length,
+                        order=len(operations) + 1
+                    ))
+                    next_part_unit[item] += 1
+                    remaining -= part.length + kerf_width
             
-            # Se não encontrou material usado, procurar um novo
-            if not material_found:
-                for material_id, material in available_materials.items():
-                    if material["used"]:
-                        continue
-                        
-                    # Verificar se a peça cabe neste material
-                    if part["length"] + kerf_width <= material["length"]:
-                        # Criar novo corte para este material
-                        material_cut = MaterialCut(
-                            material_id=material["id"],
-                            material_name=material["name"],
-                            cuts=[],
-                            waste=material["length"] - (part["length"] + kerf_width),
-                            efficiency=((part["length"] + kerf_width) / material["length"]) * 100,
-                            remaining_length=material["length"] - (part["length"] + kerf_width)
-                        )
-                        
-                        # Adicionar corte
-                        cut_op = CutOperation(
-                            part_id=part["id"],
-                            part_name=part["name"],
-                            position_x=0,
-                            length=part["length"],
-                            order=1
-                        )
-                        material_cut.cuts.append(cut_op)
-                        
-                        cuts.append(material_cut)
-                        material["used"] = True
-                        part["assigned"] = True
-                        break
+            cuts.append(MaterialCut(
+                material_id=materials.unit_id(stock, next_stock_unit[stock]),
+                material_name=material.name,
+                cuts=operations,
+                waste=remaining,
+                efficiency=((length - remaining) / length) * 100,
+                remaining_length=remaining
+            ))
+            next_stock_unit[stock] += 1
         
         # Processar retalhos
         for cut in cuts:
@@ -307,212 +795,228 @@ class CutPlanner:
         
         return cuts, leftovers
     
-    def _best_fit_1d(self, materials: List[Dict], parts: List[Dict], kerf_width: float) -> Tuple[List[MaterialCut], List[Leftover]]:
-        """Algoritmo Best Fit para otimização 1D"""
+    def _genetic_algorithm_1d(self, materials: StockVector, parts: DemandVector, kerf_width: float,
+                              context: Optional[SolveContext] = None) -> Tuple[List[MaterialCut], List[Leftover]]:
+        """Algoritmo Genético para otimização 1D"""
+        context = context or SolveContext()
         
-        # Ordenar peças por prioridade e tamanho (maior primeiro)
-        parts.sort(key=lambda x: (x["priority"], x["length"]), reverse=True)
+        bar_stock, bar_runs = genetic_1d(
+            parts.lengths + kerf_width, parts.counts, parts.priority_order(),
+            materials.lengths, materials.counts, context,
+            population_size=self.genetic_population_size,
+            time_budget_ms=self.genetic_time_budget_ms
+        )
+        return self._build_cuts_1d(materials, parts, bar_stock, bar_runs, kerf_width)
+    
+    def _column_generation_1d(self, materials: StockVector, parts: DemandVector, kerf_width: float,
+                              context: Optional[SolveContext] = None) -> Tuple[List[MaterialCut], List[Leftover]]:
+        """Geração de colunas (Gilmore-Gomory) com arredondamento para otimização 1D"""
+        context = context or SolveContext()
         
-        cuts = []
-        leftovers = []
+        # Padrões já conhecidos para os mesmos materiais, kerf e comprimentos
+        bar_stock, bar_runs, patterns = column_generation_1d(
+            parts.lengths + kerf_width, parts.counts, parts.priority_order(),
+            materials.lengths, materials.counts, context, self._cached_patterns(materials, parts, kerf_width)
+        )
         
-        # Criar um dicionário para rastrear materiais disponíveis
-        available_materials = {mat["id"]: mat.copy() for mat in materials}
+        if self.pattern_cache is not None:
+            by_stock: Dict[int, List[Tuple[int, ...]]] = {}
+            for stock, pattern in patterns:
+                by_stock.setdefault(stock, []).append(tuple(pattern))
+            for stock, stock_patterns in by_stock.items():
+                key = self.pattern_cache.make_key(materials.lengths[stock], kerf_width, parts.lengths)
+                self.pattern_cache.put(key, stock_patterns)
         
-        for part in parts:
-            if part["assigned"]:
-                continue
-                
-            # Encontrar o melhor material para esta peça
-            best_material_id = None
-            best_waste = float('inf')
-            best_position = 0
-            
-            # Primeiro, tentar encontrar um material já usado que tenha espaço
-            for cut in cuts:
-                if cut.remaining_length >= part["length"] + kerf_width:
-                    waste = cut.remaining_length - (part["length"] + kerf_width)
-                    if waste < best_waste:
-                        best_waste = waste
-                        best_material_id = cut.material_id
-                        # Calcular posição baseada no comprimento usado
-                        used_length = available_materials[cut.material_id]["length"] - cut.remaining_length
-                        best_position = used_length
-            
-            # Se não encontrou material usado, procurar um novo
-            if best_material_id is None:
-                for material_id, material in available_materials.items():
-                    if material["used"]:
-                        continue
-                        
-                    # Calcular desperdício se a peça for colocada neste material
-                    if part["length"] + kerf_width <= material["length"]:
-                        waste = material["length"] - (part["length"] + kerf_width)
-                        if waste < best_waste:
-                            best_waste = waste
-                            best_material_id = material_id
-                            best_position = 0
-            
-            if best_material_id:
-                # Encontrar ou criar o corte do material
-                material_cut = None
-                for cut in cuts:
-                    if cut.material_id == best_material_id:
-                        material_cut = cut
-                        break
-                
-                if not material_cut:
-                    # Criar novo corte para este material
-                    material = available_materials[best_material_id]
-                    material_cut = MaterialCut(
-                        material_id=material["id"],
-                        material_name=material["name"],
-                        cuts=[],
-                        waste=material["length"] - (part["length"] + kerf_width),
-                        efficiency=((part["length"] + kerf_width) / material["length"]) * 100,
-                        remaining_length=material["length"] - (part["length"] + kerf_width)
-                    )
-                    cuts.append(material_cut)
-                    material["used"] = True
-                
-                # Adicionar corte
-                cut_op = CutOperation(
-                    part_id=part["id"],
-                    part_name=part["name"],
-                    position_x=best_position,
-                    length=part["length"],
-                    order=len(material_cut.cuts) + 1
-                )
-                material_cut.cuts.append(cut_op)
-                
-                # Atualizar desperdício e eficiência
-                material_cut.waste = best_waste
-                material_cut.efficiency = ((available_materials[best_material_id]["length"] - best_waste) / available_materials[best_material_id]["length"]) * 100
-                material_cut.remaining_length = best_waste
-                
-                part["assigned"] = True
+        return self._build_cuts_1d(materials, parts, bar_stock, bar_runs, kerf_width)
+    
+    def _cached_patterns(self, materials: StockVector, parts: DemandVector,
+                         kerf_width: float) -> List[Tuple[int, np.ndarray]]:
+        """Padrões do cache para os materiais, kerf e comprimentos: (tipo de material, quantidades)"""
+        patterns: List[Tuple[int, np.ndarray]] = []
+        if self.pattern_cache is None:
+            return patterns
+        for stock, length in enumerate(materials.lengths):
+            key = self.pattern_cache.make_key(length, kerf_width, parts.lengths)
+            for pattern in self.pattern_cache.get(key) or []:
+                patterns.append((stock, np.array(pattern, dtype=np.int64)))
+        return patterns
+    
+    def _store_patterns(self, materials: StockVector, parts: DemandVector, kerf_width: float,
+                        bar_stock: List[int], bar_runs: List[List[List[int]]]) -> None:
+        """Publica no cache os padrões das barras de um plano"""
+        if self.pattern_cache is None or not bar_stock:
+            return
         
-        # Processar retalhos
-        for cut in cuts:
-            if cut.waste > 50:  # Retalhos maiores que 50mm são considerados utilizáveis
-                leftover = Leftover(
-                    length=cut.waste,
-                    material_id=cut.material_id,
-                    usable=True,
-                    area=cut.waste
-                )
-                leftovers.append(leftover)
+        lengths, group_of = np.unique(parts.lengths, return_inverse=True)
+        for stock, stock_patterns in patterns_from_runs(bar_stock, bar_runs, group_of, len(lengths)).items():
+            key = self.pattern_cache.make_key(materials.lengths[stock], kerf_width, lengths)
+            self.pattern_cache.put(key, stock_patterns)
+    
+    def _guillotine_2d(self, materials: StockVector, parts: DemandVector, kerf_width: float,
+                       context: Optional[SolveContext] = None) -> Tuple[List[MaterialCut], List[Leftover]]:
+        """Algoritmo de corte guilhotina (2 ou 3 estágios) para materiais 2D"""
+        context = context or SolveContext()
+        stages = int(context.options.get("guillotine_stages", 3))
         
+        sheet_stock, sheet_items, sheet_free, sheet_cuts = guillotine_2d(
+            parts.widths, parts.lengths, parts.counts, parts.priority_order(parts.lengths * parts.widths),
+            materials.widths, materials.lengths, materials.counts, kerf_width, stages=stages,
+            allowed=self._allowed_orientations(parts, context)
+        )
+        cuts, leftovers = self._build_cuts_2d(materials, parts, sheet_stock, sheet_items, sheet_free, 0.0)
+        
+        # Sequência de cortes da serra por chapa, estágio a estágio
+        context.metadata["guillotine"] = {
+            "stages": stages,
+            "unplaced_parts": parts.total - sum(len(items) for items in sheet_items),
+            "rotated_parts": self._rotated_parts(sheet_items),
+            "cut_sequence": [
+                {
+                    "material_id": cut.material_id,
+                    "cuts": [
+                        {"stage": stage, "orientation": orientation, "position": position,
+                         "start": start, "end": end}
+                        for stage, orientation, position, start, end in sequence
+                    ]
+                }
+                for cut, sequence in zip(cuts, sheet_cuts)
+            ]
+        }
         return cuts, leftovers
     
-    def _genetic_algorithm_1d(self, materials: List[Dict], parts: List[Dict], kerf_width: float) -> Tuple[List[MaterialCut], List[Leftover]]:
-        """Algoritmo Genético para otimização 1D"""
+    def _maxrects_2d(self, materials: StockVector, parts: DemandVector, kerf_width: float,
+                     context: Optional[SolveContext] = None) -> Tuple[List[MaterialCut], List[Leftover]]:
+        """Algoritmo MaxRects para materiais 2D"""
+        context = context or SolveContext()
+        heuristic = context.options.get("maxrects_heuristic", "bssf")
+        heuristic = getattr(heuristic, "value", heuristic)
+        
+        # Peças em ordem de prioridade e área decrescente; kerf somado às duas dimensões
+        order = parts.priority_order(parts.lengths * parts.widths)
+        sheet_stock, sheet_items, sheet_free = maxrects_2d(
+            parts.widths + kerf_width, parts.lengths + kerf_width, parts.counts, order,
+            materials.widths + kerf_width, materials.lengths + kerf_width, materials.counts,
+            heuristic=heuristic, allowed=self._allowed_orientations(parts, context)
+        )
+        context.metadata["maxrects"] = {
+            "heuristic": heuristic,
+            "unplaced_parts": parts.total - sum(len(items) for items in sheet_items),
+            "rotated_parts": self._rotated_parts(sheet_items),
+        }
+        return self._build_cuts_2d(materials, parts, sheet_stock, sheet_items, sheet_free, kerf_width)
+    
+    def _skyline_2d(self, materials: StockVector, parts: DemandVector, kerf_width: float,
+                    context: Optional[SolveContext] = None) -> Tuple[List[MaterialCut], List[Leftover]]:
+        """Algoritmo Skyline (bottom-left) para materiais 2D com muitas peças"""
+        context = context or SolveContext()
         
-        # Implementação simplificada do algoritmo genético
-        # Em produção, seria mais sofisticado
+        widths, heights = parts.widths + kerf_width, parts.lengths + kerf_width
+        sheet_widths, sheet_heights = materials.widths + kerf_width, materials.lengths + kerf_width
+        allowed = self._allowed_orientations(parts, context)
         
-        population_size = 50
-        generations = 100
-        mutation_rate = 0.1
+        # Mais altas primeiro (na orientação preferida) deixam o perfil mais plano
+        table = OrientationTable(widths, heights, allowed, sheet_widths, sheet_heights)
+        preferred = table.preferred()
+        index = np.arange(len(parts))
+        order = parts.priority_order(table.heights[preferred, index] * 1e6 + table.widths[preferred, index])
+        sheet_stock, sheet_items, sheet_free = skyline_2d(
+            widths, heights, parts.counts, order,
+            sheet_widths, sheet_heights, materials.counts, allowed=allowed
+        )
+        context.metadata["skyline"] = {
+            "unplaced_parts": parts.total - sum(len(items) for items in sheet_items),
+            "rotated_parts": self._rotated_parts(sheet_items),
+        }
+        return self._build_cuts_2d(materials, parts, sheet_stock, sheet_items, sheet_free, kerf_width)
+    
+    def _multistart_2d(self, materials: StockVector, parts: DemandVector, kerf_width: float,
+                       context: Optional[SolveContext] = None) -> Tuple[List[MaterialCut], List[Leftover]]:
+        """Várias execuções MaxRects/Skyline em paralelo (ordem x encaixe x semente); fica a melhor"""
+        context = context or SolveContext()
+        runs = int(context.options.get("multistart_runs", 16))
         
-        # Criar população inicial
-        population = []
-        for _ in range(population_size):
-            individual = self._create_random_solution(materials, parts, kerf_width)
-            population.append(individual)
+        (sheet_stock, sheet_items, sheet_free), stats = multistart_2d(
+            parts, materials, parts.widths + kerf_width, parts.lengths + kerf_width,
+            materials.widths + kerf_width, materials.lengths + kerf_width,
+            self._allowed_orientations(parts, context), runs,
+            workers=self.multistart_workers, context=context, pool=self.multistart_pool
+        )
+        stats["unplaced_parts"] = parts.total - sum(len(items) for items in sheet_items)
+        stats["rotated_parts"] = self._rotated_parts(sheet_items)
+        context.metadata["multistart"] = stats
+        return self._build_cuts_2d(materials, parts, sheet_stock, sheet_items, sheet_free, kerf_width)
+    
+    def _allowed_orientations(self, parts: DemandVector, context: SolveContext) -> np.ndarray:
+        """Orientações permitidas por tipo de peça (allow_rotation e direção do veio)"""
+        return allowed_orientations(parts, bool(context.options.get("allow_rotation", True)))
+    
+    def _rotated_parts(self, sheet_items: List[List[Tuple[int, float, float, bool]]]) -> int:
+        """Quantidade de peças colocadas giradas"""
+        return sum(rotated for items in sheet_items for _, _, _, rotated in items)
+    
+    def _build_cuts_2d(self, materials: StockVector, parts: DemandVector, sheet_stock: List[int],
+                       sheet_items: List[List[Tuple[int, float, float, bool]]], sheet_free: List[Tuple[float, ...]],
+                       kerf_width: float) -> Tuple[List[MaterialCut], List[Leftover]]:
+        """
+        Monta cortes e retalhos a partir das chapas produzidas pelo motor 2D
         
-        # Evolução
-        for generation in range(generations):
-            # Avaliar fitness
-            fitness_scores = [self._calculate_fitness(individual) for individual in population]
-            
-            # Seleção e reprodução
-            new_population = []
-            for _ in range(population_size):
-                parent1 = self._tournament_selection(population, fitness_scores)
-                parent2 = self._tournament_selection(population, fitness_scores)
-                child = self._crossover(parent1, parent2)
-                
-                # Mutação
-                if random.random() < mutation_rate:
-                    child = self._mutate(child)
-                
-                new_population.append(child)
-            
-            population = new_population
-        
-        # Retornar melhor solução
-        best_individual = max(population, key=self._calculate_fitness)
-        return self._convert_solution_to_cuts(best_individual, materials, parts, kerf_width)
-    
-    def _create_random_solution(self, materials: List[Dict], parts: List[Dict], kerf_width: float) -> List[Dict]:
-        """Cria uma solução aleatória para o algoritmo genético"""
-        solution = []
-        for part in parts:
-            if not part["assigned"]:
-                material = random.choice([m for m in materials if not m["used"]])
-                solution.append({
-                    "part_id": part["id"],
-                    "material_id": material["id"],
-                    "position": random.randint(0, int(material["length"] - part["length"]))
-                })
-        return solution
-    
-    def _calculate_fitness(self, individual: List[Dict]) -> float:
-        """Calcula o fitness de uma solução"""
-        # Implementação simplificada - em produção seria mais complexa
-        return random.random()
-    
-    def _tournament_selection(self, population: List, fitness_scores: List[float]) -> Dict:
-        """Seleção por torneio"""
-        tournament_size = 3
-        tournament = random.sample(list(enumerate(population)), tournament_size)
-        winner_idx = max(tournament, key=lambda x: fitness_scores[x[0]])[0]
-        return population[winner_idx]
-    
-    def _crossover(self, parent1: List[Dict], parent2: List[Dict]) -> List[Dict]:
-        """Operador de crossover"""
-        # Implementação simplificada
-        return parent1 if random.random() < 0.5 else parent2
-    
-    def _mutate(self, individual: List[Dict]) -> List[Dict]:
-        """Operador de mutação"""
-        # Implementação simplificada
-        return individual
-    
-    def _convert_solution_to_cuts(self, solution: List[Dict], materials: List[Dict], parts: List[Dict], kerf_width: float) -> Tuple[List[MaterialCut], List[Leftover]]:
-        """Converte solução genética para formato de cortes"""
-        # Implementação simplificada - retorna solução básica
-        return self._best_fit_1d(materials, parts, kerf_width)
-    
-    def _guillotine_2d(self, materials: List[Dict], parts: List[Dict], kerf_width: float) -> Tuple[List[MaterialCut], List[Leftover]]:
-        """Algoritmo de corte guilhotina para materiais 2D"""
-        # Implementação simplificada - em produção seria mais complexa
+        position_x corre ao longo da largura da chapa e position_y ao longo do
+        comprimento. Peças giradas saem com rotation=90 e length/width já na
+        orientação colocada. O maior retângulo livre de cada chapa vira o retalho.
+        """
         cuts = []
         leftovers = []
         
-        # Por enquanto, retorna solução básica
-        for material in materials:
-            if not material["used"]:
-                material_cut = MaterialCut(
-                    material_id=material["id"],
-                    material_name=material["name"],
-                    cuts=[],
-                    waste=material["width"] * material["height"],
-                    efficiency=0,
-                    remaining_length=material["height"],
-                    remaining_width=material["width"]
-                )
-                cuts.append(material_cut)
-                material["used"] = True
+        next_part_unit = [0] * len(parts)
+        next_stock_unit = [0] * len(materials)
+        
+        for stock, items, free in zip(sheet_stock, sheet_items, sheet_free):
+            material = materials.materials[stock]
+            area = material.length * material.width
+            
+            operations = []
+            used = 0.0
+            for item, x, y, rotated in items:
+                part = parts.parts[item]
+                operations.append(CutOperation(
+                    part_id=parts.unit_id(item, next_part_unit[item]),
+                    part_name=part.name,
+                    position_x=x,
+                    position_y=y,
+                    length=part.width if rotated else part.length,
+                    width=part.length if rotated else part.width,
+                    rotation=90 if rotated else 0,
+                    order=len(operations) + 1
+                ))
+                next_part_unit[item] += 1
+                used += part.length * part.width
+            
+            material_id = materials.unit_id(stock, next_stock_unit[stock])
+            next_stock_unit[stock] += 1
+            free_width = max(0.0, free[2] - kerf_width)
+            free_length = max(0.0, free[3] - kerf_width)
+            
+            cuts.append(MaterialCut(
+                material_id=material_id,
+                material_name=material.name,
+                cuts=operations,
+                waste=area - used,
+                efficiency=(used / area) * 100,
+                remaining_length=free_length,
+                remaining_width=free_width
+            ))
+            
+            if min(free_length, free_width) > 50:  # Retalhos maiores que 50mm são considerados utilizáveis
+                leftovers.append(Leftover(
+                    length=free_length,
+                    width=free_width,
+                    material_id=material_id,
+                    usable=True,
+                    area=free_length * free_width
+                ))
         
         return cuts, leftovers
     
-    def _maxrects_2d(self, materials: List[Dict], parts: List[Dict], kerf_width: float) -> Tuple[List[MaterialCut], List[Leftover]]:
-        """Algoritmo MaxRects para materiais 2D"""
-        # Implementação simplificada - em produção seria mais complexa
-        return self._guillotine_2d(materials, parts, kerf_width)
-    
     def _generate_execution_order(self, cuts: List[MaterialCut]) -> List[str]:
         """Gera ordem de execução dos cortes"""
         execution_order = []
@@ -0,0 +1,79 @@
+"""
+Representação compacta (por tipo) de peças e materiais
+
+Uma `Part` com quantity=5000 vira uma única entrada com contagem 5000; os
+identificadores por unidade ("peca_1", "peca_2", ...) só são gerados na
+montagem do resultado.
+"""
+
+from typing import List
+
+import numpy as np
+
+from .models import Material, Part
+
+
+class DemandVector:
+    """Demanda de peças: um registro por tipo de peça e a quantidade necessária"""
+
+    def __init__(self, parts: List[Part]):
+        """
+        Args:
+            parts: Peças já filtradas para a dimensão em otimização
+        """
+        self.parts = list(parts)
+        self.lengths = np.array([p.length for p in self.parts], dtype=float)
+        self.widths = np.array([p.width or 0.0 for p in self.parts], dtype=float)
+        self.counts = np.array([p.quantity for p in self.parts], dtype=np.int64)
+        self.priorities = np.array([p.priority for p in self.parts], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.parts)
+
+    @property
+    def total(self) -> int:
+        """Quantidade total de peças"""
+        return int(self.counts.sum())
+
+    def priority_order(self, key: np.ndarray = None) -> np.ndarray:
+        """
+        Ordem de processamento: prioridade e tamanho decrescentes
+
+        A ordenação é estável, então tipos empatados mantêm a ordem da requisição.
+
+        Args:
+            key: Tamanho usado no desempate (padrão: comprimento)
+        """
+        key = self.lengths if key is None else key
+        return np.lexsort((-key, -self.priorities))
+
+    def unit_id(self, item: int, k: int) -> str:
+        """Identificador da k-ésima unidade (base 0) do tipo `item`"""
+        return f"{self.parts[item].id}_{k + 1}"
+
+
+class StockVector:
+    """Estoque de materiais: um registro por material e a quantidade disponível"""
+
+    def __init__(self, materials: List[Material]):
+        """
+        Args:
+            materials: Materiais já filtrados para a dimensão em otimização
+        """
+        self.materials = list(materials)
+        self.lengths = np.array([m.length for m in self.materials], dtype=float)
+        self.widths = np.array([m.width or 0.0 for m in self.materials], dtype=float)
+        self.counts = np.array([m.quantity for m in self.materials], dtype=np.int64)
+        self.costs = np.array([m.cost_per_unit or 0.0 for m in self.materials], dtype=float)
+
+    def __len__(self) -> int:
+        return len(self.materials)
+
+    @property
+    def total(self) -> int:
+        """Quantidade total de unidades em estoque"""
+        return int(self.counts.sum())
+
+    def unit_id(self, stock: int, k: int) -> str:
+        """Identificador da k-ésima unidade (base 0) do material `stock`"""
+        return f"{self.materials[stock].id}_{k + 1}"
@@ -0,0 +1,358 @@
+"""
+Motor numérico 1D para os algoritmos de encaixe em barras
+
+As rotinas deste módulo trabalham apenas com comprimentos, quantidades e
+índices de tipo; os objetos de resultado (MaterialCut, CutOperation) são
+montados uma única vez pelo CutPlanner depois que o encaixe termina.
+
+Cada barra aberta é descrita por uma lista de "runs" (tipo, quantidade) na
+ordem de corte, o que mantém a saída proporcional a barras x tipos de peça
+e não ao total de peças.
+"""
+
+import time
+from bisect import bisect_left, insort
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Runs = List[List[int]]
+
+
+class OpenBars:
+    """
+    Capacidades restantes das barras abertas, mantidas ordenadas
+
+    Cada entrada é a tupla (restante, índice da barra). A ordenação por
+    tupla garante que, entre barras com a mesma sobra, a aberta primeiro
+    seja escolhida - o mesmo desempate da varredura linear original.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def pop_best_fit(self, need: float) -> Tuple[float, int]:
+        """
+        Remove e retorna a barra de menor sobra que comporta `need`
+
+        Returns:
+            Tupla (restante, barra) ou (-1.0, -1) se nenhuma barra comporta
+        """
+        pos = bisect_left(self._keys, (need, -1))
+        if pos == len(self._keys):
+            return -1.0, -1
+        return self._keys.pop(pos)
+
+    def push(self, remaining: float, bar: int) -> None:
+        """Insere (ou reinsere) uma barra com a sobra informada"""
+        insort(self._keys, (remaining, bar))
+
+
+class FreeStock:
+    """Unidades de material ainda fechadas, agrupadas por tipo"""
+
+    def __init__(self, stock_lengths: Sequence[float], stock_counts: Sequence[int]):
+        self.counts = [int(c) for c in stock_counts]
+        self._sorted = sorted(
+            (float(length), s) for s, length in enumerate(stock_lengths) if self.counts[s] > 0
+        )
+
+    def take_best_fit(self, need: float) -> Tuple[float, int]:
+        """Retira uma unidade do menor material que comporta `need`"""
+        pos = bisect_left(self._sorted, (need, -1))
+        if pos == len(self._sorted):
+            return -1.0, -1
+        length, stock = self._sorted[pos]
+        self._take(pos, stock)
+        return length, stock
+
+    def take_first_fit(self, need: float) -> Tuple[float, int]:
+        """Retira uma unidade do primeiro material (ordem de estoque) que comporta `need`"""
+        best = -1
+        for pos, (length, stock) in enumerate(self._sorted):
+            if length >= need and (best < 0 or stock < self._sorted[best][1]):
+                best = pos
+        if best < 0:
+            return -1.0, -1
+        length, stock = self._sorted[best]
+        self._take(best, stock)
+        return length, stock
+
+    def _take(self, pos: int, stock: int) -> None:
+        self.counts[stock] -= 1
+        if self.counts[stock] == 0:
+            self._sorted.pop(pos)
+
+
+def placed_all(runs: Runs, counts: Sequence[int]) -> bool:
+    """Indica se as barras colocaram todas as peças (o plano é completo)"""
+    return sum(count for bar in runs for _, count in bar) == int(np.sum(counts))
+
+
+def _fill(remaining: float, need: float, left: int) -> Tuple[float, int]:
+    """Coloca até `left` peças iguais numa barra; retorna (restante, colocadas)"""
+    placed = 0
+    while placed < left and remaining >= need:
+        remaining -= need
+        placed += 1
+    return remaining, placed
+
+
+def best_fit_1d(needs: Sequence[float], counts: Sequence[int], order: Sequence[int],
+                stock_lengths: Sequence[float], stock_counts: Sequence[int]) -> Tuple[List[int], List[Runs]]:
+    """
+    Best Fit com busca por bisseção nas barras abertas
+
+    Peças iguais são colocadas em bloco: depois que a melhor barra é
+    escolhida ela continua sendo a de menor sobra enquanto a peça couber,
+    então o resultado é idêntico ao encaixe unidade por unidade.
+
+    Args:
+        needs: Comprimento consumido por tipo de peça (peça + kerf)
+        counts: Quantidade por tipo de peça
+        order: Ordem de processamento dos tipos
+        stock_lengths: Comprimento por tipo de material
+        stock_counts: Unidades disponíveis por tipo de material
+
+    Returns:
+        Tupla (bar_stock, bar_runs): para cada barra aberta, o tipo de
+        material usado e os runs (tipo, quantidade) na ordem de corte.
+        Peças que não cabem em nenhum material ficam de fora.
+    """
+    open_bars = OpenBars()
+    free_stock = FreeStock(stock_lengths, stock_counts)
+
+    bar_stock: List[int] = []
+    bar_runs: List[Runs] = []
+
+    for item in order:
+        need = float(needs[item])
+        left = int(counts[item])
+
+        while left > 0:
+            remaining, bar = open_bars.pop_best_fit(need)
+
+            if bar < 0:
+                # Nenhuma barra aberta comporta a peça: abrir o menor material que caiba
+                remaining, stock = free_stock.take_best_fit(need)
+                if stock < 0:
+                    break
+                bar = len(bar_stock)
+                bar_stock.append(stock)
+                bar_runs.append([])
+
+            remaining, placed = _fill(remaining, need, left)
+            bar_runs[bar].append([int(item), placed])
+            open_bars.push(remaining, bar)
+            left -= placed
+
+    return bar_stock, bar_runs
+
+
+def pattern_fit_1d(needs: np.ndarray, counts: np.ndarray, order: Sequence[int], stock_lengths: np.ndarray,
+                   stock_counts: np.ndarray, patterns: Sequence[Tuple[int, np.ndarray]],
+                   group_of: np.ndarray) -> Tuple[List[int], List[Runs]]:
+    """
+    Best Fit precedido de padrões já conhecidos (ex.: do cache de padrões)
+
+    Os padrões são aplicados na ordem da maior peça que contêm (como no
+    best_fit, as maiores primeiro) e, entre os de mesma maior peça, do menor
+    para o maior desperdício, cada um quantas vezes a demanda restante e o
+    estoque permitirem. As peças de um comprimento são distribuídas entre
+    os tipos dele na ordem de processamento; o que sobra vai para o
+    `best_fit_1d`.
+
+    Args:
+        needs, counts, order, stock_lengths, stock_counts: Como em `best_fit_1d`
+        patterns: Pares (tipo de material, quantidade por comprimento distinto)
+        group_of: Índice do comprimento distinto de cada tipo de peça
+
+    Returns:
+        Tupla (bar_stock, bar_runs) no formato de `best_fit_1d`
+    """
+    n_groups = int(group_of.max()) + 1 if len(group_of) else 0
+    group_needs = np.zeros(n_groups)
+    group_needs[group_of] = needs
+    group_types: List[List[int]] = [[] for _ in range(n_groups)]
+    for item in order:
+        group_types[group_of[item]].append(int(item))
+
+    remaining = np.array(counts, dtype=np.int64)
+    group_left = np.bincount(group_of, weights=remaining, minlength=n_groups).astype(np.int64)
+    stock_left = np.array(stock_counts, dtype=np.int64)
+    ranked = sorted(
+        (-float(group_needs[pattern > 0].max()), float(stock_lengths[stock] - pattern @ group_needs), index)
+        for index, (stock, pattern) in enumerate(patterns)
+        if len(pattern) == n_groups and pattern.any() and pattern @ group_needs <= stock_lengths[stock] + 1e-9
+    )
+
+    bar_stock: List[int] = []
+    bar_runs: List[Runs] = []
+    for _, _, index in ranked:
+        stock, pattern = patterns[index]
+        used = np.flatnonzero(pattern)
+        repeats = min(int(stock_left[stock]), int((group_left[used] // pattern[used]).min()))
+        for _ in range(repeats):
+            runs: Runs = []
+            # Maior comprimento primeiro, como no best_fit
+            for group in used[np.argsort(-group_needs[used], kind="stable")]:
+                take = int(pattern[group])
+                for item in group_types[group]:
+                    placed = min(take, int(remaining[item]))
+                    if placed:
+                        runs.append([item, placed])
+                        remaining[item] -= placed
+                        take -= placed
+                    if not take:
+                        break
+            bar_stock.append(int(stock))
+            bar_runs.append(runs)
+        group_left[used] -= repeats * pattern[used]
+        stock_left[stock] -= repeats
+
+    rest_stock, rest_runs = best_fit_1d(needs, remaining, order, stock_lengths, stock_left)
+    return bar_stock + rest_stock, bar_runs + rest_runs
+
+
+def first_fit_1d(needs: Sequence[float], counts: Sequence[int], order: Sequence[int],
+                 stock_lengths: Sequence[float], stock_counts: Sequence[int]) -> Tuple[List[int], List[Runs]]:
+    """
+    First Fit sobre um array de capacidades das barras abertas
+
+    Mesma interface de `best_fit_1d`; a barra escolhida é a primeira aberta
+    que comporta a peça e, quando é preciso abrir uma nova, o primeiro
+    material do estoque em que ela cabe.
+    """
+    free_stock = FreeStock(stock_lengths, stock_counts)
+    capacity = np.empty(64, dtype=float)
+    n_open = 0
+
+    bar_stock: List[int] = []
+    bar_runs: List[Runs] = []
+
+    for item in order:
+        need = float(needs[item])
+        left = int(counts[item])
+
+        while left > 0:
+            fits = capacity[:n_open] >= need
+            bar = int(np.argmax(fits)) if n_open else 0
+            if n_open == 0 or not fits[bar]:
+                length, stock = free_stock.take_first_fit(need)
+                if stock < 0:
+                    break
+                bar = n_open
+                if bar == len(capacity):
+                    capacity = np.resize(capacity, 2 * len(capacity))
+                capacity[bar] = length
+                n_open += 1
+                bar_stock.append(stock)
+                bar_runs.append([])
+
+            remaining, placed = _fill(float(capacity[bar]), need, left)
+            capacity[bar] = remaining
+            bar_runs[bar].append([int(item), placed])
+            left -= placed
+
+    return bar_stock, bar_runs
+
+
+
+def decode_population(chromosomes: np.ndarray, needs: np.ndarray, stock_lengths: np.ndarray,
+                      stock_counts: np.ndarray, max_bars: int, deadline: Optional[float] = None,
+                      stock_genes: Optional[np.ndarray] = None) -> Optional[Tuple[np.ndarray, ...]]:
+    """
+    Decodifica uma população inteira de sequências com Best Fit, em lote
+
+    Cada linha de `chromosomes` é uma sequência de tipos de peça; todas as
+    linhas são encaixadas ao mesmo tempo, uma posição por passo, com as
+    operações vetorizadas sobre (indivíduos x barras abertas). Quando
+    nenhuma barra aberta comporta a peça, a k-ésima barra aberta pelo
+    indivíduo usa o material do seu k-ésimo gene de estoque, se ele couber
+    e houver unidades; senão (ou com gene -1), o menor material que caiba.
+    Decodificar a sequência na ordem de prioridade sem genes de estoque
+    reproduz `best_fit_1d`.
+
+    Args:
+        chromosomes: Matriz (indivíduos, peças) de índices de tipo
+        needs: Comprimento consumido por tipo de peça (peça + kerf)
+        stock_lengths: Comprimento por tipo de material
+        stock_counts: Unidades disponíveis por tipo de material
+        max_bars: Limite de barras por indivíduo
+        deadline: Instante (time.perf_counter) a partir do qual a decodificação é abandonada
+        stock_genes: Matriz (indivíduos, max_bars) de tipos de material preferidos
+            por barra aberta (-1 = menor que caiba); None = todos -1
+
+    Returns:
+        Tupla (assign, bar_stock, capacity, remaining, unplaced): barra de
+        cada posição (-1 se a peça ficou de fora), tipo de material,
+        comprimento e sobra de cada barra aberta (0 nas não abertas) e
+        quantidade de peças não colocadas por indivíduo. None se o prazo
+        terminou antes do fim da decodificação.
+    """
+    pop, n = chromosomes.shape
+    rows = np.arange(pop)
+
+    remaining = np.full((pop, max_bars), -np.inf)
+    capacity = np.zeros((pop, max_bars))
+    bar_stock = np.full((pop, max_bars), -1, dtype=np.int64)
+    n_open = np.zeros(pop, dtype=np.int64)
+    assign = np.full((pop, n), -1, dtype=np.int64)
+    unplaced = np.zeros(pop, dtype=np.int64)
+
+    # Materiais em ordem crescente de comprimento (empate: ordem de estoque)
+    stock_order = np.argsort(stock_lengths, kind="stable")
+    sorted_lengths = np.asarray(stock_lengths, dtype=float)[stock_order]
+    stock_left = np.tile(np.asarray(stock_counts, dtype=np.int64)[stock_order], (pop, 1))
+    if stock_genes is not None:
+        # Genes convertidos para a posição do material na ordem crescente (-1 mantido)
+        stock_rank = np.empty(len(stock_order), dtype=np.int64)
+        stock_rank[stock_order] = np.arange(len(stock_order))
+        preferred = np.where(stock_genes >= 0, stock_rank[np.maximum(stock_genes, 0)], -1)
+
+    width = 0
+    for t in range(n):
+        if deadline is not None and t % 64 == 0 and time.perf_counter() > deadline:
+            return None
+
+        need = needs[chromosomes[:, t]]
+
+        if width:
+            slack = remaining[:, :width] - need[:, None]
+            slack[slack < 0] = np.inf
+            bar = np.argmin(slack, axis=1)
+            placed = np.isfinite(slack[rows, bar])
+        else:
+            bar = np.zeros(pop, dtype=np.int64)
+            placed = np.zeros(pop, dtype=bool)
+
+        opening = np.flatnonzero(~placed)
+        if len(opening):
+            fits = (sorted_lengths[None, :] >= need[opening, None]) & (stock_left[opening] > 0)
+            first = np.argmax(fits, axis=1)
+            ok = fits[np.arange(len(opening)), first] & (n_open[opening] < max_bars)
+            if stock_genes is not None:
+                gene = preferred[opening, np.minimum(n_open[opening], max_bars - 1)]
+                usable = (gene >= 0) & fits[np.arange(len(opening)), np.maximum(gene, 0)]
+                first = np.where(usable, gene, first)
+            unplaced[opening[~ok]] += 1
+
+            opening, first = opening[ok], first[ok]
+            new_bar = n_open[opening]
+            remaining[opening, new_bar] = sorted_lengths[first]
+            capacity[opening, new_bar] = sorted_lengths[first]
+            bar_stock[opening, new_bar] = stock_order[first]
+            stock_left[opening, first] -= 1
+            n_open[opening] += 1
+            bar[opening] = new_bar
+            placed[opening] = True
+            width = int(n_open.max())
+
+        remaining[rows[placed], bar[placed]] -= need[placed]
+        assign[placed, t] = bar[placed]
+
+    remaining[capacity == 0] = 0.0
+    return assign, bar_stock, capacity, remaining, unplaced
@@ -0,0 +1,404 @@
+"""
+Motores de encaixe 2D (MaxRects e Skyline) sobre arrays NumPy
+
+Coordenadas: x ao longo da largura da chapa e y ao longo do comprimento.
+Os tamanhos recebidos já incluem o kerf (peça e chapa acrescidas de um kerf
+em cada dimensão), então peças adjacentes ficam separadas por um corte e a
+última peça pode encostar na borda da chapa.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .orientation import OrientationTable
+
+_EPS = 1e-9
+
+HEURISTICS = ("bssf", "baf", "bl")
+
+# (tipo de peça, x, y, girada) de cada peça colocada numa chapa
+Placement = Tuple[int, float, float, bool]
+
+
+class Pruned(Exception):
+    """Encaixe abandonado: precisaria de mais chapas que a melhor solução conhecida"""
+
+
+def _check_bound(sheet_bound: Optional[np.ndarray], opened: int) -> None:
+    """Abandona o encaixe se abrir mais uma chapa já excede o limite compartilhado"""
+    if sheet_bound is not None and opened >= sheet_bound[0]:
+        raise Pruned()
+
+
+class FreeRects:
+    """
+    Retângulos livres maximais de uma chapa, em colunas (x, y, w, h)
+
+    A cada colocação, só os retângulos que intersectam a peça são divididos,
+    e só os retângulos novos são testados quanto à contenção: pelo invariante
+    de maximalidade, um retângulo antigo nunca está contido num novo. Com
+    isso cada colocação custa O(n) operações vetorizadas em vez de O(n²).
+    """
+
+    def __init__(self, width: float, height: float):
+        self.rects = np.array([[0.0], [0.0], [width], [height]])
+
+    def __len__(self) -> int:
+        return self.rects.shape[1]
+
+    @property
+    def max_w(self) -> float:
+        return float(self.rects[2].max()) if len(self) else 0.0
+
+    @property
+    def max_h(self) -> float:
+        return float(self.rects[3].max()) if len(self) else 0.0
+
+    def find(self, ws: np.ndarray, hs: np.ndarray, heuristic: str) -> Optional[Tuple[float, float, int, int]]:
+        """
+        Melhor retângulo livre para uma peça, avaliando todas as orientações de uma vez
+
+        Args:
+            ws, hs: Largura e altura da peça em cada orientação candidata
+
+        Returns:
+            Tupla (critério principal, desempate, índice, orientação escolhida)
+            ou None se não couber
+        """
+        x, y, fw, fh = self.rects
+        option, candidates = np.nonzero((fw >= ws[:, None] - _EPS) & (fh >= hs[:, None] - _EPS))
+        if len(candidates) == 0:
+            return None
+
+        w, h = ws[option], hs[option]
+        lw = fw[candidates] - w
+        lh = fh[candidates] - h
+        if heuristic == "bssf":
+            primary, secondary = np.minimum(lw, lh), np.maximum(lw, lh)
+        elif heuristic == "baf":
+            primary, secondary = fw[candidates] * fh[candidates] - w * h, np.minimum(lw, lh)
+        else:
+            primary, secondary = y[candidates] + h, x[candidates]
+
+        ties = np.flatnonzero(primary <= primary.min() + _EPS)
+        best = ties[np.argmin(secondary[ties])]
+        return float(primary[best]), float(secondary[best]), int(candidates[best]), int(option[best])
+
+    def place(self, px: float, py: float, pw: float, ph: float) -> None:
+        """Ocupa o retângulo (px, py, pw, ph), dividindo os livres que ele intersecta"""
+        x, y, w, h = self.rects
+        hit = (x < px + pw - _EPS) & (x + w > px + _EPS) & (y < py + ph - _EPS) & (y + h > py + _EPS)
+        if not hit.any():
+            return
+
+        hx, hy, hw, hh = self.rects[:, hit]
+        right, top = px + pw, py + ph
+        children = np.concatenate((
+            [hx, hy, px - hx, hh],                    # à esquerda da peça
+            [np.full_like(hx, right), hy, hx + hw - right, hh],  # à direita
+            [hx, hy, hw, py - hy],                    # abaixo
+            [hx, np.full_like(hy, top), hw, hy + hh - top],      # acima
+        ), axis=1)
+        cw, ch = children[2], children[3]
+        children = children[:, (cw > _EPS) & (ch > _EPS)]
+        kept = self.rects[:, ~hit]
+
+        if children.shape[1]:
+            cx, cy, cw, ch = children[:, :, None]
+            # Contido em algum retângulo antigo: só os que tocam a região dividida
+            x0, y0 = hx.min(), hy.min()
+            x1, y1 = (hx + hw).max(), (hy + hh).max()
+            near = kept[:, (kept[0] < x1) & (kept[0] + kept[2] > x0) & (kept[1] < y1) & (kept[1] + kept[3] > y0)]
+            ox, oy, ow, oh = near[:, None, :]
+            inside_old = ((cx >= ox - _EPS) & (cy >= oy - _EPS) &
+                          (cx + cw <= ox + ow + _EPS) & (cy + ch <= oy + oh + _EPS)).any(axis=1)
+            # Contido em outro retângulo novo (iguais: fica o de menor índice)
+            nx, ny, nw, nh = children[:, None, :]
+            inside = ((cx >= nx - _EPS) & (cy >= ny - _EPS) &
+                      (cx + cw <= nx + nw + _EPS) & (cy + ch <= ny + nh + _EPS))
+            np.fill_diagonal(inside, False)
+            same = inside & inside.T
+            inside &= ~np.triu(same)
+            children = children[:, ~inside_old & ~inside.any(axis=1)]
+
+        self.rects = np.concatenate((kept, children), axis=1)
+
+    def largest(self) -> Tuple[float, float, float, float]:
+        """Maior retângulo livre (x, y, w, h), ou zeros se a chapa está cheia"""
+        if not len(self):
+            return 0.0, 0.0, 0.0, 0.0
+        i = int(np.argmax(self.rects[2] * self.rects[3]))
+        return tuple(float(v) for v in self.rects[:, i])
+
+
+def maxrects_2d(widths: np.ndarray, heights: np.ndarray, counts: np.ndarray, order: np.ndarray,
+                sheet_widths: np.ndarray, sheet_heights: np.ndarray, sheet_counts: np.ndarray,
+                heuristic: str = "bssf", allowed: Optional[np.ndarray] = None,
+                sheet_bound: Optional[np.ndarray] = None
+                ) -> Tuple[List[int], List[List[Placement]], List[Tuple[float, ...]]]:
+    """
+    Encaixa as peças em chapas com MaxRects
+
+    Cada peça vai para o melhor retângulo livre entre todas as chapas abertas
+    e orientações permitidas (BSSF e BAF) ou para a primeira chapa onde fica
+    mais embaixo (BL). Se nenhuma chapa aberta comporta a peça, abre-se a
+    menor chapa disponível em que ela cabe; peças sem chapa possível ficam
+    de fora.
+
+    Args:
+        widths, heights: Dimensões por tipo de peça (já com kerf)
+        counts: Quantidade por tipo de peça
+        order: Ordem de processamento dos tipos
+        sheet_widths, sheet_heights: Dimensões por tipo de chapa (já com kerf)
+        sheet_counts: Unidades disponíveis por tipo de chapa
+        heuristic: "bssf" (best short side fit), "baf" (best area fit) ou "bl" (bottom-left)
+        allowed: Orientações permitidas (2, n), ver `allowed_orientations` (padrão: sem rotação)
+        sheet_bound: Array de um elemento, possivelmente compartilhado entre
+            processos, com o número de chapas da melhor solução conhecida
+
+    Returns:
+        Tupla (sheet_stock, sheet_items, sheet_free): tipo de cada chapa aberta,
+        peças colocadas nela e o maior retângulo livre que restou
+
+    Raises:
+        Pruned: Se for preciso abrir mais chapas que `sheet_bound`
+    """
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Heurística MaxRects desconhecida: {heuristic}")
+
+    table = _table(widths, heights, allowed, sheet_widths, sheet_heights)
+    stock_left = np.asarray(sheet_counts, dtype=np.int64).copy()
+    sheet_areas = sheet_widths * sheet_heights
+    sheets: List[FreeRects] = []
+    sheet_stock: List[int] = []
+    sheet_items: List[List[Placement]] = []
+    max_w = np.zeros(0)
+    max_h = np.zeros(0)
+    # rejected[s, o, i]: o espaço livre só diminui, então uma peça que já não
+    # coube na chapa s nunca mais cabe, nem qualquer peça maior que ela
+    rejected = np.zeros((0,) + table.widths.shape, dtype=bool)
+
+    sequence = [int(item) for item in order for _ in range(int(counts[item]))]
+    for item in sequence:
+        orients = table.options[item]
+        if not orients:
+            continue
+        ws, hs = table.widths[orients, item], table.heights[orients, item]
+
+        best = None
+        open_fit = ((max_w[:, None] >= ws - _EPS) & (max_h[:, None] >= hs - _EPS) & ~rejected[:, orients, item])
+        for s in np.flatnonzero(open_fit.any(axis=1)):
+            found = sheets[s].find(ws, hs, heuristic)
+            if found is None:
+                for w, h in zip(ws, hs):
+                    rejected[s] |= (table.widths >= w - _EPS) & (table.heights >= h - _EPS)
+                continue
+            # BL: primeira chapa onde cabe; as demais pela pontuação
+            key = (int(s),) + found[:2] if heuristic == "bl" else found[:2]
+            if best is None or key < best[0]:
+                best = (key, found[2], int(s), found[3])
+            if heuristic == "bl":
+                break
+
+        if best is None:
+            fits = np.flatnonzero((stock_left > 0) & table.fits[:, item, :].any(axis=0))
+            if len(fits) == 0:
+                continue
+            _check_bound(sheet_bound, len(sheets))
+            stock = int(fits[np.argmin(sheet_areas[fits])])
+            stock_left[stock] -= 1
+            sheets.append(FreeRects(float(sheet_widths[stock]), float(sheet_heights[stock])))
+            sheet_stock.append(stock)
+            sheet_items.append([])
+            max_w = np.append(max_w, sheet_widths[stock])
+            max_h = np.append(max_h, sheet_heights[stock])
+            rejected = np.concatenate((rejected, np.zeros((1,) + table.widths.shape, dtype=bool)))
+            s = len(sheets) - 1
+            found = sheets[s].find(ws, hs, heuristic)
+            best = (found[:2], found[2], s, found[3])
+
+        _, index, s, k = best
+        free = sheets[s]
+        fx, fy = float(free.rects[0, index]), float(free.rects[1, index])
+        free.place(fx, fy, float(ws[k]), float(hs[k]))
+        sheet_items[s].append((item, fx, fy, bool(orients[k])))
+        max_w[s], max_h[s] = free.max_w, free.max_h
+
+    return sheet_stock, sheet_items, [free.largest() for free in sheets]
+
+
+class Skyline:
+    """
+    Perfil superior ocupado de uma chapa, em segmentos (x, largura, altura)
+
+    Os segmentos cobrem a largura inteira, ordenados por x, e segmentos
+    vizinhos de mesma altura são fundidos, então o perfil tem poucas dezenas
+    de segmentos mesmo com milhares de peças. Todas as posições de uma peça
+    são avaliadas de uma vez, com busca binária pelo fim de cada vão e
+    máximo por intervalo via `np.maximum.reduceat`.
+    """
+
+    def __init__(self, width: float, height: float):
+        self.width = width
+        self.height = height
+        self.x = np.array([0.0])
+        self.w = np.array([width])
+        self.y = np.array([0.0])
+        self.floor = 0.0
+        # Menor peça que já não coube: o perfil só sobe, então peças maiores também não cabem
+        self._rejected = (np.inf, np.inf)
+
+    @property
+    def top(self) -> float:
+        """Altura máxima ocupada"""
+        return float(self.y.max())
+
+    def find(self, w: float, h: float) -> Optional[Tuple[float, int, int]]:
+        """
+        Posição mais baixa (e mais à esquerda) para uma peça w x h
+
+        Returns:
+            Tupla (y, primeiro segmento, segmento após o último coberto) ou None
+        """
+        if self.floor + h > self.height + _EPS or (w >= self._rejected[0] and h >= self._rejected[1]):
+            return None
+        n = len(self.x)
+        ends = self.x + w
+        last = np.searchsorted(self.x, ends - _EPS, side="left")
+        bounds = np.empty(2 * n, dtype=np.int64)
+        bounds[0::2] = np.arange(n)
+        bounds[1::2] = last
+        base = np.maximum.reduceat(np.append(self.y, 0.0), bounds)[0::2]
+
+        fits = np.flatnonzero((ends <= self.width + _EPS) & (base + h <= self.height + _EPS))
+        if len(fits) == 0:
+            if w * h < self._rejected[0] * self._rejected[1]:
+                self._rejected = (w, h)
+            return None
+        i = int(fits[np.argmin(base[fits])])
+        return float(base[i]), i, int(last[i])
+
+    def place(self, w: float, h: float, y: float, first: int, last: int) -> float:
+        """Eleva o perfil sob a peça colocada no segmento `first` e retorna o x dela"""
+        x = float(self.x[first])
+        end = x + w
+        top = y + h
+        seg_end = float(self.x[last - 1] + self.w[last - 1])
+
+        # Novo segmento, fundido com vizinhos de mesma altura
+        left, right = first, last
+        new_x, new_w = x, w
+        if first > 0 and abs(self.y[first - 1] - top) < _EPS:
+            left -= 1
+            new_x = float(self.x[left])
+            new_w += float(self.w[left])
+        xs, ws, ys = [new_x], [new_w], [top]
+        if seg_end > end + _EPS:
+            # Sobra do último segmento coberto
+            xs.append(end)
+            ws.append(seg_end - end)
+            ys.append(float(self.y[last - 1]))
+        elif last < len(self.x) and abs(self.y[last] - top) < _EPS:
+            ws[0] += float(self.w[last])
+            right += 1
+
+        self.x = np.concatenate((self.x[:left], xs, self.x[right:]))
+        self.w = np.concatenate((self.w[:left], ws, self.w[right:]))
+        self.y = np.concatenate((self.y[:left], ys, self.y[right:]))
+        self.floor = float(self.y.min())
+        return x
+
+
+def skyline_2d(widths: np.ndarray, heights: np.ndarray, counts: np.ndarray, order: np.ndarray,
+               sheet_widths: np.ndarray, sheet_heights: np.ndarray, sheet_counts: np.ndarray,
+               open_sheets: int = 4, allowed: Optional[np.ndarray] = None,
+               sheet_bound: Optional[np.ndarray] = None
+               ) -> Tuple[List[int], List[List[Placement]], List[Tuple[float, ...]]]:
+    """
+    Encaixa as peças em chapas com Skyline bottom-left
+
+    Mantém até `open_sheets` chapas abertas e coloca cada peça na primeira
+    delas onde ela cabe, na posição mais baixa do perfil; quando nenhuma
+    comporta a peça, a chapa aberta mais antiga é fechada e abre-se a menor
+    chapa disponível em que ela cabe. O espaço sob o perfil não é
+    reaproveitado: é o preço da velocidade em relação ao MaxRects.
+
+    Peças giráveis usam a orientação de menor altura e só tentam a outra
+    quando a preferida não cabe em nenhuma chapa aberta, antes de abrir uma
+    nova; assim a rotação quase não acrescenta buscas.
+
+    Args:
+        widths, heights: Dimensões por tipo de peça (já com kerf)
+        counts: Quantidade por tipo de peça
+        order: Ordem de processamento dos tipos
+        sheet_widths, sheet_heights: Dimensões por tipo de chapa (já com kerf)
+        sheet_counts: Unidades disponíveis por tipo de chapa
+        open_sheets: Máximo de chapas abertas simultaneamente
+        allowed: Orientações permitidas (2, n), ver `allowed_orientations` (padrão: sem rotação)
+        sheet_bound: Limite de chapas, como em `maxrects_2d`
+
+    Returns:
+        Tupla (sheet_stock, sheet_items, sheet_free) no formato de `maxrects_2d`;
+        o retângulo livre é a faixa acima do perfil
+    """
+    table = _table(widths, heights, allowed, sheet_widths, sheet_heights)
+    stock_left = np.asarray(sheet_counts, dtype=np.int64).copy()
+    sheet_areas = sheet_widths * sheet_heights
+    skylines: List[Skyline] = []
+    sheet_stock: List[int] = []
+    sheet_items: List[List[Placement]] = []
+    active: List[int] = []
+
+    choices = _choices(table)
+    for item in order:
+        item = int(item)
+        options = choices[item]
+        for _ in range(int(counts[item])):
+            target = None
+            for o, w, h in options:
+                for s in active:
+                    found = skylines[s].find(w, h)
+                    if found is not None:
+                        target = (s, o, w, h, found)
+                        break
+                if target is not None:
+                    break
+
+            if target is None:
+                fits = np.flatnonzero((stock_left > 0) & table.fits[:, item, :].any(axis=0))
+                if len(fits) == 0:
+                    break
+                _check_bound(sheet_bound, len(skylines))
+                stock = int(fits[np.argmin(sheet_areas[fits])])
+                stock_left[stock] -= 1
+                skylines.append(Skyline(float(sheet_widths[stock]), float(sheet_heights[stock])))
+                sheet_stock.append(stock)
+                sheet_items.append([])
+                active.append(len(skylines) - 1)
+                if len(active) > open_sheets:
+                    active.pop(0)
+                o, w, h = next(option for option in options if table.fits[option[0], item, stock])
+                target = (active[-1], o, w, h, skylines[-1].find(w, h))
+
+            s, o, w, h, (y, first, last) = target
+            x = skylines[s].place(w, h, y, first, last)
+            sheet_items[s].append((item, x, y, bool(o)))
+
+    sheet_free = [(0.0, sky.top, sky.width, sky.height - sky.top) for sky in skylines]
+    return sheet_stock, sheet_items, sheet_free
+
+
+def _table(widths: np.ndarray, heights: np.ndarray, allowed: Optional[np.ndarray],
+           sheet_widths: np.ndarray, sheet_heights: np.ndarray) -> OrientationTable:
+    """Tabela de orientações; sem `allowed`, só a orientação original"""
+    if allowed is None:
+        allowed = np.zeros((2, len(widths)), dtype=bool)
+        allowed[0] = True
+    return OrientationTable(widths, heights, allowed, sheet_widths, sheet_heights)
+
+
+def _choices(table: OrientationTable) -> List[List[Tuple[int, float, float]]]:
+    """(orientação, largura, altura) de cada orientação útil, por tipo de peça"""
+    return [[(o, float(table.widths[o, i]), float(table.heights[o, i])) for o in options]
+            for i, options in enumerate(table.options)]
@@ -0,0 +1,232 @@
+"""
+Algoritmo genético para otimização 1D
+
+Cada indivíduo é uma sequência de tipos de peça (uma posição por peça)
+decodificada com Best Fit e, com mais de um material, um gene de estoque por
+barra aberta: o material a abrir quando nenhuma barra comporta a peça (-1 =
+o menor que caiba, como no best_fit). A população inteira é avaliada de uma
+só vez por `decode_population`, e o indivíduo inicial é a própria ordem de
+prioridade sem genes de estoque, de modo que o resultado nunca é pior que o
+best_fit.
+"""
+
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from .context import SolveContext
+from .engine_1d import Runs, best_fit_1d, decode_population, placed_all
+
+
+def _rank(capacity: np.ndarray, remaining: np.ndarray, unplaced: np.ndarray) -> np.ndarray:
+    """
+    Classifica a população (0 = melhor)
+
+    Critérios, em ordem: peças não colocadas, comprimento total de material
+    aberto e, como desempate, a soma dos quadrados do aproveitamento das
+    barras (favorece barras cheias e sobras concentradas).
+    """
+    used = capacity.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fill = np.where(capacity > 0, (capacity - remaining) / capacity, 0.0)
+    concentration = (fill ** 2).sum(axis=1)
+
+    order = np.lexsort((-concentration, used, unplaced))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+    return ranks
+
+
+def _crossover(parent1: np.ndarray, parent2: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Order crossover (OX) para sequências com repetição
+
+    Copia um trecho do primeiro pai e completa com as peças restantes na
+    ordem em que aparecem no segundo.
+    """
+    n = len(parent1)
+    a, b = np.sort(rng.integers(0, n + 1, size=2))
+    segment = parent1[a:b]
+
+    # Posição de cada elemento entre os de mesmo tipo no segundo pai
+    idx = np.argsort(parent2, kind="stable")
+    sorted_types = parent2[idx]
+    occurrence = np.empty(n, dtype=np.int64)
+    occurrence[idx] = np.arange(n) - np.searchsorted(sorted_types, sorted_types, side="left")
+
+    taken = np.bincount(segment, minlength=int(parent2.max()) + 1)
+    rest = parent2[occurrence >= taken[parent2]]
+    return np.concatenate((rest[:a], segment, rest[a:]))
+
+
+def _mutate(individual: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Troca de posições, inversão ou deslocamento de um trecho"""
+    n = len(individual)
+    if n < 2:
+        return individual
+    child = individual.copy()
+    i, j = np.sort(rng.choice(n, size=2, replace=False))
+    move = rng.integers(3)
+    if move == 0:
+        child[i], child[j] = child[j], child[i]
+    elif move == 1:
+        child[i:j + 1] = child[i:j + 1][::-1]
+    else:
+        segment = child[i:j + 1]
+        rest = np.concatenate((child[:i], child[j + 1:]))
+        k = rng.integers(len(rest) + 1)
+        child = np.concatenate((rest[:k], segment, rest[k:]))
+    return child
+
+
+def _crossover_stock(genes1: np.ndarray, genes2: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Crossover de um ponto dos genes de estoque"""
+    cut = rng.integers(0, len(genes1) + 1)
+    return np.concatenate((genes1[:cut], genes2[cut:]))
+
+
+def _mutate_stock(genes: np.ndarray, n_stock: int, rng: np.random.Generator) -> np.ndarray:
+    """Troca o material de até 3 barras (ou volta ao menor que caiba)"""
+    child = genes.copy()
+    positions = rng.integers(0, len(child), size=rng.integers(1, 4))
+    child[positions] = rng.integers(-1, n_stock, size=len(positions))
+    return child
+
+
+def _to_runs(sequence: np.ndarray, assign: np.ndarray, bar_stock: np.ndarray) -> Tuple[List[int], List[Runs]]:
+    """Converte a decodificação de um indivíduo no formato de barras do motor 1D"""
+    n_bars = int((bar_stock >= 0).sum())
+    bar_runs: List[Runs] = [[] for _ in range(n_bars)]
+    for item, bar in zip(sequence.tolist(), assign.tolist()):
+        if bar < 0:
+            continue
+        runs = bar_runs[bar]
+        if runs and runs[-1][0] == item:
+            runs[-1][1] += 1
+        else:
+            runs.append([item, 1])
+    return bar_stock[:n_bars].tolist(), bar_runs
+
+
+def genetic_1d(needs: np.ndarray, counts: np.ndarray, order: np.ndarray, stock_lengths: np.ndarray,
+               stock_counts: np.ndarray, context: SolveContext, population_size: int = 40,
+               mutation_rate: float = 0.4, elite: int = 2, time_budget_ms: float = 2000) -> Tuple[List[int], List[Runs]]:
+    """
+    Evolui sequências de corte e retorna a melhor encontrada
+
+    O número de gerações é `context.max_iterations`, limitado pelo
+    orçamento de tempo e pelo prazo do contexto. Se nem a primeira geração
+    couber no tempo, o resultado é o do best_fit. A evolução para quando a
+    melhor solução atinge o limite inferior do contexto.
+
+    Args:
+        needs: Comprimento consumido por tipo de peça (peça + kerf)
+        counts: Quantidade por tipo de peça
+        order: Ordem de prioridade dos tipos (semente da população)
+        stock_lengths: Comprimento por tipo de material
+        stock_counts: Unidades disponíveis por tipo de material
+        context: Contexto da execução (iterações, gerador aleatório, metadados)
+        population_size: Tamanho da população
+        mutation_rate: Probabilidade de mutação de cada filho
+        elite: Indivíduos preservados sem alteração a cada geração
+        time_budget_ms: Tempo máximo de evolução
+
+    Returns:
+        Tupla (bar_stock, bar_runs) no formato de `best_fit_1d`
+    """
+    deadline = context.deadline_within(time_budget_ms)
+    rng = context.rng
+
+    # Best Fit na ordem de prioridade: resposta garantida mesmo sem tempo para evoluir
+    bars, runs = best_fit_1d(needs, counts, order, stock_lengths, stock_counts)
+    context.record(float(np.sum(stock_lengths[bars])), len(bars), 0, lambda: (bars, runs),
+                   complete=placed_all(runs, counts))
+    baseline = np.repeat(np.asarray(order, dtype=np.int64), counts[order])
+    if len(baseline) == 0:
+        return bars, runs
+
+    baseline_bars = len(bars)
+    max_bars = max(1, min(int(np.sum(stock_counts)), baseline_bars + baseline_bars // 4 + 5))
+
+    # Genes de estoque só fazem diferença com mais de um material disponível
+    n_stock = len(stock_lengths)
+    choose_stock = int(np.count_nonzero(stock_counts)) > 1
+    no_preference = np.full(max_bars, -1, dtype=np.int64)
+
+    # População inicial: a ordem de prioridade e variações dela; com genes de
+    # estoque, também cada material preferido em todas as barras
+    population = [baseline]
+    genes = [no_preference]
+    if choose_stock:
+        for stock in np.flatnonzero(stock_counts)[:population_size - 1]:
+            population.append(baseline)
+            genes.append(np.full(max_bars, stock, dtype=np.int64))
+    while len(population) < population_size:
+        child = baseline
+        for _ in range(rng.integers(1, 6)):
+            child = _mutate(child, rng)
+        population.append(child)
+        genes.append(_mutate_stock(no_preference, n_stock, rng) if choose_stock else no_preference)
+    population = np.stack(population)
+    genes = np.stack(genes)
+
+    generations = 0
+    best_decoded = None
+    while not context.bound_reached:
+        decoded = decode_population(population, needs, stock_lengths, stock_counts, max_bars, deadline,
+                                    genes if choose_stock else None)
+        if decoded is None:
+            context.expired()
+            break
+        assign, bar_stock, capacity, remaining, unplaced = decoded
+        ranks = _rank(capacity, remaining, unplaced)
+
+        # A elite sempre inclui a melhor sequência já vista, então a melhor
+        # da geração atual nunca é pior que a anterior nem que o best_fit
+        best = int(np.argmin(ranks))
+        best_decoded = (population[best], assign[best], bar_stock[best])
+        context.record(float(capacity[best].sum()), int(np.count_nonzero(capacity[best])), generations,
+                       lambda: _to_runs(*best_decoded), complete=unplaced[best] == 0)
+
+        if generations >= context.max_iterations or context.bound_reached:
+            break
+        if context.expired() or time.perf_counter() > deadline:
+            break
+        generations += 1
+
+        # Elitismo + torneio de 3 sobre o ranking
+        survivors = np.argsort(ranks)[:elite]
+        contenders = rng.integers(0, population_size, size=(population_size - elite, 2, 3))
+        winners = np.take_along_axis(
+            contenders, np.argmin(ranks[contenders], axis=2)[..., None], axis=2
+        )[..., 0]
+
+        children = [population[i] for i in survivors]
+        child_genes = [genes[i] for i in survivors]
+        for p1, p2 in winners:
+            child = _crossover(population[p1], population[p2], rng)
+            child_stock = _crossover_stock(genes[p1], genes[p2], rng) if choose_stock else no_preference
+            if rng.random() < mutation_rate:
+                if choose_stock and rng.random() < 0.5:
+                    child_stock = _mutate_stock(child_stock, n_stock, rng)
+                else:
+                    child = _mutate(child, rng)
+            children.append(child)
+            child_genes.append(child_stock)
+        population = np.stack(children)
+        genes = np.stack(child_genes)
+
+    if best_decoded is not None:
+        bars, runs = _to_runs(*best_decoded)
+
+    context.metadata["genetic"] = {
+        "generations": generations,
+        "population_size": population_size,
+        "baseline_materials_used": baseline_bars,
+        "materials_used": len(bars),
+        "evolved": best_decoded is not None,
+        "stock_genes": choose_stock,
+        "stopped_at_bound": context.bound_reached,
+    }
+    return bars, runs
@@ -0,0 +1,378 @@
+"""
+Corte guilhotina 2D em 2 ou 3 estágios
+
+1º estágio: cortes horizontais de ponta a ponta dividem a chapa em faixas.
+2º estágio: cortes verticais dividem cada faixa em seções.
+3º estágio (opcional): cortes horizontais empilham peças de mesma largura
+dentro de uma seção. No modo de 2 estágios cada seção tem uma única peça,
+com refilo quando ela é mais baixa que a faixa.
+
+Faixas e chapas são montadas por mochilas sobre os tamanhos distintos de
+peça (nunca sobre peças individuais), e uma chapa planejada é repetida
+enquanto houver demanda e estoque, então pedidos com milhares de painéis
+iguais custam o mesmo que pedidos pequenos.
+
+Tamanhos giráveis entram nas mochilas em uma só orientação por altura de
+faixa (a mais alta que cabe, portanto a mais estreita), escolhida de forma
+vetorizada; a rotação não duplica os candidatos.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .column_generation import _knapsack, _scale
+from .orientation import OrientationTable
+
+_EPS = 1e-9
+
+# Corte guilhotina: (estágio, orientação, posição, início, fim)
+Cut = Tuple[int, str, float, float, float]
+# Seção de uma faixa: largura e variantes empilhadas (de baixo para cima)
+Section = Tuple[float, List[int]]
+# Peça colocada: (tipo de peça, x, y, girada)
+Placement = Tuple[int, float, float, bool]
+
+
+class _Knapsacks:
+    """
+    Mochilas memorizadas
+
+    Os limites são truncados ao que cabe na capacidade, então enquanto a
+    demanda é grande as mesmas mochilas se repetem entre faixas e chapas.
+    """
+
+    def __init__(self):
+        self._memo = {}
+
+    def __call__(self, values: np.ndarray, weights: np.ndarray, bounds: np.ndarray, capacity: int) -> np.ndarray:
+        bounds = np.minimum(bounds, capacity // np.maximum(weights, 1))
+        key = (values.tobytes(), weights.tobytes(), bounds.tobytes(), capacity)
+        pattern = self._memo.get(key)
+        if pattern is None:
+            pattern = self._memo[key] = _knapsack(values, weights, bounds, capacity)
+        return pattern.copy()
+
+
+class _Sizes:
+    """
+    Tamanhos distintos de peça, discretizados para as mochilas
+
+    Cada tamanho g tem duas variantes: g (orientação original) e g + n
+    (girada); `valid` indica as variantes permitidas.
+    """
+
+    def __init__(self, widths: np.ndarray, heights: np.ndarray, counts: np.ndarray,
+                 order: np.ndarray, allowed: np.ndarray, kerf: float, scale: int):
+        keys = np.column_stack((widths, heights, allowed[0], allowed[1]))
+        dims, size_of = np.unique(keys, axis=0, return_inverse=True)
+        size_of = size_of.reshape(-1)
+        self.n = len(dims)
+        self.area = dims[:, 0] * dims[:, 1]
+        self.demand = np.bincount(size_of, weights=counts, minlength=self.n).astype(np.int64)
+        # Arrays por variante (tamanho 2n)
+        self.w = np.concatenate((dims[:, 0], dims[:, 1]))
+        self.h = np.concatenate((dims[:, 1], dims[:, 0]))
+        self.valid = np.concatenate((dims[:, 2], dims[:, 3])) > 0
+        self.w_units = np.ceil((self.w + kerf) * scale - _EPS).astype(np.int64)
+        self.h_units = np.ceil((self.h + kerf) * scale - _EPS).astype(np.int64)
+        # Tipos de peça de cada tamanho, na ordem de prioridade
+        self.types: List[List[int]] = [[] for _ in range(len(dims))]
+        for item in order:
+            self.types[size_of[item]].append(int(item))
+        self.knapsack = _Knapsacks()
+        self.strips = {}
+
+
+def _best_strip(sizes: _Sizes, demand: np.ndarray, strip_h: float, width_units: int,
+                height_units: int, stages: int, kerf: float) -> Tuple[List[Section], np.ndarray, float]:
+    """
+    Melhor faixa de altura até `strip_h` para a demanda atual
+
+    Returns:
+        Tupla (seções, uso por tamanho, altura efetiva da faixa); não devem ser alterados
+    """
+    n = sizes.n
+    fit = (sizes.valid & (sizes.h <= strip_h + _EPS) & (sizes.w_units <= width_units) &
+           (sizes.h_units <= height_units)).reshape(2, n)
+    # Orientação de cada tamanho nesta faixa: a girada se só ela cabe ou se é mais alta
+    rotated = fit[1] & (~fit[0] | (sizes.h[n:] > sizes.h[:n] + _EPS))
+    variant = np.arange(n) + n * rotated
+
+    # Demanda acima do que cabe numa faixa não muda o resultado
+    per_strip = (width_units // sizes.w_units[variant]) * (height_units // sizes.h_units[variant])
+    demand = np.minimum(demand, np.where(fit.any(axis=0), per_strip, 0))
+    key = (strip_h, width_units, height_units, demand.tobytes())
+    if key not in sizes.strips:
+        sizes.strips[key] = _build_strip(sizes, demand, variant, width_units, height_units, stages, kerf)
+    return sizes.strips[key]
+
+
+def _build_strip(sizes: _Sizes, demand: np.ndarray, variant: np.ndarray, width_units: int,
+                 height_units: int, stages: int, kerf: float) -> Tuple[List[Section], np.ndarray, float]:
+    """
+    Monta a faixa de `_best_strip` (duas mochilas: pilhas por largura e seções)
+
+    Args:
+        demand: Demanda por tamanho, já zerada para os que não cabem na faixa
+        variant: Variante (orientação) de cada tamanho nesta faixa
+    """
+    n = sizes.n
+    usage = np.zeros(n, dtype=np.int64)
+    eligible = demand > 0
+    if not eligible.any():
+        return [], usage, 0.0
+    area = sizes.area
+    w, h_units = sizes.w[variant], sizes.h_units[variant]
+    width_class = np.unique(w, return_inverse=True)[1].reshape(-1)
+
+    # Candidatos a seção: tamanho que define a largura, pilha [(tamanho, quantidade)]
+    # e repetições possíveis sem exceder a demanda
+    candidates: List[Tuple[int, List[Tuple[int, int]], int]] = []
+    if stages == 2:
+        for g, count in zip(np.flatnonzero(eligible).tolist(), demand[eligible].tolist()):
+            candidates.append((g, [(g, 1)], count))
+    else:
+        # Classes de largura com um só tamanho: pilha cheia e, se sobrar, a pilha do resto
+        class_size = np.bincount(width_class[eligible], minlength=n)
+        single = eligible & (class_size[width_class] == 1)
+        g = np.flatnonzero(single)
+        full = np.minimum(demand[g], height_units // h_units[g])
+        repeat = demand[g] // full
+        rest = demand[g] - full * repeat
+        for size, count, times, remainder in zip(g.tolist(), full.tolist(), repeat.tolist(), rest.tolist()):
+            candidates.append((size, [(size, count)], times))
+            if remainder:
+                candidates.append((size, [(size, remainder)], 1))
+
+        # Na mesma classe a área é proporcional à altura: valores = alturas, e
+        # classes com as mesmas alturas reaproveitam a mochila memorizada
+        for group in np.unique(width_class[eligible & ~single]):
+            members = np.flatnonzero(eligible & (width_class == group))
+            left = demand[members].copy()
+            for _ in range(8):
+                stack = sizes.knapsack(sizes.h[variant[members]], h_units[members], left, height_units)
+                if not stack.any():
+                    break
+                used = np.flatnonzero(stack)
+                times = int(min(left[used] // stack[used]))
+                candidates.append((int(members[0]), [(int(members[k]), int(stack[k])) for k in used], times))
+                left -= stack * times
+
+    firsts = np.array([first for first, _, _ in candidates], dtype=np.int64)
+    values = np.array([sum(float(area[size]) * count for size, count in pile) for _, pile, _ in candidates])
+    bounds = np.array([times for _, _, times in candidates], dtype=np.int64)
+    chosen = sizes.knapsack(values, sizes.w_units[variant[firsts]], bounds, width_units)
+
+    sections: List[Section] = []
+    for j in np.flatnonzero(chosen):
+        first, pile, _ = candidates[j]
+        # Mais altos embaixo: a sequência de cortes fica de baixo para cima
+        stacked = [int(variant[size]) for size, count in sorted(pile, key=lambda entry: -sizes.h[variant[entry[0]]])
+                   for _ in range(count)]
+        for _ in range(int(chosen[j])):
+            sections.append((float(w[first]), stacked))
+            for size, count in pile:
+                usage[size] += count
+    # Seções mais largas primeiro
+    sections.sort(key=lambda section: -section[0])
+    # A faixa encolhe até a pilha mais alta que de fato foi usada
+    height = max((float(sizes.h[pile].sum()) + kerf * (len(pile) - 1) for _, pile in sections), default=0.0)
+    return sections, usage, height
+
+
+# Alturas de faixa avaliadas por rodada; limita o custo com muitos tamanhos distintos
+MAX_STRIP_HEIGHTS = 32
+
+
+def _candidate_heights(heights: np.ndarray) -> np.ndarray:
+    """Alturas distintas a testar: as mais altas e uma amostra uniforme das demais"""
+    heights = np.unique(heights)[::-1]
+    if len(heights) <= MAX_STRIP_HEIGHTS:
+        return heights
+    half = MAX_STRIP_HEIGHTS // 2
+    rest = heights[half:]
+    sample = rest[np.linspace(0, len(rest) - 1, MAX_STRIP_HEIGHTS - half).round().astype(np.int64)]
+    return np.concatenate((heights[:half], sample))
+
+
+def _plan_sheet(sizes: _Sizes, demand: np.ndarray, sheet_w: float, sheet_h: float, kerf: float,
+                scale: int, stages: int) -> Tuple[List[Tuple[float, List[Section]]], np.ndarray]:
+    """
+    Planeja uma chapa: escolhe faixas por mochila sobre a altura e as materializa
+
+    Returns:
+        Tupla (faixas como (altura, seções), uso por tamanho)
+    """
+    width_units = int(np.floor((sheet_w + kerf) * scale + _EPS))
+    height_left = int(np.floor((sheet_h + kerf) * scale + _EPS))
+    demand = demand.copy()
+    usage = np.zeros(len(demand), dtype=np.int64)
+    strips: List[Tuple[float, List[Section]]] = []
+
+    while True:
+        heights = _candidate_heights(sizes.h[sizes.valid & (np.tile(demand, 2) > 0) & (sizes.h_units <= height_left)])
+        options = []
+        for strip_h in heights:
+            strip_units = int(np.ceil((strip_h + kerf) * scale - _EPS))
+            sections, strip_usage, height = _best_strip(
+                sizes, demand, strip_h, width_units, strip_units, stages, kerf
+            )
+            if sections:
+                used = np.flatnonzero(strip_usage)
+                options.append((strip_h, int(np.ceil((height + kerf) * scale - _EPS)),
+                                float(sizes.area @ strip_usage), int(min(demand[used] // strip_usage[used]))))
+        if not options:
+            break
+
+        chosen = sizes.knapsack(
+            np.array([value for _, _, value, _ in options]),
+            np.array([units for _, units, _, _ in options], dtype=np.int64),
+            np.array([repeat for _, _, _, repeat in options], dtype=np.int64),
+            height_left
+        )
+
+        # As faixas são refeitas com a demanda restante, então a chapa é sempre viável
+        placed = False
+        for j in sorted(np.flatnonzero(chosen), key=lambda j: -options[j][0]):
+            strip_h = options[j][0]
+            for _ in range(int(chosen[j])):
+                strip_units = min(int(np.ceil((strip_h + kerf) * scale - _EPS)), height_left)
+                sections, strip_usage, height = _best_strip(
+                    sizes, demand, strip_h, width_units, strip_units, stages, kerf
+                )
+                strip_units = int(np.ceil((height + kerf) * scale - _EPS))
+                if not sections or strip_units > height_left:
+                    break
+                strips.append((height, sections))
+                demand -= strip_usage
+                usage += strip_usage
+                height_left -= strip_units
+                placed = True
+        if not placed:
+            break
+
+    return strips, usage
+
+
+def _layout(sizes: _Sizes, strips: List[Tuple[float, List[Section]]], sheet_w: float,
+            sheet_h: float, kerf: float) -> Tuple[List[Placement], List[Cut], float]:
+    """
+    Posiciona as peças de uma chapa planejada e gera a sequência de cortes
+
+    Returns:
+        Tupla (peças como (tamanho, x, y, girada), cortes, altura usada)
+    """
+    placements: List[Placement] = []
+    first_stage: List[Cut] = []
+    other_stages: List[Cut] = []
+    y = 0.0
+    for strip_h, sections in strips:
+        top = y + strip_h
+        if top < sheet_h - _EPS:
+            first_stage.append((1, "horizontal", top, 0.0, sheet_w))
+
+        x = 0.0
+        for section_w, pile in sections:
+            right = x + section_w
+            if right < sheet_w - _EPS:
+                other_stages.append((2, "vertical", right, y, top))
+            yy = y
+            for v in pile:
+                placements.append((v % sizes.n, x, yy, v >= sizes.n))
+                yy += sizes.h[v]
+                # Corte de 3º estágio entre peças da pilha ou refilo acima da última
+                if yy < top - _EPS:
+                    other_stages.append((3, "horizontal", yy, x, right))
+                yy += kerf
+            x = right + kerf
+        y = top + kerf
+
+    return placements, first_stage + other_stages, min(y, sheet_h)
+
+
+def guillotine_2d(widths: np.ndarray, heights: np.ndarray, counts: np.ndarray, order: np.ndarray,
+                  sheet_widths: np.ndarray, sheet_heights: np.ndarray, sheet_counts: np.ndarray,
+                  kerf: float, stages: int = 3, allowed: Optional[np.ndarray] = None
+                  ) -> Tuple[List[int], List[List[Placement]], List[Tuple[float, ...]], List[List[Cut]]]:
+    """
+    Encaixa as peças em chapas com cortes guilhotina
+
+    Para cada tipo de chapa disponível, planeja uma chapa com a demanda
+    restante e fica com a de maior aproveitamento; esse plano é repetido
+    enquanto a demanda e o estoque permitirem.
+
+    Args:
+        widths, heights: Dimensões por tipo de peça (x = largura, y = comprimento)
+        counts: Quantidade por tipo de peça
+        order: Ordem de prioridade dos tipos (atribuição de peças de mesmo tamanho)
+        sheet_widths, sheet_heights: Dimensões por tipo de chapa
+        sheet_counts: Unidades disponíveis por tipo de chapa
+        kerf: Espessura do corte
+        stages: 2 ou 3 estágios
+        allowed: Orientações permitidas (2, n), ver `allowed_orientations` (padrão: sem rotação)
+
+    Returns:
+        Tupla (sheet_stock, sheet_items, sheet_free, sheet_cuts): tipo de cada
+        chapa, peças como (tipo de peça, x, y, girada), faixa livre no topo
+        (x, y, largura, altura) e a sequência de cortes
+    """
+    if stages not in (2, 3):
+        raise ValueError("O corte guilhotina suporta 2 ou 3 estágios")
+
+    sheet_stock: List[int] = []
+    sheet_items: List[List[Placement]] = []
+    sheet_free: List[Tuple[float, ...]] = []
+    sheet_cuts: List[List[Cut]] = []
+    if len(widths) == 0 or len(sheet_widths) == 0:
+        return sheet_stock, sheet_items, sheet_free, sheet_cuts
+
+    if allowed is None:
+        allowed = np.zeros((2, len(widths)), dtype=bool)
+        allowed[0] = True
+    # Orientações que cabem em alguma chapa
+    table = OrientationTable(widths, heights, allowed, sheet_widths, sheet_heights)
+    allowed = table.fits.any(axis=2)
+
+    scale = _scale(np.concatenate((widths, heights)), np.concatenate((sheet_widths, sheet_heights)))
+    sizes = _Sizes(widths, heights, counts, order, allowed, kerf, scale)
+    demand = sizes.demand.copy()
+    stock_left = np.asarray(sheet_counts, dtype=np.int64).copy()
+    type_left = np.asarray(counts, dtype=np.int64).copy()
+    cursor = [0] * len(sizes.types)
+
+    while demand.any():
+        best: Optional[Tuple[float, float, int, list, np.ndarray]] = None
+        for stock in np.flatnonzero(stock_left > 0):
+            W, H = float(sheet_widths[stock]), float(sheet_heights[stock])
+            strips, usage = _plan_sheet(sizes, demand, W, H, kerf, scale, stages)
+            if not usage.any():
+                continue
+            fill = float(sizes.area @ usage) / (W * H)
+            if best is None or (fill, -W * H) > (best[0], -best[1]):
+                best = (fill, W * H, int(stock), strips, usage)
+        if best is None:
+            break
+
+        _, _, stock, strips, usage = best
+        W, H = float(sheet_widths[stock]), float(sheet_heights[stock])
+        placements, cuts, used_h = _layout(sizes, strips, W, H, kerf)
+        used = np.flatnonzero(usage)
+        repeat = int(min(stock_left[stock], min(demand[used] // usage[used])))
+
+        for _ in range(repeat):
+            items = []
+            for g, x, y, rotated in placements:
+                while type_left[sizes.types[g][cursor[g]]] == 0:
+                    cursor[g] += 1
+                item = sizes.types[g][cursor[g]]
+                type_left[item] -= 1
+                items.append((item, x, y, rotated))
+            sheet_stock.append(stock)
+            sheet_items.append(items)
+            sheet_free.append((0.0, used_h, W, max(0.0, H - used_h)))
+            sheet_cuts.append(list(cuts))
+        demand -= usage * repeat
+        stock_left[stock] -= repeat
+
+    return sheet_stock, sheet_items, sheet_free, sheet_cuts
@@ -0,0 +1,221 @@
+"""
+Reotimização incremental de um plano já gerado
+
+Quando o pedido muda depois de planejado, só as barras/chapas afetadas
+mudam: as peças canceladas saem das unidades de menor aproveitamento, as
+acrescentadas entram nas sobras das unidades existentes e apenas o que não
+couber vai para material novo, otimizado à parte. As demais unidades
+voltam idênticas (mesmos ids, posições e ordem).
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .engine_2d import FreeRects
+from .models import CutOperation, Leftover, MaterialCut, Part
+
+# Sobras maiores que isso são utilizáveis (mesmo critério da montagem dos planos)
+USABLE_LEFTOVER = 50.0
+
+_EPS = 1e-9
+
+
+def split_unit_id(unit_id: str) -> Tuple[str, int]:
+    """Separa "peca_3" em ("peca", 3); ids sem número de unidade voltam com 0"""
+    base, _, number = unit_id.rpartition("_")
+    if base and number.isdigit():
+        return base, int(number)
+    return unit_id, 0
+
+
+def unit_offsets(unit_ids: Iterable[str]) -> Dict[str, int]:
+    """Maior número de unidade já usado por id de peça ou material"""
+    offsets: Dict[str, int] = {}
+    for unit_id in unit_ids:
+        base, number = split_unit_id(unit_id)
+        offsets[base] = max(offsets.get(base, 0), number)
+    return offsets
+
+
+def remove_units(cuts: List[MaterialCut], removals: Dict[str, int]
+                 ) -> Tuple[Dict[int, List[CutOperation]], Dict[str, int]]:
+    """
+    Retira do plano as unidades de peça canceladas
+
+    As peças saem primeiro das unidades de menor aproveitamento, que assim
+    tendem a esvaziar e ser liberadas, e dentro delas das últimas cortadas.
+
+    Args:
+        cuts: Unidades do plano
+        removals: Quantidade a cancelar por id de peça
+
+    Returns:
+        Tupla (operações restantes por índice de unidade alterada,
+        quantidade não encontrada no plano por id de peça)
+    """
+    located: Dict[str, List[Tuple[float, int, int]]] = {part_id: [] for part_id in removals}
+    for index, cut in enumerate(cuts):
+        for position, operation in enumerate(cut.cuts):
+            found = located.get(split_unit_id(operation.part_id)[0])
+            if found is not None:
+                found.append((cut.efficiency, index, -position))
+
+    removed: Dict[int, set] = {}
+    missing: Dict[str, int] = {}
+    for part_id, quantity in removals.items():
+        chosen = sorted(located[part_id])[:quantity]
+        if len(chosen) < quantity:
+            missing[part_id] = quantity - len(chosen)
+        for _, index, position in chosen:
+            removed.setdefault(index, set()).add(-position)
+
+    kept = {
+        index: [op for position, op in enumerate(cuts[index].cuts) if position not in positions]
+        for index, positions in removed.items()
+    }
+    return kept, missing
+
+
+def bar_length(cut: MaterialCut, kerf_width: float) -> float:
+    """Comprimento da barra de uma unidade 1D (peças + kerf + sobra)"""
+    return cut.remaining_length + sum(op.length + kerf_width for op in cut.cuts)
+
+
+def bar_cut(cut: MaterialCut, operations: List[CutOperation], length: float,
+            kerf_width: float) -> Tuple[MaterialCut, Optional[Leftover]]:
+    """Barra refeita com as operações dadas, em sequência a partir da ponta"""
+    position = 0.0
+    placed = []
+    for order, operation in enumerate(operations, 1):
+        placed.append(operation.copy(update={"position_x": position, "order": order}))
+        position += operation.length + kerf_width
+    remaining = length - position
+
+    new_cut = MaterialCut(
+        material_id=cut.material_id,
+        material_name=cut.material_name,
+        cuts=placed,
+        waste=remaining,
+        efficiency=((length - remaining) / length) * 100,
+        remaining_length=remaining
+    )
+    leftover = None
+    if remaining > USABLE_LEFTOVER:
+        leftover = Leftover(length=remaining, material_id=cut.material_id, usable=True, area=remaining)
+    return new_cut, leftover
+
+
+def fit_bars(remaining: np.ndarray, sizes: np.ndarray,
+             compatible: Optional[List[np.ndarray]] = None) -> List[Optional[int]]:
+    """
+    Best fit das peças novas nas sobras das barras
+
+    Args:
+        remaining: Sobra de cada barra
+        sizes: Tamanho de cada peça nova (com kerf), na ordem de encaixe
+        compatible: Por peça nova, as barras de material que ela aceita (padrão: todas)
+
+    Returns:
+        Índice da barra de cada peça, ou None se não couber em nenhuma
+    """
+    remaining = np.array(remaining, dtype=float)
+    chosen: List[Optional[int]] = []
+    for n, size in enumerate(sizes):
+        slack = remaining - size
+        slack[slack < -_EPS] = np.inf
+        if compatible is not None:
+            slack[~compatible[n]] = np.inf
+        index = int(np.argmin(slack)) if len(slack) else 0
+        if not len(slack) or not np.isfinite(slack[index]):
+            chosen.append(None)
+            continue
+        remaining[index] -= size
+        chosen.append(index)
+    return chosen
+
+
+def sheet_free_rects(operations: List[CutOperation], sheet_width: float, sheet_length: float,
+                     kerf_width: float) -> FreeRects:
+    """Retângulos livres de uma chapa a partir das peças já posicionadas"""
+    free = FreeRects(sheet_width + kerf_width, sheet_length + kerf_width)
+    for operation in operations:
+        free.place(operation.position_x, operation.position_y,
+                   (operation.width or 0.0) + kerf_width, operation.length + kerf_width)
+    return free
+
+
+def place_on_sheet(free: FreeRects, part: Part, unit_id: str, allowed: Tuple[bool, bool],
+                   kerf_width: float, order: int) -> Optional[CutOperation]:
+    """
+    Encaixa uma peça nova no espaço livre de uma chapa (BSSF), sem mover as demais
+
+    Returns:
+        Operação da peça colocada, ou None se não couber
+    """
+    options = [o for o in (0, 1) if allowed[o]]
+    sizes = ((part.width + kerf_width, part.length + kerf_width), (part.length + kerf_width, part.width + kerf_width))
+    ws = np.array([sizes[o][0] for o in options])
+    hs = np.array([sizes[o][1] for o in options])
+    found = free.find(ws, hs, "bssf")
+    if found is None:
+        return None
+
+    _, _, index, option = found
+    x, y = float(free.rects[0, index]), float(free.rects[1, index])
+    free.place(x, y, ws[option], hs[option])
+    rotated = options[option] == 1
+    return CutOperation(
+        part_id=unit_id,
+        part_name=part.name,
+        position_x=x,
+        position_y=y,
+        length=part.width if rotated else part.length,
+        width=part.length if rotated else part.width,
+        rotation=90 if rotated else 0,
+        order=order
+    )
+
+
+def sheet_cut(cut: MaterialCut, operations: List[CutOperation], free: Optional[FreeRects],
+              kerf_width: float) -> Tuple[MaterialCut, Optional[Leftover]]:
+    """
+    Chapa refeita com as operações dadas (posições mantidas)
+
+    Sem os retângulos livres (corte guilhotina ou chapa de dimensões
+    desconhecidas), o retalho da chapa original é mantido.
+    """
+    area = cut.waste + sum(op.length * (op.width or 0.0) for op in cut.cuts)
+    used = sum(op.length * (op.width or 0.0) for op in operations)
+    if free is not None:
+        _, _, w, h = free.largest()
+        free_width, free_length = max(0.0, w - kerf_width), max(0.0, h - kerf_width)
+    else:
+        free_width, free_length = cut.remaining_width or 0.0, cut.remaining_length
+
+    new_cut = MaterialCut(
+        material_id=cut.material_id,
+        material_name=cut.material_name,
+        cuts=[op.copy(update={"order": order}) for order, op in enumerate(operations, 1)],
+        waste=area - used,
+        efficiency=(used / area) * 100 if area > 0 else 0.0,
+        remaining_length=free_length,
+        remaining_width=free_width
+    )
+    leftover = None
+    if min(free_length, free_width) > USABLE_LEFTOVER:
+        leftover = Leftover(length=free_length, width=free_width, material_id=cut.material_id,
+                            usable=True, area=free_length * free_width)
+    return new_cut, leftover
+
+
+def renumber(cut: MaterialCut, material_offsets: Dict[str, int], part_offsets: Dict[str, int]) -> MaterialCut:
+    """Renumera as unidades de um plano parcial para continuar a numeração do plano existente"""
+    def shifted(unit_id: str, offsets: Dict[str, int]) -> str:
+        base, number = split_unit_id(unit_id)
+        return f"{base}_{offsets.get(base, 0) + number}"
+
+    return cut.copy(update={
+        "material_id": shifted(cut.material_id, material_offsets),
+        "cuts": [op.copy(update={"part_id": shifted(op.part_id, part_offsets)}) for op in cut.cuts],
+    })
@@ -20,6 +20,26 @@ class PartType(str, Enum):
     RECTANGULAR = "rectangular"  # Peça retangular (2D)
 
 
+class GrainDirection(str, Enum):
+    """Direção do veio exigida para a peça em relação à chapa"""
+    LENGTH = "length"     # Comprimento da peça ao longo do comprimento da chapa
+    WIDTH = "width"       # Comprimento da peça ao longo da largura da chapa
+
+
+class MaxRectsHeuristic(str, Enum):
+    """Critérios de escolha do retângulo livre no MaxRects"""
+    BSSF = "bssf"         # Best Short Side Fit
+    BAF = "baf"           # Best Area Fit
+    BL = "bl"             # Bottom-Left
+
+
+class ResultFormat(str, Enum):
+    """Formatos de resposta de um resultado"""
+    JSON = "json"                        # OptimizationResult
+    COLUMNAR = "columnar"                # Formato colunar em JSON
+    COLUMNAR_BINARY = "columnar-binary"  # Formato colunar com arrays empacotados
+
+
 class Material(BaseModel):
     """Representa um material disponível em estoque"""
     id: str = Field(..., description="Identificador único do material")
@@ -30,6 +50,8 @@ class Material(BaseModel):
     thickness: Optional[float] = Field(None, description="Espessura (mm)")
     quantity: int = Field(..., ge=1, description="Quantidade disponível")
     cost_per_unit: Optional[float] = Field(None, description="Custo por unidade")
+    family: Optional[str] = Field(None, description="Família do material (ex.: aço, alumínio)")
+    origin_id: Optional[str] = Field(None, description="ID do material de origem (materiais criados a partir de retalhos)")
     
     @validator('width')
     def validate_width(cls, v, values):
@@ -59,6 +81,8 @@ class Part(BaseModel):
     width: Optional[float] = Field(None, description="Largura (mm) - para peças 2D")
     quantity: int = Field(..., ge=1, description="Quantidade necessária")
     priority: int = Field(1, ge=1, le=10, description="Prioridade de corte (1-10)")
+    grain_direction: Optional[GrainDirection] = Field(None, description="Direção do veio (fixa a orientação, ignorando allow_rotation)")
+    material: Optional[str] = Field(None, description="ID ou família do material em que a peça pode ser cortada (None = qualquer)")
     
     @validator('width')
     def validate_width(cls, v, values):
@@ -111,11 +135,24 @@ class Leftover(BaseModel):
     area: float = Field(..., description="Área do retalho")
 
 
+class Remnant(BaseModel):
+    """Retalho guardado no estoque de retalhos"""
+    id: Optional[int] = Field(None, description="Identificador no estoque (atribuído ao guardar)")
+    material_id: str = Field(..., description="ID do material de origem")
+    material_type: MaterialType = Field(..., description="Tipo do material")
+    name: str = Field(..., description="Nome do material de origem")
+    length: float = Field(..., gt=0, description="Comprimento (mm)")
+    width: Optional[float] = Field(None, gt=0, description="Largura (mm) - para chapas")
+    thickness: Optional[float] = Field(None, description="Espessura (mm)")
+    family: Optional[str] = Field(None, description="Família do material de origem")
+    created_at: Optional[float] = Field(None, description="Momento em que foi guardado (epoch)")
+
+
 class OptimizationResult(BaseModel):
     """Resultado completo da otimização"""
     success: bool = Field(..., description="Se a otimização foi bem-sucedida")
     efficiency: float = Field(..., description="Aproveitamento percentual total")
-    total_waste: float = Field(..., description="Desperdício total (mm)")
+    total_waste: float = Field(..., description="Desperdício total (mm em barras, mm² em chapas; plano misto: mm, ver metadata['waste_by_dimension'])")
     total_cost: Optional[float] = Field(None, description="Custo total estimado")
     materials_used: int = Field(..., description="Quantidade de materiais utilizados")
     cuts: List[MaterialCut] = Field(..., description="Lista de cortes por material")
@@ -137,6 +174,31 @@ class OptimizationRequest(BaseModel):
     parts: List[Part] = Field(..., description="Lista de peças a cortar")
     kerf_width: float = Field(3.0, ge=0, description="Espessura do corte (mm)")
     algorithm: str = Field("best_fit", description="Algoritmo de otimização")
-    max_iterations: int = Field(1000, ge=1, description="Máximo de iterações")
+    max_iterations: int = Field(1000, ge=1, description="Máximo de iterações (gerações do algoritmo genético)")
     optimize_cost: bool = Field(False, description="Otimizar por custo")
-    allow_rotation: bool = Field(True, description="Permitir rotação de peças") 
\ No newline at end of file
+    allow_rotation: bool = Field(True, description="Permitir rotação de peças")
+    random_seed: Optional[int] = Field(None, description="Semente para algoritmos aleatórios (resultado reprodutível)")
+    time_limit_ms: Optional[int] = Field(None, gt=0, description="Prazo da otimização em ms (retorna a melhor solução encontrada)")
+    maxrects_heuristic: MaxRectsHeuristic = Field(MaxRectsHeuristic.BSSF, description="Critério de encaixe do algoritmo maxrects")
+    guillotine_stages: int = Field(3, ge=2, le=3, description="Estágios do corte guilhotina (2 ou 3)")
+    use_remnants: bool = Field(False, description="Usar retalhos do estoque de retalhos antes de abrir material novo")
+    multistart_runs: int = Field(16, ge=1, le=256, description="Execuções do algoritmo multistart (ordem x encaixe x semente)")
+
+
+class PlanDelta(BaseModel):
+    """Alteração do pedido depois de planejado"""
+    add_parts: List[Part] = Field(default_factory=list, description="Peças acrescentadas")
+    remove_parts: Dict[str, int] = Field(default_factory=dict, description="Quantidade cancelada por ID de peça")
+    
+    @validator('remove_parts')
+    def validate_remove_parts(cls, v):
+        if any(quantity < 1 for quantity in v.values()):
+            raise ValueError("Quantidades canceladas devem ser positivas")
+        return v
+
+
+class ReoptimizationRequest(BaseModel):
+    """Requisição de reotimização incremental de um plano"""
+    request: OptimizationRequest = Field(..., description="Requisição que gerou o plano (materiais e opções)")
+    previous: OptimizationResult = Field(..., description="Plano atual")
+    delta: PlanDelta = Field(..., description="Peças acrescentadas e canceladas")
@@ -0,0 +1,300 @@
+"""
+Multi-start 2D: várias execuções gulosas em paralelo, fica a melhor
+
+Os encaixes gulosos (MaxRects e Skyline) são muito sensíveis à ordem das
+peças e à regra de encaixe. Cada execução combina uma chave de ordenação,
+uma regra de encaixe e uma semente (perturbação da chave); as execuções
+rodam num pool de processos e a melhor é escolhida por peças não colocadas,
+chapas usadas e desperdício, nessa ordem. O desperdício não conta o maior
+retângulo livre de cada chapa (o retalho): com chapas iguais a área usada
+pelas peças não muda, e o que distingue os planos é quanto sobra aproveitável.
+
+As execuções compartilham um limite: o número de chapas da melhor solução
+completa já encontrada, num array em memória compartilhada. Uma execução
+que precisaria abrir mais chapas que isso já não pode vencer e é abandonada.
+Quando uma solução atinge o limite inferior do contexto, as demais são
+canceladas como no prazo.
+
+O pool pode ser de outro componente (MultistartPool sobre um executor
+criado com `init_worker`): a API usa o seu próprio pool de otimizações,
+de modo que os encaixes não abrem processos além dos workers dela.
+"""
+
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .context import SolveContext
+from .demand import DemandVector, StockVector
+from .engine_2d import Placement, Pruned, maxrects_2d, skyline_2d
+
+SORT_KEYS = ("area", "length", "width", "perimeter", "max_side")
+PLACEMENTS = (("maxrects", "bssf"), ("maxrects", "baf"), ("maxrects", "bl"), ("skyline", None))
+
+# Amplitude da perturbação multiplicativa da chave nas execuções com semente
+NOISE = 0.1
+
+# Chamadas simultâneas de multi-start por pool (uma posição do limite compartilhado cada)
+_SLOTS = 64
+_NO_BOUND = np.iinfo(np.int64).max
+
+# (chave de ordenação, motor, heurística, semente)
+Run = Tuple[str, str, Optional[str], int]
+Packing = Tuple[List[int], List[List[Placement]], List[Tuple[float, ...]]]
+
+
+def plan_runs(count: int) -> List[Run]:
+    """
+    Combinações a executar: primeiro todas as determinísticas (semente 0),
+    alternando regras de encaixe, depois as mesmas com sementes 1, 2, ...
+    """
+    combos = [(key, engine, heuristic) for key in SORT_KEYS for engine, heuristic in PLACEMENTS]
+    runs = ((key, engine, heuristic, seed) for seed in itertools.count() for key, engine, heuristic in combos)
+    return list(itertools.islice(runs, count))
+
+
+def run_order(run: Run, parts: DemandVector, base_seed: int) -> np.ndarray:
+    """Ordem de processamento dos tipos de peça para uma execução"""
+    key_name, _, _, seed = run
+    lengths, widths = parts.lengths, parts.widths
+    key = {
+        "area": lengths * widths,
+        "length": lengths * 1e6 + widths,
+        "width": widths * 1e6 + lengths,
+        "perimeter": lengths + widths,
+        "max_side": np.maximum(lengths, widths) * 1e6 + np.minimum(lengths, widths),
+    }[key_name]
+    if seed:
+        rng = np.random.default_rng([base_seed, seed])
+        key = key * (1 + NOISE * rng.random(len(key)))
+    return parts.priority_order(key)
+
+
+# Estado por processo worker: o array de limites compartilhado
+_worker_bounds: Optional[np.ndarray] = None
+
+
+def shared_bounds():
+    """Array de limites em memória compartilhada de um pool (initargs de `init_worker`)"""
+    return multiprocessing.get_context("spawn").RawArray("q", _SLOTS)
+
+
+def init_worker(raw) -> None:
+    """Initializer dos processos de um pool que executa encaixes do multi-start"""
+    global _worker_bounds
+    _worker_bounds = np.frombuffer(raw, dtype=np.int64)
+
+
+def _pack(job: tuple, bound: np.ndarray) -> Optional[Packing]:
+    """Executa um encaixe; None se foi abandonado pelo limite"""
+    engine, heuristic, widths, heights, counts, order, sheet_widths, sheet_heights, sheet_counts, allowed = job
+    try:
+        if engine == "skyline":
+            packing = skyline_2d(widths, heights, counts, order, sheet_widths, sheet_heights, sheet_counts,
+                                 allowed=allowed, sheet_bound=bound)
+        else:
+            packing = maxrects_2d(widths, heights, counts, order, sheet_widths, sheet_heights, sheet_counts,
+                                  heuristic=heuristic, allowed=allowed, sheet_bound=bound)
+    except Pruned:
+        return None
+
+    # Só soluções completas limitam as demais (corrida benigna: no pior caso o limite fica mais fraco)
+    sheets = len(packing[0])
+    if sum(len(items) for items in packing[1]) == int(counts.sum()) and sheets < bound[0]:
+        bound[0] = sheets
+    return packing
+
+
+def _pack_in_worker(job: tuple, slot: int) -> Optional[Packing]:
+    return _pack(job, _worker_bounds[slot:slot + 1])
+
+
+class MultistartPool:
+    """
+    Pool de processos com o array de limites compartilhado
+
+    O executor precisa ter sido criado com initializer=init_worker e
+    initargs=(raw,), com o mesmo `raw` de `shared_bounds` passado aqui.
+    """
+
+    def __init__(self, executor: Executor, raw, workers: int):
+        """
+        Args:
+            executor: Pool de processos que executa os encaixes
+            raw: Array de `shared_bounds` entregue aos processos do executor
+            workers: Processos do executor
+        """
+        self.executor = executor
+        self.workers = workers
+        self.bounds = np.frombuffer(raw, dtype=np.int64)
+        self._free = list(range(_SLOTS))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, workers: int) -> "MultistartPool":
+        """Pool próprio com `workers` processos"""
+        raw = shared_bounds()
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=init_worker, initargs=(raw,))
+        return cls(executor, raw, workers)
+
+    def acquire(self) -> Optional[int]:
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def release(self, slot: int) -> None:
+        with self._lock:
+            self._free.append(slot)
+
+
+_pools: Dict[int, MultistartPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> MultistartPool:
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = MultistartPool.create(workers)
+        return _pools[workers]
+
+
+def multistart_2d(parts: DemandVector, stock: StockVector, widths: np.ndarray, heights: np.ndarray,
+                  sheet_widths: np.ndarray, sheet_heights: np.ndarray, allowed: Optional[np.ndarray],
+                  runs: int, workers: Optional[int] = None,
+                  context: Optional[SolveContext] = None,
+                  pool: Optional[MultistartPool] = None) -> Tuple[Packing, Dict[str, Any]]:
+    """
+    Executa `runs` encaixes gulosos e retorna o melhor
+
+    Args:
+        parts, stock: Demanda e estoque (dimensões reais, usadas no desperdício)
+        widths, heights: Dimensões por tipo de peça (já com kerf)
+        sheet_widths, sheet_heights: Dimensões por tipo de chapa (já com kerf)
+        allowed: Orientações permitidas (2, n)
+        runs: Quantidade de combinações (ordem x encaixe x semente)
+        workers: Processos do pool (padrão: núcleos da máquina; 1 = sequencial no processo)
+        context: Contexto com semente, prazo e limite inferior; no prazo ou ao
+            atingir o limite, as execuções pendentes são canceladas e as em
+            andamento abandonadas
+        pool: Pool externo dos encaixes (substitui workers)
+
+    Returns:
+        Tupla (melhor encaixe no formato de `maxrects_2d`, estatísticas das execuções)
+    """
+    context = context or SolveContext()
+    workers = min(pool.workers if pool is not None else workers or os.cpu_count() or 1, runs)
+    base_seed = context.seed or 0
+    plans = plan_runs(runs)
+    jobs = [
+        (run[1], run[2], widths, heights, parts.counts, run_order(run, parts, base_seed),
+         sheet_widths, sheet_heights, stock.counts, allowed)
+        for run in plans
+    ]
+
+    part_area = parts.lengths * parts.widths
+    sheet_area = stock.lengths * stock.widths
+    outcomes: List[Optional[Tuple[int, int, float]]] = [None] * len(jobs)
+    status = ["cancelled"] * len(jobs)
+    best: Optional[Tuple[Tuple[int, int, float], int, Packing]] = None
+
+    def collect(index: int, packing: Optional[Packing]) -> None:
+        nonlocal best
+        if packing is None:
+            status[index] = "pruned"
+            return
+        sheet_stock, sheet_items, sheet_free = packing
+        placed = float(sum(part_area[item] for items in sheet_items for item, _, _, _ in items))
+        used = float(sheet_area[sheet_stock].sum()) if sheet_stock else 0.0
+        leftover = float(sum(free[2] * free[3] for free in sheet_free))
+        unplaced = parts.total - sum(len(items) for items in sheet_items)
+        score = (unplaced, len(sheet_stock), max(0.0, used - placed - leftover))
+        status[index] = "completed"
+        outcomes[index] = score
+        # Empate decidido pelo índice da execução: o resultado não depende da ordem de chegada
+        if best is None or (score, index) < best[:2]:
+            best = (score, index, packing)
+            if unplaced == 0:
+                context.record(used, len(sheet_stock), index,
+                               lambda: (sheet_stock, [[[item, 1] for item, _, _, _ in items] for items in sheet_items]))
+
+    if pool is None and workers > 1:
+        pool = _get_pool(workers)
+    slot = pool.acquire() if pool is not None and workers > 1 else None
+    if slot is None:
+        # Sequencial no próprio processo (um worker ou todas as posições do pool em uso)
+        workers = 1
+        bound = np.array([_NO_BOUND], dtype=np.int64)
+        for index, job in enumerate(jobs):
+            if context.expired() or context.bound_reached:
+                break
+            collect(index, _pack(job, bound))
+    else:
+        pool.bounds[slot] = _NO_BOUND
+        try:
+            futures: Dict[Future, int] = {
+                pool.executor.submit(_pack_in_worker, job, slot): index for index, job in enumerate(jobs)
+            }
+            pending = set(futures)
+            while pending:
+                timeout = None if context.deadline is None else max(0.0, context.deadline - time.perf_counter())
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(futures[future], future.result())
+                if pending and (context.bound_reached or context.expired()):
+                    # Cancela as que não começaram e faz as em andamento desistirem
+                    for future in pending:
+                        future.cancel()
+                    pool.bounds[slot] = 0
+                    for future in wait(pending).done:
+                        if not future.cancelled():
+                            collect(futures[future], future.result())
+                    pending = set()
+        finally:
+            pool.release(slot)
+
+    fallback = best is None
+    if fallback:
+        # Prazo esgotado antes de qualquer execução terminar: um Skyline (o mais rápido) sem limite
+        plans.append((plans[0][0], "skyline", None, plans[0][3]))
+        outcomes.append(None)
+        status.append("fallback")
+        collect(len(jobs), _pack(("skyline",) + jobs[0][1:], np.array([_NO_BOUND], dtype=np.int64)))
+        status[-1] = "fallback"
+
+    completed = [score for index, score in enumerate(outcomes) if score is not None and index < len(jobs)]
+    score, index, packing = best
+    key, engine, heuristic, seed = plans[index]
+    stats: Dict[str, Any] = {
+        "runs": len(jobs),
+        "workers": workers,
+        "completed": status.count("completed"),
+        "pruned": status.count("pruned"),
+        "cancelled": status.count("cancelled"),
+        "fallback": fallback,
+        "stopped_at_bound": context.bound_reached,
+        "best": {"sort_key": key, "engine": engine, "heuristic": heuristic, "seed": seed,
+                 "sheets": score[1], "waste": round(score[2], 2)},
+        "spread": {
+            name: {"min": min(values), "max": max(values), "mean": round(float(np.mean(values)), 2)}
+            for name, values in (
+                ("sheets", [score[1] for score in completed]),
+                ("waste", [round(score[2], 2) for score in completed]),
+            )
+        } if completed else {},
+        "results": [
+            {
+                "sort_key": key, "engine": engine, "heuristic": heuristic, "seed": seed,
+                "status": status[index],
+                "sheets": outcomes[index][1] if outcomes[index] else None,
+                "waste": round(outcomes[index][2], 2) if outcomes[index] else None,
+            }
+            for index, (key, engine, heuristic, seed) in enumerate(plans)
+        ],
+    }
+    return packing, stats
@@ -0,0 +1,77 @@
+"""
+Orientações das peças 2D
+
+Cada tipo de peça tem até duas orientações: 0 (como definida, largura ao
+longo de x e comprimento ao longo de y) e 1 (girada 90°). As orientações
+permitidas e o encaixe em cada tipo de chapa são calculados uma vez por
+tipo de peça e de chapa; os motores só consultam as tabelas.
+"""
+
+from typing import List
+
+import numpy as np
+
+from .demand import DemandVector
+from .models import GrainDirection
+
+_EPS = 1e-9
+
+
+def allowed_orientations(parts: DemandVector, allow_rotation: bool) -> np.ndarray:
+    """
+    Orientações permitidas por tipo de peça
+
+    A direção do veio da peça prevalece sobre `allow_rotation`: LENGTH fixa
+    a orientação original e WIDTH obriga a peça a ser girada.
+
+    Returns:
+        Array (2, n) de bool: linha 0 = orientação original, linha 1 = girada
+    """
+    allowed = np.zeros((2, len(parts)), dtype=bool)
+    for i, part in enumerate(parts.parts):
+        if part.grain_direction == GrainDirection.LENGTH:
+            allowed[0, i] = True
+        elif part.grain_direction == GrainDirection.WIDTH:
+            allowed[1, i] = True
+        else:
+            allowed[:, i] = (True, allow_rotation)
+    return allowed
+
+
+class OrientationTable:
+    """
+    Dimensões e encaixe por (orientação, tipo de peça, tipo de chapa)
+
+    Peças quadradas não são giradas: a outra orientação seria idêntica e só
+    dobraria as buscas.
+    """
+
+    def __init__(self, widths: np.ndarray, heights: np.ndarray, allowed: np.ndarray,
+                 sheet_widths: np.ndarray, sheet_heights: np.ndarray):
+        """
+        Args:
+            widths, heights: Dimensões por tipo de peça na orientação original
+            allowed: Orientações permitidas, (2, n) como em `allowed_orientations`
+            sheet_widths, sheet_heights: Dimensões por tipo de chapa
+        """
+        self.widths = np.stack((widths, heights))
+        self.heights = np.stack((heights, widths))
+        allowed = np.array(allowed, dtype=bool)
+        allowed[1] &= ~(allowed[0] & (np.abs(widths - heights) < _EPS))
+        self.allowed = allowed
+        # fits[o, i, s]: a peça i na orientação o cabe na chapa s
+        self.fits = (allowed[:, :, None] &
+                     (self.widths[:, :, None] <= sheet_widths[None, None, :] + _EPS) &
+                     (self.heights[:, :, None] <= sheet_heights[None, None, :] + _EPS))
+
+        # Orientações úteis de cada tipo, a de menor altura primeiro
+        usable = self.fits.any(axis=2)
+        flat_first = self.heights[1] < self.heights[0] - _EPS
+        self.options: List[List[int]] = []
+        for i in range(len(widths)):
+            options = [o for o in ((1, 0) if flat_first[i] else (0, 1)) if usable[o, i]]
+            self.options.append(options)
+
+    def preferred(self) -> np.ndarray:
+        """Primeira orientação útil de cada tipo (0 se nenhuma chapa comporta a peça)"""
+        return np.array([options[0] if options else 0 for options in self.options], dtype=np.int64)
@@ -0,0 +1,275 @@
+"""
+Divisão de requisições em partições independentes
+
+Uma partição reúne as peças de uma dimensão (barras/perfis com peças
+lineares, chapas com peças retangulares) que aceitam o mesmo material
+(`Part.material`: id ou família; num retalho, também o material de
+origem) e os materiais compatíveis com elas, de modo que nenhuma peça
+vai para um material que ela não aceita.
+
+Partições sem material em comum formam cadeias independentes, otimizadas
+em paralelo num pool de processos: a latência é a da cadeia mais lenta.
+Partições que disputam o mesmo estoque ficam na mesma cadeia e são
+resolvidas em sequência, da mais restrita (menos materiais) para a mais
+ampla, cada uma com o estoque que as anteriores deixaram. Os resultados
+são juntados num único OptimizationResult.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .bounds import optimality_gap
+from .incremental import renumber, split_unit_id
+from .models import Material, OptimizationRequest, OptimizationResult, Part
+
+# Dimensão -> (tipos de material, tipo de peça, algoritmos, algoritmo padrão)
+DIMENSIONS = {
+    "1D": (("bar", "profile"), "linear", ("first_fit", "best_fit", "genetic", "column_generation"), "best_fit"),
+    "2D": (("sheet",), "rectangular", ("guillotine", "maxrects", "skyline", "multistart"), "guillotine"),
+}
+
+# Unidade do desperdício (total_waste) de cada dimensão
+WASTE_UNITS = {"1D": "mm", "2D": "mm²"}
+
+# (dimensão, material aceito pelas peças ou None, requisição da partição)
+Partition = Tuple[str, Optional[str], OptimizationRequest]
+
+
+def accepts(part: Part, material: Optional[Material]) -> bool:
+    """
+    Indica se a peça pode ser cortada no material (None = material desconhecido)
+
+    `Part.material` casa com o id, a família ou, nos retalhos, o id do material de origem.
+    """
+    if part.material is None:
+        return True
+    return material is not None and part.material in (material.id, material.origin_id, material.family)
+
+
+def split_request(request: OptimizationRequest) -> Tuple[List[Partition], List[List[int]], List[str]]:
+    """
+    Separa a requisição por dimensão e material aceito pelas peças
+
+    Cada partição usa o algoritmo pedido se ele for da sua dimensão, senão o
+    padrão dela. Os retalhos já vêm nos materiais, então use_remnants é desligado.
+
+    Returns:
+        Tupla (partições, cadeias de índices de partições que dividem estoque,
+        ids das peças sem material compatível)
+    """
+    partitions: List[Partition] = []
+    stock_sets: List[set] = []
+    unassigned: List[str] = []
+    for dimension, (material_types, part_type, algorithms, default) in DIMENSIONS.items():
+        materials = [m for m in request.materials if m.material_type.value in material_types]
+        groups: Dict[Optional[str], list] = {}
+        for part in request.parts:
+            if part.part_type.value == part_type:
+                groups.setdefault(part.material, []).append(part)
+
+        for key, parts in groups.items():
+            compatible = [m for m in materials if accepts(parts[0], m)]
+            if not compatible:
+                unassigned.extend(p.id for p in parts)
+                continue
+            partitions.append((dimension, key, request.copy(update={
+                "materials": compatible,
+                "parts": parts,
+                "algorithm": request.algorithm if request.algorithm in algorithms else default,
+                "use_remnants": False,
+            })))
+            stock_sets.append({m.id for m in compatible})
+
+    # Componentes conexas pelo estoque compartilhado
+    component = list(range(len(partitions)))
+
+    def root(i: int) -> int:
+        while component[i] != i:
+            component[i] = component[component[i]]
+            i = component[i]
+        return i
+
+    for i in range(len(partitions)):
+        for j in range(i):
+            if stock_sets[i] & stock_sets[j]:
+                component[root(i)] = root(j)
+
+    chains: Dict[int, List[int]] = {}
+    for i in range(len(partitions)):
+        chains.setdefault(root(i), []).append(i)
+    ordered = [sorted(chain, key=lambda i: (len(stock_sets[i]), i)) for chain in chains.values()]
+    return partitions, ordered, unassigned
+
+
+def solve_chain(planner, requests: List[OptimizationRequest]) -> List[OptimizationResult]:
+    """
+    Resolve em sequência partições que dividem estoque
+
+    Cada partição recebe o estoque que as anteriores deixaram, e as unidades
+    de material continuam a numeração das anteriores.
+    """
+    used: Dict[str, int] = {}
+    results = []
+    for request in requests:
+        start_time = time.time()
+        stock = [m.copy(update={"quantity": m.quantity - used.get(m.id, 0)})
+                 for m in request.materials if m.quantity > used.get(m.id, 0)]
+        if not stock:
+            results.append(OptimizationResult(
+                success=True, efficiency=0.0, total_waste=0.0, materials_used=0, cuts=[], leftovers=[],
+                execution_order=[], algorithm_used=request.algorithm, processing_time=0,
+                metadata={"unplaced_parts": sum(p.quantity for p in request.parts)}
+            ))
+            continue
+
+        result = planner._optimize_dimension(request.copy(update={"materials": stock}))
+        if used:
+            cuts = [renumber(cut, used, {}) for cut in result.cuts]
+            renamed = {old.material_id: new.material_id for old, new in zip(result.cuts, cuts)}
+            result = result.copy(update={
+                "cuts": cuts,
+                "leftovers": [leftover.copy(update={"material_id": renamed.get(leftover.material_id,
+                                                                              leftover.material_id)})
+                              for leftover in result.leftovers],
+            })
+        for cut in result.cuts:
+            base, number = split_unit_id(cut.material_id)
+            used[base] = max(used.get(base, 0), number)
+        result.processing_time = (time.time() - start_time) * 1000
+        results.append(result)
+    return results
+
+
+# Estado por processo worker: um CutPlanner por configuração
+_worker_planners: Dict[Tuple, Any] = {}
+
+
+def _solve_chain_in_worker(payloads: List[Dict[str, Any]], planner_options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from .core import CutPlanner
+
+    key = tuple(sorted(planner_options.items()))
+    if key not in _worker_planners:
+        _worker_planners[key] = CutPlanner(**planner_options)
+    results = solve_chain(_worker_planners[key], [OptimizationRequest(**payload) for payload in payloads])
+    return [result.dict() for result in results]
+
+
+_executors: Dict[int, ProcessPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                      mp_context=multiprocessing.get_context("spawn"))
+        return _executors[workers]
+
+
+def solve_partitions(planner, partitions: List[Partition], chains: List[List[int]],
+                     workers: Optional[int] = None,
+                     planner_options: Optional[Dict[str, Any]] = None,
+                     executor: Optional[Executor] = None) -> List[OptimizationResult]:
+    """
+    Otimiza as partições: cadeias em paralelo quando há mais de um núcleo
+
+    Args:
+        planner: CutPlanner usado no modo sequencial
+        partitions, chains: Partições e cadeias de `split_request`
+        workers: Processos do pool (padrão: núcleos da máquina; 1 = sequencial no processo)
+        planner_options: Argumentos para criar o CutPlanner de cada worker
+        executor: Pool de processos externo (substitui workers)
+
+    Returns:
+        Resultados na ordem das partições
+    """
+    results: List[Optional[OptimizationResult]] = [None] * len(partitions)
+    if executor is None:
+        workers = min(workers or os.cpu_count() or 1, len(chains))
+        executor = _get_executor(workers) if workers > 1 else None
+    if executor is None or len(chains) <= 1:
+        for chain in chains:
+            for i, result in zip(chain, solve_chain(planner, [partitions[i][2] for i in chain])):
+                results[i] = result
+        return results
+
+    futures = [
+        executor.submit(_solve_chain_in_worker, [partitions[i][2].dict() for i in chain], planner_options or {})
+        for chain in chains
+    ]
+    for chain, future in zip(chains, futures):
+        for i, payload in zip(chain, future.result()):
+            results[i] = OptimizationResult(**payload)
+    return results
+
+
+def merge_results(request: OptimizationRequest, partitions: List[Partition],
+                  results: List[OptimizationResult], unassigned: List[str]) -> OptimizationResult:
+    """
+    Junta os resultados das partições
+
+    O aproveitamento total é a média dos aproveitamentos ponderada pelo
+    número de materiais usados (comprimento e área não se somam). O
+    desperdício é somado por dimensão em metadata["waste_by_dimension"];
+    total_waste fica numa unidade só (metadata["waste_unit"]): a da
+    dimensão do plano ou, num plano misto, mm (o das barras). Os detalhes
+    de cada partição ficam em metadata["partitions"].
+    """
+    failed = [result for result in results if not result.success]
+    used = sum(result.materials_used for result in results)
+    efficiency = sum(r.efficiency * r.materials_used for r in results) / used if used else 0.0
+    costs = [result.total_cost for result in results if result.total_cost is not None]
+    bound = sum(r.metadata.get("lower_bound", {}).get("materials", 0) for r in results)
+    # Gap só para o plano completo: toda peça numa partição e cada partição com gap definido
+    complete = not unassigned and not failed and all(r.metadata.get("gap") is not None for r in results)
+    waste: Dict[str, float] = {}
+    for (dimension, _, _), result in zip(partitions, results):
+        waste[dimension] = waste.get(dimension, 0.0) + result.total_waste
+    plan_dimension = next(iter(waste)) if len(waste) == 1 else "mixed"
+    waste_unit = WASTE_UNITS.get(plan_dimension, WASTE_UNITS["1D"])
+
+    metadata: Dict[str, Any] = {
+        "dimension": plan_dimension,
+        "partitions": [
+            {
+                "dimension": dimension,
+                "material": material,
+                "algorithm": sub_request.algorithm,
+                "materials": [m.id for m in sub_request.materials],
+                "parts": [p.id for p in sub_request.parts],
+                "success": result.success,
+                "efficiency": result.efficiency,
+                "total_waste": result.total_waste,
+                "materials_used": result.materials_used,
+                "processing_time": result.processing_time,
+                "metadata": result.metadata,
+            }
+            for (dimension, material, sub_request), result in zip(partitions, results)
+        ],
+        "unassigned_parts": unassigned,
+        "waste_by_dimension": {name: {"total_waste": value, "unit": WASTE_UNITS[name]}
+                               for name, value in waste.items()},
+        "waste_unit": waste_unit,
+        "lower_bound": {"materials": bound},
+        "gap": optimality_gap(used, bound, complete),
+    }
+    if failed:
+        metadata["error"] = "; ".join(str(result.metadata.get("error")) for result in failed)
+
+    return OptimizationResult(
+        success=not failed,
+        efficiency=efficiency,
+        total_waste=waste.get(plan_dimension, waste.get("1D", 0.0)),
+        total_cost=sum(costs) if costs else None,
+        materials_used=used,
+        cuts=[cut for result in results for cut in result.cuts],
+        leftovers=[leftover for result in results for leftover in result.leftovers],
+        execution_order=[step for result in results for step in result.execution_order],
+        algorithm_used=request.algorithm,
+        processing_time=0,  # Será atualizado pelo método principal
+        metadata=metadata
+    )
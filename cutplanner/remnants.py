@@ -0,0 +1,280 @@
+"""
+Estoque persistente de retalhos em SQLite
+
+Os retalhos ficam num arquivo local, indexados por tipo de material,
+material de origem e dimensões (comprimento e, para chapas, largura), de
+modo que as buscas por faixa usam o índice mesmo com dezenas de milhares
+de retalhos. O CutPlanner oferece os retalhos compatíveis como material
+de uma unidade antes do estoque novo, com o id e a família do material de
+origem (peças restritas a um material aceitam os retalhos dele); quando o
+plano é efetivado, os retalhos consumidos saem e as sobras do plano entram
+numa única transação.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .models import Material, MaterialType, OptimizationRequest, OptimizationResult, Remnant
+
+# Prefixo do id dos materiais criados a partir de retalhos ("retalho_<id>")
+REMNANT_PREFIX = "retalho_"
+
+_COLUMNS = "id, material_id, material_type, name, length, width, thickness, family, created_at"
+
+
+class RemnantConflictError(RuntimeError):
+    """Um retalho usado pelo plano já não está no estoque (consumido por outro plano)"""
+
+
+def remnant_material(remnant: Remnant, origin: Optional[Material] = None) -> Material:
+    """
+    Material de uma unidade que representa o retalho na otimização
+
+    Args:
+        remnant: Retalho do estoque
+        origin: Material de origem na requisição (família dos retalhos guardados sem ela)
+    """
+    return Material(
+        id=f"{REMNANT_PREFIX}{remnant.id}",
+        name=f"{remnant.name} (retalho {remnant.id})",
+        material_type=remnant.material_type,
+        length=remnant.length,
+        width=remnant.width,
+        thickness=remnant.thickness,
+        quantity=1,
+        cost_per_unit=0.0,
+        family=remnant.family or (origin.family if origin is not None else None),
+        origin_id=remnant.material_id
+    )
+
+
+def remnant_id_of(material_id: str) -> Optional[int]:
+    """
+    Id do retalho a partir do id de um material ou de uma unidade de material
+
+    Returns:
+        Id do retalho, ou None se o material não veio do estoque de retalhos
+    """
+    if not material_id.startswith(REMNANT_PREFIX):
+        return None
+    number = material_id[len(REMNANT_PREFIX):].split("_", 1)[0]
+    return int(number) if number.isdigit() else None
+
+
+class RemnantStore:
+    """
+    Estoque de retalhos persistente
+
+    Uma conexão por instância, protegida por lock; processos diferentes
+    podem abrir o mesmo arquivo (modo WAL). A conexão (e o arquivo) só é
+    aberta no primeiro uso, então criar o estoque não tem efeito em disco.
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        """
+        Args:
+            db_path: Arquivo SQLite (":memory:" mantém o estoque só neste processo)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            with self._open_lock:
+                if self._connection is None:
+                    self._connection = self._connect()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS remnants ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, material_id TEXT NOT NULL, "
+            "material_type TEXT NOT NULL, name TEXT NOT NULL, length REAL NOT NULL, "
+            "width REAL, thickness REAL, family TEXT, created_at REAL NOT NULL)"
+        )
+        # Arquivos criados antes da coluna family
+        if "family" not in {row[1] for row in db.execute("PRAGMA table_info(remnants)")}:
+            db.execute("ALTER TABLE remnants ADD COLUMN family TEXT")
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS remnants_lookup "
+            "ON remnants (material_type, material_id, length, width)"
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS remnants_type_length ON remnants (material_type, length, width)"
+        )
+        return db
+
+    def add(self, remnants: Iterable[Remnant]) -> List[int]:
+        """Guarda retalhos e retorna os ids atribuídos"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                ids = self._insert(remnants)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return ids
+
+    def get(self, remnant_id: int) -> Optional[Remnant]:
+        """Retalho pelo id"""
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM remnants WHERE id = ?", (remnant_id,)).fetchone()
+        return self._remnant(row) if row else None
+
+    def remove(self, remnant_id: int) -> bool:
+        """Remove um retalho; False se ele não existia"""
+        with self._lock:
+            return self._db.execute("DELETE FROM remnants WHERE id = ?", (remnant_id,)).rowcount > 0
+
+    def find(self, material_type: MaterialType, material_id: Optional[str] = None,
+             min_length: float = 0.0, max_length: Optional[float] = None,
+             min_width: Optional[float] = None, max_width: Optional[float] = None,
+             limit: Optional[int] = 100) -> List[Remnant]:
+        """
+        Busca por faixa de dimensões, do menor para o maior comprimento
+
+        Args:
+            material_type: Tipo do material
+            material_id: Material de origem (None = qualquer um)
+            min_length, max_length: Faixa de comprimento
+            min_width, max_width: Faixa de largura (chapas)
+            limit: Máximo de retalhos retornados (None = todos)
+        """
+        where = ["material_type = ?", "length >= ?"]
+        args: List[Any] = [getattr(material_type, "value", material_type), min_length]
+        if material_id is not None:
+            where.append("material_id = ?")
+            args.append(material_id)
+        if max_length is not None:
+            where.append("length <= ?")
+            args.append(max_length)
+        if min_width is not None:
+            where.append("width >= ?")
+            args.append(min_width)
+        if max_width is not None:
+            where.append("width <= ?")
+            args.append(max_width)
+        sql = f"SELECT {_COLUMNS} FROM remnants WHERE {' AND '.join(where)} ORDER BY length, width"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [self._remnant(row) for row in rows]
+
+    def best_fit(self, material_type: MaterialType, length: float, width: Optional[float] = None,
+                 material_id: Optional[str] = None) -> Optional[Remnant]:
+        """Menor retalho (em comprimento) que comporta length x width"""
+        found = self.find(material_type, material_id, min_length=length, min_width=width, limit=1)
+        return found[0] if found else None
+
+    def commit_plan(self, request: OptimizationRequest, result: OptimizationResult) -> Dict[str, List[int]]:
+        """
+        Efetiva um plano: remove os retalhos consumidos e guarda as sobras utilizáveis
+
+        Tudo acontece numa transação; se algum retalho do plano já foi
+        consumido, nada é alterado.
+
+        Args:
+            request: Requisição original (materiais de origem das sobras)
+            result: Resultado da otimização com use_remnants
+
+        Returns:
+            Dicionário com os ids consumidos ("consumed") e guardados ("added")
+
+        Raises:
+            RemnantConflictError: Se algum retalho usado já não está no estoque
+        """
+        materials = {m.id: m for m in request.materials}
+        consumed = sorted({remnant_id_of(cut.material_id) for cut in result.cuts} - {None})
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                origins = {}
+                for rid in consumed:
+                    row = self._db.execute(f"SELECT {_COLUMNS} FROM remnants WHERE id = ?", (rid,)).fetchone()
+                    if row is None:
+                        raise RemnantConflictError(f"Retalho {rid} já não está no estoque")
+                    origins[rid] = self._remnant(row)
+                    self._db.execute("DELETE FROM remnants WHERE id = ?", (rid,))
+
+                now = time.time()
+                new_remnants = []
+                for leftover in result.leftovers:
+                    if not leftover.usable:
+                        continue
+                    # Id da unidade ("<material>_<n>") -> material de origem
+                    source_id = leftover.material_id.rsplit("_", 1)[0]
+                    rid = remnant_id_of(source_id)
+                    origin = origins.get(rid) if rid is not None else materials.get(source_id)
+                    if origin is None:
+                        continue
+                    sheet = origin.material_type == MaterialType.SHEET
+                    new_remnants.append(Remnant(
+                        material_id=origin.material_id if rid is not None else origin.id,
+                        material_type=origin.material_type,
+                        name=origin.name,
+                        length=leftover.length,
+                        width=leftover.width if sheet else None,
+                        thickness=origin.thickness,
+                        family=origin.family,
+                        created_at=now
+                    ))
+                added = self._insert(new_remnants)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return {"consumed": consumed, "added": added}
+
+    def clear(self) -> None:
+        """Remove todos os retalhos"""
+        with self._lock:
+            self._db.execute("DELETE FROM remnants")
+
+    def stats(self) -> Dict[str, Any]:
+        """Quantidade de retalhos por tipo de material"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT material_type, COUNT(*), SUM(length * COALESCE(width, 1)) FROM remnants GROUP BY material_type"
+            ).fetchall()
+        return {
+            "db_path": self.db_path,
+            "total": sum(count for _, count, _ in rows),
+            "by_type": {kind: {"count": count, "total_size": total} for kind, count, total in rows},
+        }
+
+    def close(self) -> None:
+        """Fecha a conexão (se chegou a ser aberta)"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _insert(self, remnants: Iterable[Remnant]) -> List[int]:
+        now = time.time()
+        ids = []
+        for remnant in remnants:
+            cursor = self._db.execute(
+                "INSERT INTO remnants (material_id, material_type, name, length, width, thickness, family, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (remnant.material_id, getattr(remnant.material_type, "value", remnant.material_type),
+                 remnant.name, remnant.length, remnant.width, remnant.thickness, remnant.family,
+                 remnant.created_at or now)
+            )
+            ids.append(cursor.lastrowid)
+        return ids
+
+    @staticmethod
+    def _remnant(row) -> Remnant:
+        return Remnant(**dict(zip(_COLUMNS.split(", "), row)))
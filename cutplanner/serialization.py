@@ -0,0 +1,83 @@
+"""
+Serialização rápida dos resultados
+
+A resposta é escrita direto em bytes JSON a partir do dicionário do
+resultado (o que os workers devolvem), sem passar pelo encoder genérico do
+FastAPI, que percorre o plano objeto a objeto e domina o tempo de resposta
+em planos grandes. Os números do plano saem arredondados a FLOAT_DECIMALS
+casas, como em OptimizationResult.Config.json_encoders, com -0.0 virando
+0.0 e NaN/infinito virando null; metadata sai como está.
+
+benchmarks/bench_serialization.py compara este caminho com o genérico.
+"""
+
+import json
+import math
+from enum import Enum
+from typing import Any, Dict, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from .models import OptimizationResult
+
+FLOAT_DECIMALS = 2
+
+# Campos do resultado que não são números do plano
+_NESTED = ("cuts", "leftovers", "metadata")
+
+
+def round_float(value: float) -> Any:
+    """Arredondamento estável de um número do plano (None se não for finito)"""
+    if not math.isfinite(value):
+        return None
+    return round(value, FLOAT_DECIMALS) + 0.0
+
+
+def _rounded(fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: round_float(value) if isinstance(value, float) else value for key, value in fields.items()}
+
+
+def _plain(value: Any) -> Any:
+    """Tipos que o json da biblioteca padrão não conhece (usado só em metadata)"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Objeto do tipo {type(value).__name__} não é serializável em JSON")
+
+
+def result_payload(result: Union[OptimizationResult, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Resultado como dicionário pronto para JSON, com os números do plano arredondados
+
+    Args:
+        result: OptimizationResult ou o dicionário de `result.dict()`
+    """
+    data = result.dict() if isinstance(result, BaseModel) else result
+    payload = _rounded({key: value for key, value in data.items() if key not in _NESTED})
+    payload["cuts"] = [
+        {**_rounded({key: value for key, value in cut.items() if key != "cuts"}),
+         "cuts": [_rounded(operation) for operation in cut["cuts"]]}
+        for cut in data["cuts"]
+    ]
+    payload["leftovers"] = [_rounded(leftover) for leftover in data["leftovers"]]
+    payload["metadata"] = data.get("metadata", {})
+    return payload
+
+
+def dumps_result(result: Union[OptimizationResult, Dict[str, Any]]) -> bytes:
+    """
+    Resultado serializado em bytes JSON (UTF-8, sem espaços)
+
+    Args:
+        result: OptimizationResult ou o dicionário de `result.dict()`
+    """
+    return json.dumps(result_payload(result), ensure_ascii=False, separators=(",", ":"),
+                      default=_plain).encode("utf-8")
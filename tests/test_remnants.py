@@ -0,0 +1,61 @@
+"""
+Retalhos do estoque oferecidos a peças restritas a um material (Part.material)
+"""
+
+import unittest
+
+from cutplanner.core import CutPlanner
+from cutplanner.models import Material, MaterialType, OptimizationRequest, Part, PartType, PlanDelta, Remnant
+from cutplanner.remnants import RemnantStore
+
+
+class RemnantMaterialTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = RemnantStore()
+        self.store.add([Remnant(material_id="aco6", material_type=MaterialType.BAR, name="Aço 6 m",
+                                length=2000, family="aco")])
+        self.planner = CutPlanner(remnant_store=self.store, partition_workers=1)
+
+    def tearDown(self):
+        self.store.close()
+
+    def request(self, material, quantity=1):
+        return OptimizationRequest(
+            materials=[
+                Material(id="aco6", name="Aço 6 m", material_type=MaterialType.BAR, length=6000,
+                         quantity=5, family="aco"),
+                Material(id="alu6", name="Alumínio 6 m", material_type=MaterialType.BAR, length=6000,
+                         quantity=5, family="aluminio"),
+            ],
+            parts=[Part(id="p", name="Peça", part_type=PartType.LINEAR, length=1500, quantity=quantity,
+                        material=material)],
+            use_remnants=True
+        )
+
+    def test_restricted_parts_use_remnants_of_their_material(self):
+        for material in (None, "aco6", "aco"):
+            with self.subTest(material=material):
+                result = self.planner.optimize(self.request(material))
+                self.assertTrue(result.success, result.metadata.get("error"))
+                self.assertEqual([cut.material_id for cut in result.cuts], ["retalho_1_1"])
+                self.assertEqual(result.metadata["remnants"]["used"], [1])
+
+    def test_other_material_does_not_use_remnant(self):
+        result = self.planner.optimize(self.request("aluminio"))
+        self.assertTrue(result.success, result.metadata.get("error"))
+        self.assertEqual([cut.material_id for cut in result.cuts], ["alu6_1"])
+        self.assertEqual(result.metadata["remnants"]["used"], [])
+
+    def test_reoptimize_keeps_remnant_for_restricted_parts(self):
+        request = self.request("aco6")
+        result = self.planner.optimize(request)
+        short = Part(id="q", name="Peça curta", part_type=PartType.LINEAR, length=400, quantity=1, material="aco")
+        reoptimized = self.planner.reoptimize(request, result, PlanDelta(add_parts=[short]))
+        self.assertTrue(reoptimized.success, reoptimized.metadata.get("error"))
+        self.assertEqual([cut.material_id for cut in reoptimized.cuts], ["retalho_1_1"])
+        self.assertEqual(reoptimized.metadata["reoptimization"]["inserted_parts"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()